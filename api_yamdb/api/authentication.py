@@ -0,0 +1,101 @@
+"""JWT-аутентификация с кэшированием пользователей.
+
+Пользователь берётся из LRU-кэша процесса вместе с версией строки, под
+которой он был прочитан, и без обращения к БД, пока не истёк срок записи.
+Версия меняется после коммита любой записи пользователя (сигналы
+reviews.signals) в общем кэше версий и сразу в снимке версий процесса.
+Снимок сверяется с общим кэшем одним запросом за все ключи не чаще раза в
+VERSION_CHECK_INTERVAL секунд, поэтому запрос к API за версией не ходит:
+изменение в этом процессе видно сразу, в других — не позже интервала.
+Права проверяются по этому пользователю; claims role и is_staff в токене
+носят справочный характер, и после смены роли старый токен продолжает
+работать с новой ролью.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config import AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TIMEOUT
+from reviews.models import User
+from reviews.versions import get_row_version
+
+ROLE_CLAIMS = ('role', 'is_staff')
+
+
+class UserCache:
+    """LRU-кэш пользователей с версией и ограниченным временем жизни."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+
+    def get(self, user_id, version):
+        """Пользователь версии `version` из кэша или None."""
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None:
+                return None
+            user, user_version, expires = entry
+            if user_version != version or expires < time.monotonic():
+                del self.users[user_id]
+                return None
+            self.users.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user, version):
+        """Сохраняет пользователя, вытесняя самого старого."""
+        with self.lock:
+            self.users[user_id] = (
+                user, version, time.monotonic() + self.timeout
+            )
+            self.users.move_to_end(user_id)
+            while len(self.users) > self.maxsize:
+                self.users.popitem(last=False)
+
+    def clear(self):
+        """Очищает кэш."""
+        with self.lock:
+            self.users.clear()
+
+
+user_cache = UserCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TIMEOUT)
+
+
+def access_token_for_user(user):
+    """Access-токен с ролью пользователя в claims (для клиентов)."""
+    token = AccessToken.for_user(user)
+    for claim in ROLE_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация, берущая пользователя из LRU-кэша процесса."""
+
+    def get_user(self, validated_token):
+        """Пользователь из кэша или, если сменилась его версия, из БД."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатор пользователя.'
+            )
+        version = get_row_version(User, user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, version)
+        elif not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        return copy.copy(user)
@@ -0,0 +1,255 @@
+"""Пакетное создание отзывов и комментариев.
+
+Элементы пакета проверяются сериализатором по отдельности, а ссылки на
+произведения, отзывы и авторов — одним запросом на весь пакет. Отзывы,
+нарушающие уникальность (title, author), отсекаются по одному запросу к
+существующим парам. Корректные элементы сохраняются одним bulk_create,
+результат возвращается для каждого элемента в порядке запроса.
+
+Если bulk_create нарушает ограничение из-за параллельной записи, пакет
+сохраняется по одному элементу в точках сохранения, и конфликт
+возвращается как ошибка своего элемента. Если БД не отдаёт id из
+bulk_create (SQLite), они перечитываются в той же транзакции.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from api.serializers import (
+    REVIEW_EXISTS, BulkCommentSerializer, BulkReviewSerializer
+)
+from config import BULK_CREATE_LIMIT
+from reviews.models import Comment, Review, Title, User
+from reviews.ratings import rebuild_ratings
+from reviews.search import schedule_index
+from reviews.versions import bump_version_on_commit
+
+BULK_CONFLICT = 'Объект конфликтует с параллельной записью.'
+
+
+class BulkCreator:
+    """Проверяет и сохраняет пакет объектов одной модели."""
+
+    model = None
+    serializer_class = None
+    parent_field = None
+    parent_model = None
+
+    def __init__(self, items, user):
+        if not isinstance(items, list):
+            raise serializers.ValidationError(
+                'Ожидается список объектов.'
+            )
+        if len(items) > BULK_CREATE_LIMIT:
+            raise serializers.ValidationError(
+                f'В одном запросе не больше {BULK_CREATE_LIMIT} объектов.'
+            )
+        self.items = items
+        self.user = user
+        self.results = [None] * len(items)
+
+    def error(self, index, errors):
+        """Запоминает ошибку элемента."""
+        self.results[index] = {'index': index, 'errors': errors}
+
+    def validate_items(self):
+        """Проверяет поля элементов; возвращает {индекс: данные}."""
+        valid = {}
+        for index, item in enumerate(self.items):
+            serializer = self.serializer_class(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                self.error(index, serializer.errors)
+        return valid
+
+    def get_parents(self, valid):
+        """Множество существующих id родительских объектов."""
+        return set(self.parent_model.objects.filter(
+            pk__in={data[self.parent_field] for data in valid.values()}
+        ).values_list('pk', flat=True))
+
+    def get_authors(self, valid):
+        """Авторы по username; без username автор — текущий пользователь."""
+        usernames = {
+            data['author'] for data in valid.values() if 'author' in data
+        }
+        authors = {self.user.username: self.user}
+        if usernames - authors.keys():
+            authors.update(
+                (user.username, user)
+                for user in User.objects.filter(username__in=usernames)
+            )
+        return authors
+
+    def build(self, data, author):
+        """Создаёт несохранённый объект."""
+        return self.model(
+            author=author,
+            text=data['text'],
+            **{f'{self.parent_field}_id': data[self.parent_field]}
+        )
+
+    def prepare(self, valid, authors):
+        """Загружает данные, общие для проверки всех элементов."""
+
+    def check_item(self, data, author):
+        """Дополнительная проверка объекта; возвращает ошибку или None."""
+        return None
+
+    def conflict_error(self):
+        """Ошибка элемента, нарушившего ограничение БД."""
+        return {'non_field_errors': [BULK_CONFLICT]}
+
+    def after_create(self, objects):
+        """Вызывается в транзакции после bulk_create."""
+
+    def fetch_ids(self, objects):
+        """Проставляет id объектам, сохранённым без RETURNING.
+
+        SQLite не пускает другие записи до конца транзакции, поэтому
+        последние len(objects) строк родителей пакета — это объекты пакета
+        в порядке вставки.
+        """
+        ids = self.model.objects.filter(**{
+            f'{self.parent_field}_id__in': {
+                getattr(instance, f'{self.parent_field}_id')
+                for instance in objects
+            }
+        }).order_by('-pk').values_list('pk', flat=True)[:len(objects)]
+        for instance, pk in zip(objects, reversed(ids)):
+            instance.pk = pk
+
+    def insert(self, objects):
+        """Сохраняет объекты одним запросом и обновляет зависимые данные."""
+        self.model.objects.bulk_create(objects)
+        if objects[0].pk is None:
+            self.fetch_ids(objects)
+        self.after_create(objects)
+
+    def insert_each(self, built):
+        """Сохраняет объекты по одному; конфликтующие помечает ошибкой."""
+        created = {}
+        for index, instance in built.items():
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([instance])
+            except IntegrityError:
+                self.error(index, self.conflict_error())
+                continue
+            created[index] = instance
+        if created:
+            objects = list(created.values())
+            if objects[0].pk is None:
+                self.fetch_ids(objects)
+            self.after_create(objects)
+        return created
+
+    def save(self, built):
+        """Сохраняет пакет; при конфликте — по одному элементу."""
+        try:
+            with transaction.atomic():
+                self.insert(list(built.values()))
+            return built
+        except IntegrityError:
+            for instance in built.values():
+                instance.pk = None
+        with transaction.atomic():
+            return self.insert_each(built)
+
+    def build_valid(self, valid):
+        """Несохранённые объекты элементов, прошедших проверку ссылок."""
+        parents = self.get_parents(valid) if valid else set()
+        authors = self.get_authors(valid) if valid else {}
+        self.prepare(valid, authors)
+        built = {}
+        for index, data in valid.items():
+            if data[self.parent_field] not in parents:
+                self.error(index, {self.parent_field: [
+                    f'{self.parent_model._meta.verbose_name} '
+                    f'{data[self.parent_field]} не найден.'
+                ]})
+                continue
+            author = authors.get(data.get('author', self.user.username))
+            if author is None:
+                self.error(index, {'author': [
+                    f'Пользователь {data["author"]} не найден.'
+                ]})
+                continue
+            error = self.check_item(data, author)
+            if error:
+                self.error(index, error)
+                continue
+            built[index] = self.build(data, author)
+        return built
+
+    def create(self):
+        """Проверяет и сохраняет пакет; возвращает результаты."""
+        built = self.build_valid(self.validate_items())
+        created = self.save(built) if built else {}
+        if created:
+            bump_version_on_commit(self.model)
+        for index, instance in created.items():
+            self.results[index] = {'index': index, 'id': instance.pk}
+        return self.results
+
+
+class BulkReviewCreator(BulkCreator):
+    """Пакетное создание отзывов."""
+
+    model = Review
+    serializer_class = BulkReviewSerializer
+    parent_field = 'title'
+    parent_model = Title
+
+    def prepare(self, valid, authors):
+        """Загружает существующие пары (title, author) одним запросом."""
+        self.pairs = set(Review.objects.filter(
+            title_id__in={data['title'] for data in valid.values()},
+            author_id__in={author.pk for author in authors.values()}
+        ).values_list('title_id', 'author_id')) if valid else set()
+
+    def check_item(self, data, author):
+        """Один отзыв автора на произведение, в том числе внутри пакета."""
+        pair = (data['title'], author.pk)
+        if pair in self.pairs:
+            return {'non_field_errors': [REVIEW_EXISTS]}
+        self.pairs.add(pair)
+        return None
+
+    def build(self, data, author):
+        """Отзыв с оценкой."""
+        review = super().build(data, author)
+        review.score = data['score']
+        return review
+
+    def conflict_error(self):
+        """Отзыв этого автора на произведение уже сохранён параллельно."""
+        return {'non_field_errors': [REVIEW_EXISTS]}
+
+    def fetch_ids(self, objects):
+        """Проставляет id отзывам по уникальной паре (title, author)."""
+        ids = {
+            (title_id, author_id): pk
+            for pk, title_id, author_id in Review.objects.filter(
+                title_id__in={review.title_id for review in objects},
+                author_id__in={review.author_id for review in objects}
+            ).values_list('pk', 'title_id', 'author_id')
+        }
+        for review in objects:
+            review.pk = ids.get((review.title_id, review.author_id))
+
+    def after_create(self, objects):
+        """Пересчитывает рейтинг затронутых произведений."""
+        title_ids = {review.title_id for review in objects}
+        rebuild_ratings(Title.objects.filter(pk__in=title_ids))
+        for title_id in title_ids:
+            schedule_index(title_id)
+
+
+class BulkCommentCreator(BulkCreator):
+    """Пакетное создание комментариев."""
+
+    model = Comment
+    serializer_class = BulkCommentSerializer
+    parent_field = 'review'
+    parent_model = Review
@@ -0,0 +1,102 @@
+"""Кэширование ответов API и условные GET-запросы."""
+
+import json
+from hashlib import md5
+
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from config import RESPONSE_CACHE_ALIAS, RESPONSE_CACHE_TIMEOUT
+from reviews.versions import get_table_state
+
+RESPONSE_KEY = 'response:{basename}:{versions}:{request}'
+
+
+class ListResponseCacheMixin:
+    """Кэш ответов на GET-запросы списка.
+
+    Версии таблиц из `cache_models` меняются при любой записи в них через
+    ORM. По ним строятся ETag и Last-Modified: запросы с совпадающими
+    If-None-Match/If-Modified-Since получают 304 до выполнения запроса к
+    БД. Если `cache_responses` включён, ответы анонимным пользователям
+    дополнительно хранятся в кэше по хосту, пути и нормализованной строке
+    запроса. Хранилище задаётся алиасом кэша Django, поэтому вместо
+    локальной памяти можно подключить общий бэкенд (memcached, redis).
+    """
+
+    cache_models = ()
+    cache_responses = True
+    response_cache_alias = RESPONSE_CACHE_ALIAS
+    response_cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        """Список из кэша."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def get_request_key(self, request):
+        """Хэш хоста, пути, строки запроса и формата ответа."""
+        query = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        request_key = json.dumps((
+            request.get_host(),
+            request.path,
+            query,
+            request.accepted_media_type,
+        ))
+        return md5(request_key.encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Отдаёт 304, ответ из кэша или сохраняет в кэш новый."""
+        if not self.cache_models:
+            return handler(request, *args, **kwargs)
+        versions, last_modified = get_table_state(*self.cache_models)
+        versions = '.'.join(str(version) for version in versions)
+        request_key = self.get_request_key(request)
+        etag = quote_etag(
+            md5(f'{versions}:{request_key}'.encode()).hexdigest()
+        )
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.get_response(
+                handler, request, RESPONSE_KEY.format(
+                    basename=self.basename,
+                    versions=versions,
+                    request=request_key,
+                ), *args, **kwargs
+            )
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_response(self, handler, request, key, *args, **kwargs):
+        """Ответ из кэша для анонимных пользователей."""
+        if not self.cache_responses or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = caches[self.response_cache_alias]
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.response_cache_timeout)
+        return response
+
+
+class ResponseCacheMixin(ListResponseCacheMixin):
+    """Кэш ответов на GET-запросы списка и объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект из кэша."""
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
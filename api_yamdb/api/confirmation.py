@@ -0,0 +1,84 @@
+"""Выпуск и проверка кодов подтверждения.
+
+Режим задаётся настройкой CONFIRMATION_CODE_MODE:
+
+- 'db' — случайный код хранится в User.confirmation_code, неверная
+  попытка сбрасывает его;
+- 'hmac' — код вычисляется как HMAC от (pk, email, last_login, интервал
+  выпуска) и нигде не хранится. Проверка не пишет в БД, а успешный вход
+  обновляет last_login, поэтому код одноразовый.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from config import (
+    CONF_CODE_LENGTH, CONF_CODE_LIFETIME,
+    CONF_CODE_PATTERN, NOT_APPLICABLE_CONF_CODE
+)
+from reviews.models import User
+
+HMAC_SALT = 'api.confirmation'
+
+
+def hmac_mode():
+    """Включён ли режим HMAC-кодов."""
+    return getattr(settings, 'CONFIRMATION_CODE_MODE', 'db') == 'hmac'
+
+
+def make_hmac_code(user, bucket):
+    """HMAC-код пользователя для интервала выпуска `bucket`."""
+    last_login = user.last_login.timestamp() if user.last_login else ''
+    value = f'{user.pk}:{user.email}:{last_login}:{bucket}'
+    return salted_hmac(HMAC_SALT, value).hexdigest()[:CONF_CODE_LENGTH]
+
+
+def current_bucket():
+    """Номер текущего интервала выпуска кодов."""
+    return int(time.time() // CONF_CODE_LIFETIME)
+
+
+def issue_code(user):
+    """Выпускает код подтверждения для пользователя."""
+    if hmac_mode():
+        return make_hmac_code(user, current_bucket())
+    user.confirmation_code = ''.join(random.choices(
+        CONF_CODE_PATTERN,
+        k=CONF_CODE_LENGTH
+    ))
+    user.save(update_fields=('confirmation_code',))
+    return user.confirmation_code
+
+
+def check_code(user, code):
+    """Проверяет код подтверждения.
+
+    HMAC-код действителен в интервале выпуска и следующем за ним.
+    """
+    code = str(code)
+    if code == NOT_APPLICABLE_CONF_CODE:
+        return False
+    if not hmac_mode():
+        return constant_time_compare(code, user.confirmation_code or '')
+    bucket = current_bucket()
+    return any(
+        constant_time_compare(code, make_hmac_code(user, issued))
+        for issued in (bucket, bucket - 1)
+    )
+
+
+def consume_code(user):
+    """Делает использованный HMAC-код недействительным."""
+    if hmac_mode():
+        user.last_login = timezone.now()
+        User.objects.filter(pk=user.pk).update(last_login=user.last_login)
+
+
+def reject_code(user):
+    """Сбрасывает сохранённый код после неверной попытки."""
+    if not hmac_mode():
+        user.confirmation_code = NOT_APPLICABLE_CONF_CODE
+        user.save(update_fields=('confirmation_code',))
@@ -1,25 +1,103 @@
 """Фильтры используемые в модуле."""
 
+import threading
+
+from django.db.models import Case, Exists, IntegerField, OuterRef, When
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+from reviews.search import search_titles
+from reviews.versions import get_versions
+
+GENRE_MATCH_CHOICES = (('any', 'any'), ('all', 'all'))
+
+slug_maps = {}
+slug_maps_lock = threading.Lock()
+
+
+def get_slug_ids(model):
+    """Словарь slug -> id небольшой таблицы, кэшируется до её изменения."""
+    version = get_versions(model)[0]
+    cached = slug_maps.get(model)
+    if cached is None or cached[0] != version:
+        with slug_maps_lock:
+            cached = slug_maps[model] = (
+                version,
+                dict(model.objects.order_by().values_list('slug', 'pk'))
+            )
+    return cached[1]
 
 
 class TitleFilter(filters.FilterSet):
     """Фильтр поиска названия по нескольким полям."""
 
     category = filters.CharFilter(
-        field_name='category__slug',
+        method='filter_category',
     )
     genre = filters.CharFilter(
-        field_name='genre__slug',
+        method='filter_genre',
+    )
+    genre_match = filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES,
+        method='filter_genre_match',
     )
     name = filters.CharFilter(
         field_name='name',
     )
+    search = filters.CharFilter(
+        method='filter_search',
+    )
 
     class Meta:
         """Class Meta."""
 
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'name', 'year', 'search')
+
+    def filter_category(self, queryset, name, value):
+        """Фильтр по slug категории через её id, без соединения таблиц."""
+        category_id = get_slug_ids(Category).get(value)
+        if category_id is None:
+            return queryset.none()
+        return queryset.filter(category_id=category_id)
+
+    def filter_genre(self, queryset, name, value):
+        """Фильтр по slug жанров через EXISTS к таблице связей.
+
+        `genre=a,b` отбирает произведения с любым из жанров или, при
+        `genre_match=all`, со всеми сразу. Строки произведений не
+        размножаются, поэтому distinct() не нужен.
+        """
+        slug_ids = get_slug_ids(Genre)
+        slugs = {slug.strip() for slug in value.split(',') if slug.strip()}
+        genre_ids = {slug_ids[slug] for slug in slugs if slug in slug_ids}
+        match_all = self.form.cleaned_data.get('genre_match') == 'all'
+        if not genre_ids or (match_all and len(genre_ids) < len(slugs)):
+            return queryset.none()
+        through = Title.genre.through.objects.filter(title_id=OuterRef('pk'))
+        if not match_all:
+            return queryset.filter(
+                Exists(through.filter(genre_id__in=genre_ids))
+            )
+        for genre_id in genre_ids:
+            queryset = queryset.filter(
+                Exists(through.filter(genre_id=genre_id))
+            )
+        return queryset
+
+    def filter_genre_match(self, queryset, name, value):
+        """Режим учитывается в filter_genre."""
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности."""
+        title_ids = search_titles(value)
+        if not title_ids:
+            return queryset.none()
+        return queryset.filter(pk__in=title_ids).order_by(Case(
+            *(
+                When(pk=title_id, then=position)
+                for position, title_id in enumerate(title_ids)
+            ),
+            output_field=IntegerField()
+        ))
@@ -0,0 +1,255 @@
+"""Учёт SQL-запросов и времени обработки каждого запроса к API.
+
+QueryInstrumentationMiddleware на время запроса подключает обёртку
+execute ко всем соединениям с БД и считает запросы, их суммарное время и
+самый медленный запрос; сериализаторы с TimedSerializerMixin добавляют
+время сериализации. Результат возвращается в заголовке Server-Timing,
+пишется строкой JSON в лог `api.instrumentation` и суммируется в
+гистограммах по маршрутам, доступных администратору, и в метриках
+Prometheus (api.metrics).
+
+Состояние запроса хранится в ContextVar, поэтому учёт работает и в
+потоках WSGI, и в ASGI. Ответы-потоки, которые читают БД после выхода
+из middleware, учитываются без этих запросов.
+"""
+import json
+import logging
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+from rest_framework import serializers
+
+from api.metrics import ThreadShards, collector, route_label
+from config import (
+    INSTRUMENTATION_QUERY_BUCKETS, INSTRUMENTATION_SQL_LENGTH,
+    INSTRUMENTATION_TIME_BUCKETS
+)
+
+logger = logging.getLogger(__name__)
+current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0
+        self.slowest_time = 0
+        self.slowest_sql = None
+        self.serializer_time = 0
+        self.serializing = False
+        self.duration = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка execute: выполняет запрос и учитывает его время."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += elapsed
+            if elapsed >= self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_sql = sql
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing."""
+        return ', '.join((
+            f'db;desc="{self.queries} queries";'
+            f'dur={self.sql_time * 1000:.2f}',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'total;dur={self.duration * 1000:.2f}',
+        ))
+
+    def as_dict(self):
+        """Счётчики для строки лога, время в миллисекундах."""
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'slowest_sql_ms': round(self.slowest_time * 1000, 2),
+            'slowest_sql': (
+                self.slowest_sql[:INSTRUMENTATION_SQL_LENGTH]
+                if self.slowest_sql else None
+            ),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'duration_ms': round(self.duration * 1000, 2),
+        }
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation во времени сериализации запроса.
+
+    Вложенные сериализаторы входят во время внешнего, элементы списка
+    учитываются по отдельности.
+    """
+
+    def to_representation(self, instance):
+        """Представление объекта с замером времени."""
+        stats = current.get()
+        if stats is None or stats.serializing:
+            return super().to_representation(instance)
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+            stats.serializing = False
+
+
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """ModelSerializer с замером времени сериализации."""
+
+
+class Histogram:
+    """Счётчики попаданий значений в интервалы с верхними границами."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.maximum = 0
+
+    def observe(self, value):
+        """Учитывает значение."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        """Добавляет счётчики другой гистограммы с теми же границами."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def as_dict(self, count):
+        """Интервалы, среднее и максимум."""
+        buckets = {
+            f'le_{bound}': total
+            for bound, total in zip(self.bounds, self.counts)
+        }
+        buckets['inf'] = self.counts[-1]
+        return {
+            'mean': round(self.total / count, 2) if count else None,
+            'max': round(self.maximum, 2),
+            'buckets': buckets,
+        }
+
+
+class RouteStats:
+    """Гистограммы запросов одного маршрута и метода."""
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = Histogram(INSTRUMENTATION_TIME_BUCKETS)
+        self.sql_time = Histogram(INSTRUMENTATION_TIME_BUCKETS)
+        self.serializer_time = Histogram(INSTRUMENTATION_TIME_BUCKETS)
+        self.queries = Histogram(INSTRUMENTATION_QUERY_BUCKETS)
+
+    def observe(self, stats):
+        """Учитывает счётчики запроса."""
+        self.requests += 1
+        self.duration.observe(stats.duration * 1000)
+        self.sql_time.observe(stats.sql_time * 1000)
+        self.serializer_time.observe(stats.serializer_time * 1000)
+        self.queries.observe(stats.queries)
+
+    def merge(self, other):
+        """Добавляет статистику того же маршрута из другого потока."""
+        self.requests += other.requests
+        self.duration.merge(other.duration)
+        self.sql_time.merge(other.sql_time)
+        self.serializer_time.merge(other.serializer_time)
+        self.queries.merge(other.queries)
+
+    def as_dict(self):
+        """Гистограммы маршрута, время в миллисекундах."""
+        return {
+            'requests': self.requests,
+            'queries': self.queries.as_dict(self.requests),
+            'duration_ms': self.duration.as_dict(self.requests),
+            'sql_ms': self.sql_time.as_dict(self.requests),
+            'serializer_ms': self.serializer_time.as_dict(self.requests),
+        }
+
+
+class RouteRegistry:
+    """Статистика маршрутов процесса.
+
+    Каждый поток пишет в свой словарь без блокировок, словари
+    объединяются при чтении.
+    """
+
+    def __init__(self):
+        self.shards = ThreadShards(dict)
+
+    def observe(self, route, method, stats):
+        """Учитывает запрос к маршруту."""
+        routes = self.shards.get()
+        route_stats = routes.get((route, method))
+        if route_stats is None:
+            route_stats = routes[(route, method)] = RouteStats()
+        route_stats.observe(stats)
+
+    def snapshot(self):
+        """Статистика всех маршрутов, отсортированная по маршруту."""
+        total = {}
+        for routes in self.shards.all():
+            for key, stats in routes.copy().items():
+                if key not in total:
+                    total[key] = RouteStats()
+                total[key].merge(stats)
+        return [
+            {'route': route, 'method': method, **stats.as_dict()}
+            for (route, method), stats in sorted(total.items())
+        ]
+
+    def clear(self):
+        """Сбрасывает статистику."""
+        for routes in self.shards.all():
+            routes.clear()
+
+
+registry = RouteRegistry()
+
+
+class QueryInstrumentationMiddleware:
+    """Считает SQL-запросы и время обработки каждого запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            stats.duration = time.perf_counter() - started
+            current.reset(token)
+        route = route_label(request)
+        response['Server-Timing'] = stats.server_timing()
+        registry.observe(route, request.method, stats)
+        collector.observe(
+            route, request.method, response.status_code,
+            stats.duration, stats.sql_time, stats.queries
+        )
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            **stats.as_dict(),
+        }, ensure_ascii=False))
+        return response
@@ -0,0 +1,278 @@
+"""Метрики в текстовом формате Prometheus.
+
+Счётчики запросов, гистограммы времени ответа и времени БД размечены
+маршрутом (basename роутера: `titles`, `reviews`, ...; для остальных
+URL — шаблон пути) и методом. Их пишет QueryInstrumentationMiddleware.
+
+Каждый поток пишет в свой набор счётчиков без блокировок; блокировка
+берётся только при появлении нового потока и при чтении списка
+наборов. Набор завершившегося потока достаётся следующему новому потоку,
+поэтому число наборов не превышает числа одновременно живых потоков.
+Под ASGI синхронный код выполняется в пуле потоков, а асинхронный — в
+одном потоке цикла событий, так что правило «один писатель на набор»
+сохраняется.
+
+Метрики отдаются только адресам из METRICS_ALLOWED_IPS и запросам с
+токеном METRICS_TOKEN; остальные получают 403.
+
+Бизнес-показатели — сумма по нескольким строкам CatalogTotals, которые
+ведут хуки reviews.ratings, без агрегатов по таблицам отзывов.
+"""
+import threading
+from bisect import bisect_left
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from config import (
+    METRICS_DURATION_BUCKETS, OUTBOX_DELIVERY_BUCKETS, OUTBOX_SEND_BUCKETS
+)
+from reviews import outbox
+from reviews.models import SCORES, score_field
+from reviews.ratings import get_totals
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class MetricsShard:
+    """Счётчики, которые пишет один поток."""
+
+    def __init__(self):
+        self.requests = {}
+        self.queries = {}
+        self.durations = {}
+        self.db_durations = {}
+
+    @staticmethod
+    def observe_histogram(histograms, key, value):
+        """Учитывает значение в гистограмме: интервалы, сумма, количество."""
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (
+                len(METRICS_DURATION_BUCKETS) + 3
+            )
+        histogram[bisect_left(METRICS_DURATION_BUCKETS, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def observe(self, route, method, status, duration, db_duration, queries):
+        """Учитывает запрос."""
+        key = (route, method)
+        status_key = (route, method, str(status))
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        self.queries[key] = self.queries.get(key, 0) + queries
+        self.observe_histogram(self.durations, key, duration)
+        self.observe_histogram(self.db_durations, key, db_duration)
+
+
+class ThreadShards:
+    """Объекты, каждый из которых изменяет только один поток."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.shards = []
+
+    def get(self):
+        """Объект текущего потока; создаётся или переходит от умершего."""
+        shard = getattr(self.local, 'shard', None)
+        if shard is not None:
+            return shard
+        current = threading.current_thread()
+        with self.lock:
+            for position, (thread, shard) in enumerate(self.shards):
+                if not thread.is_alive():
+                    self.shards[position] = (current, shard)
+                    break
+            else:
+                shard = self.factory()
+                self.shards.append((current, shard))
+        self.local.shard = shard
+        return shard
+
+    def all(self):
+        """Объекты всех потоков."""
+        with self.lock:
+            return [shard for _, shard in self.shards]
+
+
+class Collector:
+    """Наборы счётчиков потоков процесса."""
+
+    def __init__(self):
+        self.shards = ThreadShards(MetricsShard)
+
+    def observe(self, route, method, status, duration, db_duration, queries):
+        """Учитывает запрос в наборе текущего потока."""
+        self.shards.get().observe(
+            route, method, status, duration, db_duration, queries
+        )
+
+    def collect(self, name):
+        """Сумма словарей `name` всех наборов."""
+        total = {}
+        for shard in self.shards.all():
+            for key, value in getattr(shard, name).copy().items():
+                if isinstance(value, list):
+                    value = list(value)
+                    if key in total:
+                        value = [a + b for a, b in zip(total[key], value)]
+                elif key in total:
+                    value += total[key]
+                total[key] = value
+        return total
+
+    def clear(self):
+        """Сбрасывает счётчики всех потоков."""
+        for shard in self.shards.all():
+            shard.__init__()
+
+
+collector = Collector()
+
+
+def route_label(request):
+    """Basename роутера или шаблон пути маршрута запроса."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    initkwargs = getattr(match.func, 'initkwargs', {})
+    return initkwargs.get('basename') or match.route
+
+
+def escape(value):
+    """Значение метки в формате Prometheus."""
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+def labels(**values):
+    """Метки в фигурных скобках; без меток — пустая строка."""
+    if not values:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in values.items()
+    ) + '}'
+
+
+def header(lines, name, kind, description):
+    """Строки HELP и TYPE метрики."""
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def histogram_samples(lines, name, buckets, values, **label_values):
+    """Строки одной гистограммы с накопленными интервалами."""
+    cumulative = 0
+    for bound, count in zip(buckets + ('+Inf',), values):
+        cumulative += count
+        lines.append(f'{name}_bucket' + labels(
+            **label_values, le=bound
+        ) + f' {cumulative}')
+    lines.append(f'{name}_sum{labels(**label_values)} {values[-2]}')
+    lines.append(f'{name}_count{labels(**label_values)} {values[-1]}')
+
+
+def histogram_lines(lines, name, description, histograms):
+    """Строки гистограмм по маршрутам и методам."""
+    header(lines, name, 'histogram', description)
+    for (route, method), values in sorted(histograms.items()):
+        histogram_samples(
+            lines, name, METRICS_DURATION_BUCKETS, values,
+            route=route, method=method
+        )
+
+
+def email_lines(lines):
+    """Строки метрик очереди писем."""
+    emails = outbox.metrics.snapshot()
+    for name, description in (
+        ('sent', 'Отправленные письма.'),
+        ('failed', 'Неудачные попытки отправки.'),
+    ):
+        header(lines, f'yamdb_emails_{name}_total', 'counter', description)
+        lines.append(f'yamdb_emails_{name}_total {emails[name]}')
+    header(
+        lines, 'yamdb_email_outbox_depth', 'gauge',
+        'Письма в очереди, для которых остались попытки.'
+    )
+    lines.append(f'yamdb_email_outbox_depth {emails["depth"]}')
+    for name, buckets, description in (
+        ('send_seconds', OUTBOX_SEND_BUCKETS, 'Время SMTP-отправки письма.'),
+        (
+            'delivery_seconds', OUTBOX_DELIVERY_BUCKETS,
+            'Время от постановки письма в очередь до отправки.'
+        ),
+    ):
+        header(lines, f'yamdb_email_{name}', 'histogram', description)
+        histogram_samples(lines, f'yamdb_email_{name}', buckets, emails[name])
+
+
+def render():
+    """Все метрики процесса в текстовом формате Prometheus."""
+    lines = []
+    header(
+        lines, 'yamdb_http_requests_total', 'counter',
+        'Запросы по маршруту, методу и коду ответа.'
+    )
+    for (route, method, status), total in sorted(
+        collector.collect('requests').items()
+    ):
+        lines.append('yamdb_http_requests_total' + labels(
+            route=route, method=method, status=status
+        ) + f' {total}')
+    histogram_lines(
+        lines, 'yamdb_http_request_duration_seconds',
+        'Время обработки запроса.', collector.collect('durations')
+    )
+    histogram_lines(
+        lines, 'yamdb_http_db_duration_seconds',
+        'Время SQL-запросов за один запрос.',
+        collector.collect('db_durations')
+    )
+    header(
+        lines, 'yamdb_http_db_queries_total', 'counter',
+        'SQL-запросы по маршруту и методу.'
+    )
+    for (route, method), total in sorted(
+        collector.collect('queries').items()
+    ):
+        lines.append('yamdb_http_db_queries_total' + labels(
+            route=route, method=method
+        ) + f' {total}')
+    gauges = get_totals()
+    for name, description in (
+        ('titles', 'Произведения.'), ('reviews', 'Отзывы.')
+    ):
+        header(lines, f'yamdb_{name}', 'gauge', description)
+        lines.append(f'yamdb_{name} {gauges[name]}')
+    header(lines, 'yamdb_reviews_by_score', 'gauge', 'Отзывы по оценке.')
+    for score in SCORES:
+        lines.append('yamdb_reviews_by_score' + labels(
+            score=score
+        ) + f' {gauges[score_field(score)]}')
+    email_lines(lines)
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_allowed(request):
+    """Запрос пришёл с разрешённого адреса или с токеном метрик."""
+    if request.META.get('REMOTE_ADDR') in getattr(
+        settings, 'METRICS_ALLOWED_IPS', ()
+    ):
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    return bool(token) and compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    )
+
+
+def metrics_view(request):
+    """Обрабатывает GET запросы к /metrics."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
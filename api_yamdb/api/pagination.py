@@ -0,0 +1,322 @@
+"""Классы пагинации."""
+
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from functools import reduce
+from hashlib import md5
+from operator import or_
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from config import APPROXIMATE_COUNT_THRESHOLD, COUNT_CACHE_TIMEOUT
+from reviews.versions import get_versions
+
+INVALID_CURSOR = 'Некорректный cursor.'
+COUNT_KEY = 'count:{path}:{versions}:{params}'
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по статистике БД.
+
+    PostgreSQL оценивает любой запрос планировщиком. SQLite хранит только
+    размер таблиц в sqlite_stat1, который заполняет ANALYZE, поэтому
+    оценивается лишь запрос без фильтров. Возвращает None, если оценки
+    нет: тогда выполняется COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        return estimate_postgresql(connection, queryset)
+    if connection.vendor == 'sqlite':
+        return estimate_sqlite(connection, queryset)
+    return None
+
+
+def estimate_postgresql(connection, queryset):
+    """Число строк из плана запроса (EXPLAIN)."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_sqlite(connection, queryset):
+    """Размер таблицы из sqlite_stat1 для запроса без фильтров."""
+    query = queryset.query
+    if query.where or query.distinct or query.combinator:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    return int(row[0].split()[0])
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """Пагинация limit/offset с кэшированием COUNT(*).
+
+    Количество кэшируется на `count_cache_timeout` секунд по пути запроса
+    и нормализованному набору фильтров; ключ включает версии таблиц из
+    `cache_models` представления, поэтому запись сразу его меняет. Если
+    оценка планировщика превышает `approximate_count_threshold`, вместо
+    COUNT(*) отдаётся она, а ответ содержит `count_approximate: true`.
+    """
+
+    count_cache_timeout = COUNT_CACHE_TIMEOUT
+    approximate_count_threshold = APPROXIMATE_COUNT_THRESHOLD
+    ignored_query_params = ('limit', 'offset', 'cursor', 'ordering')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Запоминает запрос и представление для ключа кэша."""
+        self.request = request
+        self.view = view
+        self.count_approximate = False
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Добавляет признак приблизительного количества."""
+        response = super().get_paginated_response(data)
+        if self.count_approximate:
+            response.data['count_approximate'] = True
+        return response
+
+    def get_count_cache_key(self, queryset):
+        """Ключ кэша количества для текущего запроса."""
+        params = sorted(
+            (key, sorted(values))
+            for key, values in self.request.query_params.lists()
+            if key not in self.ignored_query_params
+        )
+        models = getattr(self.view, 'cache_models', None) or (
+            queryset.model,
+        )
+        return COUNT_KEY.format(
+            path=self.request.path,
+            versions='.'.join(str(v) for v in get_versions(*models)),
+            params=md5(json.dumps(params).encode()).hexdigest(),
+        )
+
+    def get_count(self, queryset):
+        """Количество объектов из кэша, оценки или COUNT(*)."""
+        if not hasattr(queryset, 'query'):
+            return super().get_count(queryset)
+        key = self.get_count_cache_key(queryset)
+        cached = cache.get(key)
+        if cached is None:
+            cached = self.count_queryset(queryset)
+            cache.set(key, cached, self.count_cache_timeout)
+        count, self.count_approximate = cached
+        return count
+
+    def count_queryset(self, queryset):
+        """Возвращает пару (количество, приблизительное ли оно)."""
+        if self.approximate_count_threshold is not None:
+            estimate = estimate_count(queryset)
+            if (
+                estimate is not None
+                and estimate > self.approximate_count_threshold
+            ):
+                return estimate, True
+        return queryset.count(), False
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки (keyset).
+
+    Курсор хранит значения полей `ordering` последней записи страницы,
+    поэтому следующая страница выбирается условием по индексу, без
+    OFFSET и без COUNT(*). Последнее поле `ordering` должно быть
+    уникальным.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = INVALID_CURSOR
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает страницу, начиная с позиции из курсора."""
+        self.base_url = request.build_absolute_uri()
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.get_ordering(self.reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        page = list(queryset[:self.page_size + 1])
+        self.has_more = len(page) > self.page_size
+        self.has_position = position is not None
+        page = page[:self.page_size]
+        if self.reverse:
+            page.reverse()
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        """Ответ со ссылками на соседние страницы."""
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        """Схема ответа."""
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        """Ссылка на следующую страницу."""
+        if not self.page:
+            return None
+        if self.has_more if not self.reverse else self.has_position:
+            return self.encode_cursor(self.page[-1], reverse=False)
+        return None
+
+    def get_previous_link(self):
+        """Ссылка на предыдущую страницу."""
+        if not self.page:
+            return None
+        if self.has_position if not self.reverse else self.has_more:
+            return self.encode_cursor(self.page[0], reverse=True)
+        return None
+
+    def get_ordering(self, reverse):
+        """Порядок сортировки с учётом направления обхода."""
+        if not reverse:
+            return self.ordering
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    @staticmethod
+    def after(ordering, position):
+        """Условие «строго после позиции» для составного ключа."""
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(**{f'{name}__{lookup}': position[index]})
+            for prev_field, value in zip(ordering[:index], position):
+                condition &= Q(**{prev_field.lstrip('-'): value})
+            conditions.append(condition)
+        return reduce(or_, conditions)
+
+    def encode_cursor(self, obj, reverse):
+        """Кодирует позицию объекта в ссылку."""
+        position = [
+            getattr(obj, field.lstrip('-')) for field in self.ordering
+        ]
+        payload = json.dumps(
+            {'p': position, 'r': int(reverse)},
+            default=lambda value: value.isoformat()
+        )
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            b64encode(payload.encode()).decode()
+        )
+
+    def decode_cursor(self, request, model):
+        """Возвращает позицию и направление из параметра запроса.
+
+        Значения позиции приводятся к типам полей сортировки модели, поэтому
+        подделанный курсор даёт 404, а не ошибку в запросе к БД.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode()).decode())
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (BinasciiError, UnicodeDecodeError, ValueError,
+                KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class OptionalKeysetPagination(CachedCountPagination):
+    """Пагинация limit/offset с включаемым keyset-режимом.
+
+    Keyset-режим включается параметром `cursor` (пустое значение —
+    первая страница).
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбирает режим пагинации по параметрам запроса."""
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.get_limit(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Формирует ответ выбранного режима."""
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitleKeysetPagination(KeysetPagination):
+    """Keyset-пагинация произведений."""
+
+    ordering = ('year', 'name', 'id')
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    """Keyset-пагинация отзывов и комментариев."""
+
+    ordering = ('-pub_date', 'id')
+
+
+class TitlePagination(OptionalKeysetPagination):
+    """Пагинация произведений."""
+
+    keyset_class = TitleKeysetPagination
+
+
+class PubDatePagination(OptionalKeysetPagination):
+    """Пагинация отзывов и комментариев."""
+
+    keyset_class = PubDateKeysetPagination
@@ -3,18 +3,27 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from rest_framework import serializers
 
+from api.filters import get_slug_ids
+from api.instrumentation import TimedModelSerializer
 from config import (
+    LEADERBOARD_LIMIT, LEADERBOARD_MAX_LIMIT,
     MIN_RATING, MAX_RATING,
     USERNAME_LENGTH, EMAIL_FIELD_LENGTH,
     CONF_CODE_LENGTH
 )
-from reviews.models import Category, Genre, Title, Review, Comment, User
+from reviews.models import (
+    Category, Genre, Title, TitleRanking, Review, Comment, User
+)
+from reviews.rankings import RANKING_ORDERS
+from reviews.ratings import rating_stats
 from reviews.validators import (
     validate_not_me,
     validate_username_via_regex)
 
+REVIEW_EXISTS = 'Вы уже оставили отзыв на данное произведение'
+
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedModelSerializer):
     """Сериализатор категорий."""
 
     class Meta:
@@ -24,7 +33,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedModelSerializer):
     """Сериализатор жанров."""
 
     class Meta:
@@ -34,12 +43,16 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    """Сериализатор произведений."""
+class TitleSerializer(TimedModelSerializer):
+    """Сериализатор произведений.
+
+    Статистика оценок добавляется, если в запросе передан `stats=true`.
+    """
 
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
+    stats = serializers.SerializerMethodField()
 
     class Meta:
         """Class Meta."""
@@ -47,15 +60,27 @@ class TitleSerializer(serializers.ModelSerializer):
         model = Title
         fields = (
             'id', 'category', 'genre', 'name',
-            'year', 'rating', 'description'
+            'year', 'rating', 'description', 'stats'
         )
         read_only_fields = (
             'category', 'genre', 'name',
             'year', 'rating', 'description'
         )
 
+    def get_fields(self):
+        """Убирает статистику, если она не запрошена."""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.query_params.get('stats') != 'true':
+            fields.pop('stats')
+        return fields
+
+    def get_stats(self, title):
+        """Статистика оценок из счётчиков произведения."""
+        return rating_stats(title)
+
 
-class TitleCreateUpdateSerializer(serializers.ModelSerializer):
+class TitleCreateUpdateSerializer(TimedModelSerializer):
     """Сериализатор создания и обновления произведений."""
 
     category = serializers.SlugRelatedField(
@@ -77,7 +102,89 @@ class TitleCreateUpdateSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'genre', 'category', 'description')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class RankedTitleSerializer(TimedModelSerializer):
+    """Краткие данные произведения в лидерборде."""
+
+    class Meta:
+        """Class Meta."""
+
+        model = Title
+        fields = ('id', 'name', 'year')
+
+
+class LeaderboardSerializer(TimedModelSerializer):
+    """Строка лидерборда."""
+
+    title = RankedTitleSerializer(read_only=True)
+
+    class Meta:
+        """Class Meta."""
+
+        model = TitleRanking
+        fields = ('title', 'rating', 'bayesian_rating', 'review_count')
+
+
+class LeaderboardParamsSerializer(serializers.Serializer):
+    """Параметры запроса лидерборда.
+
+    Разрез задаётся одним из параметров `genre`, `category` (slug) или
+    `year`. В validated_data добавляются `scope` и `scope_id`; scope_id
+    равен None, если жанра, категории или года нет.
+    """
+
+    SCOPE_MODELS = {
+        TitleRanking.GENRE: Genre,
+        TitleRanking.CATEGORY: Category,
+    }
+
+    order = serializers.ChoiceField(
+        choices=tuple(RANKING_ORDERS),
+        default='bayesian',
+        error_messages={
+            'invalid_choice': f'Допустимо: {", ".join(RANKING_ORDERS)}.'
+        }
+    )
+    genre = serializers.CharField(required=False)
+    category = serializers.CharField(required=False)
+    year = serializers.CharField(required=False)
+    limit = serializers.CharField(required=False)
+
+    def resolve_scope(self, attrs):
+        """Разрез и его идентификатор."""
+        scopes = [
+            scope for scope in (
+                TitleRanking.GENRE, TitleRanking.CATEGORY, TitleRanking.YEAR
+            ) if scope in attrs
+        ]
+        if len(scopes) > 1:
+            raise serializers.ValidationError(
+                'Укажите не больше одного разреза.'
+            )
+        if not scopes:
+            return TitleRanking.ALL, 0
+        scope = scopes[0]
+        value = attrs[scope]
+        if scope == TitleRanking.YEAR:
+            return scope, int(value) if value.isdigit() else None
+        return scope, get_slug_ids(self.SCOPE_MODELS[scope]).get(value)
+
+    @staticmethod
+    def clean_limit(value):
+        """Длина лидерборда; некорректное значение заменяется умолчанием."""
+        try:
+            limit = int(value or LEADERBOARD_LIMIT)
+        except ValueError:
+            return LEADERBOARD_LIMIT
+        return max(min(limit, LEADERBOARD_MAX_LIMIT), 1)
+
+    def validate(self, attrs):
+        """Определяет разрез и длину лидерборда."""
+        attrs['scope'], attrs['scope_id'] = self.resolve_scope(attrs)
+        attrs['limit'] = self.clean_limit(attrs.get('limit'))
+        return attrs
+
+
+class ReviewSerializer(TimedModelSerializer):
     """Сериализатор отзывов."""
 
     author = serializers.SlugRelatedField(
@@ -99,20 +206,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        """Функция проверки данных."""
-        if self.context['request'].method != 'POST':
-            return data
-        author = self.context.get('request').user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        if Review.objects.filter(author=author, title__id=title_id).exists():
-            raise serializers.ValidationError(
-                'Вы уже оставили отзыв на данное произведение'
-            )
-        return data
-
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedModelSerializer):
     """Сериализатор комментариев."""
 
     author = serializers.SlugRelatedField(
@@ -128,7 +223,33 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class BulkCommentSerializer(serializers.Serializer):
+    """Элемент пакетного создания комментариев."""
+
+    review = serializers.IntegerField(min_value=1)
+    author = serializers.CharField(
+        max_length=USERNAME_LENGTH,
+        required=False
+    )
+    text = serializers.CharField()
+
+
+class BulkReviewSerializer(serializers.Serializer):
+    """Элемент пакетного создания отзывов."""
+
+    title = serializers.IntegerField(min_value=1)
+    author = serializers.CharField(
+        max_length=USERNAME_LENGTH,
+        required=False
+    )
+    text = serializers.CharField()
+    score = serializers.IntegerField(
+        min_value=MIN_RATING,
+        max_value=MAX_RATING
+    )
+
+
+class UserSerializer(TimedModelSerializer):
     """Базовая модель сериалайзера для модели User."""
 
     class Meta:
@@ -0,0 +1,174 @@
+"""Ограничение частоты запросов к регистрации и получению токена.
+
+Используется алгоритм token bucket: у каждого ключа (IP или username)
+есть корзина на N токенов, которая равномерно пополняется за период из
+строки лимита ('5/min' — пять запросов подряд, затем один раз в 12 с).
+Лимиты задаются в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] по именам
+`<throttle_scope>_ip` и `<throttle_scope>_username`.
+
+Хранилище корзин задаётся настройкой THROTTLE_STORE:
+
+- 'memory' — словарь в памяти процесса (по умолчанию);
+- 'cache' — кэш Django THROTTLE_CACHE_ALIAS, общий для процессов;
+- путь к классу с методами take() и clear().
+
+Проверка выполняется в APIView.initial(), то есть до валидации
+сериализатора и без обращений к БД; при отказе возвращается 429 с
+заголовком Retry-After.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from config import THROTTLE_CACHE_ALIAS, THROTTLE_STORE_SIZE, USERNAME_LENGTH
+
+
+def refill(state, capacity, rate, now):
+    """Количество токенов в корзине на момент `now`."""
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """Корзины в памяти процесса с вытеснением давно не используемых."""
+
+    def __init__(self, maxsize=THROTTLE_STORE_SIZE):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def take(self, key, capacity, rate, now):
+        """Забирает токен; возвращает 0 или время ожидания в секундах."""
+        with self.lock:
+            tokens = refill(self.buckets.get(key), capacity, rate, now)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            self.buckets[key] = (tokens - 1, now)
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.maxsize:
+                self.buckets.popitem(last=False)
+            return 0
+
+    def clear(self):
+        """Удаляет все корзины."""
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """Корзины в кэше Django, общем для нескольких процессов.
+
+    Чтение и запись не атомарны, поэтому при одновременных запросах с
+    одним ключом лимит может быть превышен на число конкурирующих
+    процессов.
+    """
+
+    def __init__(self, alias=THROTTLE_CACHE_ALIAS):
+        self.alias = alias
+
+    def take(self, key, capacity, rate, now):
+        """Забирает токен; возвращает 0 или время ожидания в секундах."""
+        cache = caches[self.alias]
+        tokens = refill(cache.get(key), capacity, rate, now)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        cache.set(key, (tokens - 1, now), int(capacity / rate) + 1)
+        return 0
+
+    def clear(self):
+        """Корзины истекают сами; общий кэш не очищается."""
+
+
+BUCKET_STORES = {
+    'memory': MemoryBucketStore,
+    'cache': CacheBucketStore,
+}
+stores = {}
+
+
+def get_store():
+    """Хранилище корзин, выбранное настройкой THROTTLE_STORE."""
+    name = getattr(settings, 'THROTTLE_STORE', 'memory')
+    if name not in stores:
+        store_class = BUCKET_STORES.get(name) or import_string(name)
+        stores[name] = store_class()
+    return stores[name]
+
+
+def clear_stores():
+    """Очищает все созданные хранилища."""
+    for store in stores.values():
+        store.clear()
+
+
+class BucketThrottle(SimpleRateThrottle):
+    """Token bucket для ключа, который вычисляет подкласс.
+
+    Имя лимита складывается из `throttle_scope` представления и
+    `scope_suffix` класса.
+    """
+
+    scope_suffix = None
+
+    def __init__(self):
+        """Лимит определяется в allow_request() по представлению."""
+        self.wait_seconds = 0
+
+    def get_rate(self):
+        """Лимит из текущих настроек DRF."""
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        """Пропускает запрос, если в корзине есть токен."""
+        self.scope = f'{view.throttle_scope}_{self.scope_suffix}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        capacity, duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.wait_seconds = get_store().take(
+            self.key, capacity, capacity / duration, self.timer()
+        )
+        return not self.wait_seconds
+
+    def wait(self):
+        """Секунды до появления токена в корзине."""
+        return self.wait_seconds
+
+
+class IPThrottle(BucketThrottle):
+    """Лимит запросов с одного IP-адреса."""
+
+    scope_suffix = 'ip'
+
+    def get_cache_key(self, request, view):
+        """Ключ по IP-адресу клиента."""
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class UsernameThrottle(BucketThrottle):
+    """Лимит запросов для одного username из тела запроса."""
+
+    scope_suffix = 'username'
+
+    def get_cache_key(self, request, view):
+        """Ключ по username; без username запрос не ограничивается."""
+        username = getattr(request.data, 'get', lambda key: None)('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': username.strip().lower()[:USERNAME_LENGTH]
+        }
@@ -46,7 +46,36 @@ signup_urls = [
     path('auth/token/', views.TokenAPIView.as_view()),
 ]
 
+export_urls = [
+    path(
+        'export/<slug:name>.<slug:export_format>',
+        views.ExportAPIView.as_view()
+    ),
+]
+
+autocomplete_urls = [
+    path('autocomplete/', views.AutocompleteAPIView.as_view()),
+]
+
+leaderboard_urls = [
+    path('leaderboard/', views.LeaderboardAPIView.as_view()),
+]
+
+instrumentation_urls = [
+    path('instrumentation/', views.InstrumentationAPIView.as_view()),
+]
+
+bulk_urls = [
+    path('bulk/reviews/', views.BulkReviewAPIView.as_view()),
+    path('bulk/comments/', views.BulkCommentAPIView.as_view()),
+]
+
 urlpatterns = [
     path('v1/', include(signup_urls)),
+    path('v1/', include(export_urls)),
+    path('v1/', include(bulk_urls)),
+    path('v1/', include(autocomplete_urls)),
+    path('v1/', include(leaderboard_urls)),
+    path('v1/', include(instrumentation_urls)),
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,10 +1,8 @@
 """Views."""
 
-import random
-
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.db.utils import IntegrityError
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
@@ -16,22 +14,36 @@ from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly
 )
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from api.authentication import access_token_for_user
+from api.bulk import BulkCommentCreator, BulkReviewCreator
+from api.cache import ListResponseCacheMixin, ResponseCacheMixin
 from api.filters import TitleFilter
+from api.instrumentation import registry
+from api.pagination import (
+    CachedCountPagination, PubDatePagination, TitlePagination
+)
 from api.serializers import (
-    CategorySerializer, CommentSerializer,
-    GenreSerializer, ReviewSerializer,
+    REVIEW_EXISTS, CategorySerializer, CommentSerializer,
+    GenreSerializer, LeaderboardParamsSerializer, LeaderboardSerializer,
+    ReviewSerializer,
     TitleCreateUpdateSerializer, TitleSerializer,
 )
+from api.throttling import IPThrottle, UsernameThrottle
 from config import (
-    CONF_CODE_LENGTH, CONF_CODE_PATTERN,
+    AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT,
     SERVER_EMAIL, URL_PROFILE_PREF,
     NOT_APPLICABLE_CONF_CODE
 )
-from reviews.models import Category, Genre, Review, Title, User
-from . import permissions
+from reviews import ratings
+from reviews.autocomplete import KINDS, autocomplete
+from reviews.export import EXPORT_FORMATS, export_files, export_lines
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.outbox import enqueue_email
+from reviews.rankings import leaderboard
+from . import confirmation, permissions
 from .serializers import (
     SignUPSerializer,
     TokenSerializer,
@@ -46,6 +58,7 @@ CONFIRMATION_ERROR = (
 
 
 class CategoryGenreMixin(
+    ListResponseCacheMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -65,6 +78,7 @@ class CategoriesViewSet(CategoryGenreMixin):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
 class GenresViewSet(CategoryGenreMixin):
@@ -72,19 +86,22 @@ class GenresViewSet(CategoryGenreMixin):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class TitlesViewSet(viewsets.ModelViewSet):
+class TitlesViewSet(ResponseCacheMixin, viewsets.ModelViewSet):
     """Класс произведения."""
 
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')
-    ).order_by('year', 'name')
+    queryset = Title.objects.with_rating().select_related(
+        'category'
+    ).prefetch_related('genre').order_by('year', 'name')
     serializer_class = TitleSerializer
     permission_classes = (permissions.IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     http_method_names = HTTP_METHODS
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    cache_models = (Title, Title.genre.through, Genre, Category, Review)
 
     def get_serializer_class(self):
         """Функция определения сериализатора."""
@@ -92,8 +109,46 @@ class TitlesViewSet(viewsets.ModelViewSet):
             return TitleSerializer
         return TitleCreateUpdateSerializer
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=('get',), permission_classes=(AllowAny,))
+    def stats(self, request, pk=None):
+        """Обрабатывает GET запросы к api/v1/titles/<id>/stats/."""
+        return Response(ratings.rating_stats(get_object_or_404(Title, pk=pk)))
+
+
+class NestedViewSetMixin:
+    """Базовый класс вложенных маршрутов.
+
+    Родительский объект запрашивается не больше одного раза за запрос и
+    только тогда, когда он нужен: при создании дочернего объекта или для
+    ответа 404 вместо пустого списка. Подкласс задаёт `parent_model` и
+    `parent_lookup` — соответствие полей родителя аргументам URL.
+    """
+
+    parent_model = None
+    parent_lookup = {}
+
+    def get_parent(self):
+        """Возвращает родительский объект или 404."""
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(self.parent_model, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in self.parent_lookup.items()
+            })
+        return self._parent
+
+    def paginate_queryset(self, queryset):
+        """Проверяет существование родителя, если страница пуста."""
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
+
+
+class ReviewViewSet(
+    ListResponseCacheMixin,
+    NestedViewSetMixin,
+    viewsets.ModelViewSet
+):
     """Класс отзывы."""
 
     serializer_class = ReviewSerializer
@@ -103,21 +158,66 @@ class ReviewViewSet(viewsets.ModelViewSet):
     )
     filter_backends = (filters.OrderingFilter,)
     http_method_names = HTTP_METHODS
+    pagination_class = PubDatePagination
+    cache_models = (Review, User, Title)
+    cache_responses = False
+    parent_model = Title
+    parent_lookup = {'pk': 'title_id'}
 
     def get_title(self):
-        """Возвращает объетк произведения."""
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        """Возвращает объект произведения."""
+        return self.get_parent()
 
     def get_queryset(self):
         """Функция get_queryset."""
-        return self.get_title().reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        """Функция perfom_create."""
-        serializer.save(author=self.request.user, title=self.get_title())
-
+        """Создаёт отзыв; повторный отзыв отсекает ограничение unique_review.
 
-class CommentViewSet(viewsets.ModelViewSet):
+        Отдельной проверки перед вставкой нет: при конкурентных запросах
+        она не исключает дубликатов, а ограничение в БД исключает. Ошибка
+        вставки считается повтором, только если отзыв автора уже есть.
+        """
+        title = self.get_title()
+        try:
+            with transaction.atomic():
+                review = serializer.save(
+                    author=self.request.user,
+                    title=title
+                )
+        except IntegrityError:
+            if Review.objects.filter(
+                title=title, author=self.request.user
+            ).exists():
+                raise serializers.ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_EXISTS]}
+                )
+            raise
+        ratings.review_created(review)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        """Обновляет отзыв и рейтинг произведения."""
+        old_score = serializer.instance.score
+        review = serializer.save()
+        ratings.review_rescored(review, old_score)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Удаляет отзыв и исключает его оценку из рейтинга."""
+        instance.delete()
+        ratings.review_deleted(instance)
+
+
+class CommentViewSet(
+    ListResponseCacheMixin,
+    NestedViewSetMixin,
+    viewsets.ModelViewSet
+):
     """Класс комментарии."""
 
     serializer_class = CommentSerializer
@@ -127,14 +227,15 @@ class CommentViewSet(viewsets.ModelViewSet):
     )
     filter_backends = (filters.OrderingFilter,)
     http_method_names = HTTP_METHODS
+    pagination_class = PubDatePagination
+    cache_models = (Comment, User, Review)
+    cache_responses = False
+    parent_model = Review
+    parent_lookup = {'id': 'review_id', 'title__id': 'title_id'}
 
     def get_review(self):
         """Возвращает объект отзыва."""
-        return get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
-        )
+        return self.get_parent()
 
     def perform_create(self, serializer):
         """Функция perfom_create."""
@@ -142,17 +243,19 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Функция get_queryset."""
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
 
-def send_success_email(user):
-    """Отправляет email с кодом подтверждения."""
-    send_mail(
+def send_success_email(user, confirmation_code):
+    """Ставит в очередь email с кодом подтверждения."""
+    enqueue_email(
         subject='Регистрация',
-        message=f'Ваш confirmation_code: {user.confirmation_code}',
+        message=f'Ваш confirmation_code: {confirmation_code}',
         from_email=SERVER_EMAIL,
-        recipient_list=[user.email],
-        fail_silently=True,
+        recipient=user.email,
     )
 
 
@@ -166,6 +269,8 @@ class UserViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
     http_method_names = ('get', 'post', 'patch', 'delete')
     search_fields = ('username',)
+    pagination_class = CachedCountPagination
+    cache_models = (User,)
 
     @action(
         detail=False,
@@ -192,6 +297,8 @@ class SignUPAPIView(APIView):
 
     serializer_class = SignUPSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'signup'
 
     def post(self, request):
         """Обрабатывает POST запросы к api/v1/auth/signup/.
@@ -202,35 +309,31 @@ class SignUPAPIView(APIView):
         serializer.is_valid(raise_exception=True)
         username = request.data.get('username')
         email = request.data.get('email')
-        try:
-            user, query_status = User.objects.get_or_create(
-                username=username,
-                email=email
-            )
-        except IntegrityError:
-            if User.objects.filter(username=username).exists():
-                raise serializers.ValidationError(
-                    {
-                        'username': [
-                            'Обязательное поле некорректно.'
-                        ]
-                    }
-                )
-            elif User.objects.filter(email=email).exists():
-                raise serializers.ValidationError(
-                    {
-                        'email': [
-                            'Обязательное поле некорректно.'
-                        ]
-                    }
+        with transaction.atomic():
+            try:
+                user, query_status = User.objects.get_or_create(
+                    username=username,
+                    email=email
                 )
-
-        user.confirmation_code = ''.join(random.choices(
-            CONF_CODE_PATTERN,
-            k=CONF_CODE_LENGTH
-        ))
-        user.save()
-        send_success_email(user)
+            except IntegrityError:
+                if User.objects.filter(username=username).exists():
+                    raise serializers.ValidationError(
+                        {
+                            'username': [
+                                'Обязательное поле некорректно.'
+                            ]
+                        }
+                    )
+                elif User.objects.filter(email=email).exists():
+                    raise serializers.ValidationError(
+                        {
+                            'email': [
+                                'Обязательное поле некорректно.'
+                            ]
+                        }
+                    )
+                raise
+            send_success_email(user, confirmation.issue_code(user))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -239,6 +342,8 @@ class TokenAPIView(APIView):
 
     serializer_class = TokenSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         """Обрабатывает POST запросы к api/v1/auth/token/.
@@ -254,12 +359,125 @@ class TokenAPIView(APIView):
             User,
             username=request.data.get('username')
         )
-        if confirmation_code != user.confirmation_code:
-            user.confirmation_code = NOT_APPLICABLE_CONF_CODE
-            user.save()
+        if not confirmation.check_code(user, confirmation_code):
+            confirmation.reject_code(user)
             raise serializers.ValidationError(CONFIRMATION_ERROR)
+        confirmation.consume_code(user)
         return Response({
-            'token': str(RefreshToken.for_user(user).access_token)
+            'token': str(access_token_for_user(user))
         },
             status=status.HTTP_200_OK
         )
+
+
+class BulkCreateAPIView(APIView):
+    """Пакетное создание объектов для администраторов."""
+
+    permission_classes = (permissions.IsAdmin,)
+    creator_class = None
+
+    def post(self, request):
+        """Принимает список объектов, возвращает результат по каждому."""
+        results = self.creator_class(request.data, request.user).create()
+        return Response({
+            'created': sum('id' in result for result in results),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+class BulkReviewAPIView(BulkCreateAPIView):
+    """Обрабатывает POST запросы к api/v1/bulk/reviews/."""
+
+    creator_class = BulkReviewCreator
+
+
+class BulkCommentAPIView(BulkCreateAPIView):
+    """Обрабатывает POST запросы к api/v1/bulk/comments/."""
+
+    creator_class = BulkCommentCreator
+
+
+class AutocompleteAPIView(APIView):
+    """Автодополнение названий из индекса в памяти процесса."""
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """Обрабатывает GET запросы к api/v1/autocomplete/.
+
+        Параметры: `q` — префикс, `type` — titles, genres или categories
+        через запятую (по умолчанию все), `limit` — число результатов
+        каждого типа.
+        """
+        kinds = request.query_params.get('type')
+        kinds = kinds.split(',') if kinds else KINDS
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise serializers.ValidationError(
+                {'type': [f'Неизвестный тип: {", ".join(sorted(unknown))}.']}
+            )
+        try:
+            limit = min(
+                int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT)),
+                AUTOCOMPLETE_MAX_LIMIT
+            )
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        prefix = request.query_params.get('q', '')
+        return Response(autocomplete.search(kinds, prefix, max(limit, 1)))
+
+
+class LeaderboardAPIView(APIView):
+    """Лидерборды по материализованной таблице рейтингов."""
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """Обрабатывает GET запросы к api/v1/leaderboard/.
+
+        Разрез задаётся одним из параметров `genre`, `category` (slug) или
+        `year`; `order` — bayesian, rating или reviews; `limit` — длина.
+        """
+        params = LeaderboardParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+        if params['scope_id'] is None:
+            raise Http404
+        rankings = leaderboard(
+            params['scope'], params['scope_id'], params['order']
+        )[:params['limit']]
+        return Response(LeaderboardSerializer(rankings, many=True).data)
+
+
+class ExportAPIView(APIView):
+    """Потоковая выгрузка таблицы в формате csv или ndjson."""
+
+    permission_classes = (permissions.IsAdmin,)
+
+    def get(self, request, name, export_format):
+        """Обрабатывает GET запросы к api/v1/export/<name>.<format>."""
+        if name not in export_files or export_format not in EXPORT_FORMATS:
+            raise Http404
+        response = StreamingHttpResponse(
+            export_lines(name, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{export_format}"'
+        )
+        return response
+
+
+class InstrumentationAPIView(APIView):
+    """Статистика запросов к API по маршрутам для администратора."""
+
+    permission_classes = (permissions.IsAdmin,)
+
+    def get(self, request):
+        """Гистограммы числа SQL-запросов и времени по маршрутам процесса."""
+        return Response(registry.snapshot())
+
+    def delete(self, request):
+        """Сбрасывает накопленную статистику."""
+        registry.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,5 @@
 """Настройки проекта."""
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +69,24 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api_yamdb',
+    },
+    # Версии таблиц для инвалидации кэшей общие для всех процессов.
+    # VERSION_CACHE_LOCATION (host:port) включает Memcached; без него
+    # версии хранятся в таблице БД, которую создаёт migrate.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('VERSION_CACHE_LOCATION'),
+        'TIMEOUT': None,
+    } if os.getenv('VERSION_CACHE_LOCATION') else {
+        'BACKEND': 'reviews.cache.DatabaseVersionCache',
+        'TIMEOUT': None,
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,16 +123,55 @@ AUTH_USER_MODEL = 'reviews.User'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# 'sync', 'thread' (по умолчанию) или 'worker' (python manage.py send_outbox).
+EMAIL_OUTBOX_MODE = 'thread'
+
+# 'db' — код хранится в User.confirmation_code, 'hmac' — вычисляется.
+CONFIRMATION_CODE_MODE = 'db'
+
+# 'memory', 'cache' (общий кэш Django) или путь к классу хранилища.
+THROTTLE_STORE = 'memory'
+
+# /metrics отдаётся адресам из METRICS_ALLOWED_IPS (REMOTE_ADDR) и
+# запросам с заголовком "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = None
+
+# Строка JSON на каждый запрос к API: число и время SQL-запросов.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '20/hour',
+        'signup_username': '5/hour',
+        'token_ip': '60/hour',
+        'token_username': '10/hour',
+    },
+    # Клиент определяется по REMOTE_ADDR; за обратным прокси укажите число
+    # прокси, добавляющих X-Forwarded-For.
+    'NUM_PROXIES': 0,
 }
 
 SIMPLE_JWT = {
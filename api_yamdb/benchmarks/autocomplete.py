@@ -0,0 +1,68 @@
+"""Автодополнение: индекс в памяти против SearchFilter (icontains).
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.autocomplete --reviews 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from benchmarks.seed import seed  # noqa: E402
+from config import AUTOCOMPLETE_LIMIT  # noqa: E402
+from reviews.autocomplete import SOURCES, autocomplete  # noqa: E402
+from reviews.models import Review  # noqa: E402
+
+REPEAT = 200
+# Префиксы, которые набирает пользователь по одной букве.
+PREFIXES = ('п', 'пр', 'про', 'произв', 'произведение 9', 'ж', 'жанр 1')
+
+
+def measure(function):
+    """Среднее время вызова, мкс."""
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - started) / REPEAT * 1_000_000
+
+
+def search_filter(kind, prefix):
+    """Запрос, который выполняет SearchFilter по полю name."""
+    model = SOURCES[kind][0]
+    return lambda: list(model.objects.filter(
+        name__icontains=prefix
+    ).values_list('pk', 'name')[:AUTOCOMPLETE_LIMIT])
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=1_000_000)
+    args = parser.parse_args()
+    call_command('migrate', verbosity=0)
+    if not Review.objects.exists():
+        seed(args.reviews, stdout=sys.stdout)
+    started = time.perf_counter()
+    autocomplete.warm()
+    print(f'Построение индекса: {time.perf_counter() - started:.2f} с')
+    print(f'{"Тип":<12}{"Префикс":<18}{"icontains, мкс":>16}'
+          f'{"индекс, мкс":>14}')
+    for kind in SOURCES:
+        for prefix in PREFIXES:
+            before = measure(search_filter(kind, prefix))
+            after = measure(lambda: autocomplete.search(
+                (kind,), prefix, AUTOCOMPLETE_LIMIT
+            ))
+            print(f'{kind:<12}{prefix:<18}{before:>16.1f}{after:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
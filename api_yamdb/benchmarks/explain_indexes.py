@@ -0,0 +1,110 @@
+"""Планы и время запросов до и после составных индексов.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.explain_indexes --reviews 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from importlib import import_module
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.apps import apps  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from benchmarks.seed import seed  # noqa: E402
+from reviews.models import Comment, Review, Title  # noqa: E402
+
+INDEX_MIGRATION = 'reviews.migrations.0003_query_indexes'
+REPEAT = 20
+
+
+def queries(title_id, author_id, review_id):
+    """Запросы, повторяющие обращения представлений и сериализаторов."""
+    return {
+        'Отзывы произведения (-pub_date, id)': Review.objects.filter(
+            title_id=title_id
+        ).order_by('-pub_date', 'id')[:10],
+        'Проверка отзыва (title, author)': Review.objects.filter(
+            title_id=title_id, author_id=author_id
+        ),
+        'Комментарии отзыва (-pub_date, id)': Comment.objects.filter(
+            review_id=review_id
+        ).order_by('-pub_date', 'id')[:10],
+        'Произведения (year, name, id)': Title.objects.order_by(
+            'year', 'name', 'id'
+        )[:10],
+        'Произведения по name': Title.objects.filter(
+            name='Произведение 1'
+        ),
+        'Произведения по year': Title.objects.filter(
+            year=1950
+        ).order_by('year', 'name', 'id')[:10],
+    }
+
+
+def query_indexes():
+    """Модели и индексы, которые добавляет миграция INDEX_MIGRATION."""
+    return [
+        (apps.get_model('reviews', operation.model_name), operation.index)
+        for operation in import_module(INDEX_MIGRATION).Migration.operations
+    ]
+
+
+def drop_indexes():
+    """Удаляет индексы миграции, не откатывая остальную схему."""
+    with connection.schema_editor() as editor:
+        for model, index in query_indexes():
+            editor.remove_index(model, index)
+
+
+def create_indexes():
+    """Создаёт индексы миграции заново."""
+    with connection.schema_editor() as editor:
+        for model, index in query_indexes():
+            editor.add_index(model, index)
+
+
+def measure(queryset):
+    """Среднее время выполнения запроса, мс."""
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        list(queryset.all())
+    return (time.perf_counter() - started) / REPEAT * 1000
+
+
+def report(title, params):
+    """Печатает план и время каждого запроса."""
+    print(f'\n=== {title} ===')
+    for name, queryset in queries(*params).items():
+        print(f'\n{name}: {measure(queryset):.2f} мс')
+        print(queryset.explain())
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=1_000_000)
+    args = parser.parse_args()
+    call_command('migrate', verbosity=0)
+    if not Review.objects.exists():
+        seed(args.reviews, stdout=sys.stdout)
+    review = Review.objects.order_by('pk')[Review.objects.count() // 2]
+    params = (review.title_id, review.author_id, review.pk)
+    drop_indexes()
+    try:
+        report('До индексов', params)
+    finally:
+        create_indexes()
+    report('После индексов', params)
+
+
+if __name__ == '__main__':
+    main()
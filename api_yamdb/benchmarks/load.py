@@ -0,0 +1,55 @@
+"""Нагрузочный прогон сценариев API: req/s, задержки и число SQL-запросов.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.load --size 1m --requests 2000 --threads 4
+
+Пустая база заполняется через benchmarks.seed (--size: 10k, 1m, 10m или
+число отзывов). Сценарии browse, review, comments и admin выполняются
+по очереди; объекты, созданные сценариями, после прогона удаляются.
+"""
+import argparse
+import os
+import sys
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from benchmarks.scenarios import PERCENTILES, SCENARIOS, run  # noqa: E402
+from benchmarks.seed import parse_size, seed  # noqa: E402
+from reviews.models import Review  # noqa: E402
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=parse_size, default='10k')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--scenario', action='append', choices=SCENARIOS,
+        help='сценарий; по умолчанию все'
+    )
+    args = parser.parse_args()
+    call_command('migrate', verbosity=0)
+    if not Review.objects.exists():
+        seed(args.size, stdout=sys.stdout)
+    print(f'Отзывов в базе: {Review.objects.count()}, '
+          f'потоков: {args.threads}, запросов на сценарий: {args.requests}')
+    print(f'{"Сценарий":<10}{"req/s":>9}'
+          + ''.join(f'{f"p{round(p * 100)}, мс":>11}' for p in PERCENTILES)
+          + f'{"SQL/запрос":>12}{"ошибок":>8}')
+    for name in args.scenario or SCENARIOS:
+        report = run(SCENARIOS[name], args.requests, args.threads, args.seed)
+        print(f'{name:<10}{report.throughput:>9.1f}'
+              + ''.join(f'{value:>11.1f}' for value in report.latency.values())
+              + f'{report.queries_per_request:>12.1f}{report.errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
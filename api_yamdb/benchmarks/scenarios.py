@@ -0,0 +1,330 @@
+"""Сценарии нагрузочного прогона и подсчёт его результатов.
+
+Сценарий заранее генерирует список запросов по генератору случайных
+чисел с фиксированным seed, поэтому повторный прогон на той же базе
+выполняет те же запросы. Запросы выполняются тестовым клиентом Django в
+потоках текущего процесса; для каждого запроса фиксируются время ответа,
+число SQL-запросов и код ответа.
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import access_token_for_user
+from reviews.models import Comment, Review, Title, User
+
+API_PREFIX = '/api/v1'
+LOAD_TEXT = 'Нагрузочный прогон'
+WRITER_PREFIX = 'bench-writer-'
+ADMIN_USERNAME = 'bench-admin'
+SAMPLE_SIZE = 1000
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def sample_rows(model, rng, fields, size=SAMPLE_SIZE):
+    """Случайные существующие строки модели: значения `fields`.
+
+    id выбираются в диапазоне от 1 до максимального, поэтому выборка
+    обходится одним запросом по первичному ключу и на больших таблицах.
+    """
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if last is None:
+        return []
+    ids = {rng.randint(1, last) for _ in range(size)}
+    return list(model.objects.filter(pk__in=ids).values_list(*fields))
+
+
+def bearer(user):
+    """Заголовок авторизации пользователя для тестового клиента."""
+    return {'HTTP_AUTHORIZATION': f'Bearer {access_token_for_user(user)}'}
+
+
+@dataclass(frozen=True)
+class Call:
+    """Один запрос сценария."""
+
+    method: str
+    path: str
+    data: dict = None
+    headers: dict = field(default_factory=dict)
+
+
+class Scenario:
+    """Набор запросов одного типа клиента."""
+
+    name = None
+    description = None
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def prepare(self, count):
+        """Загружает данные, на которые ссылаются запросы."""
+
+    def call(self, number):
+        """Запрос с порядковым номером `number`."""
+        raise NotImplementedError
+
+    def calls(self, count):
+        """Список из `count` запросов."""
+        self.prepare(count)
+        return [self.call(number) for number in range(count)]
+
+    def cleanup(self):
+        """Удаляет объекты, созданные запросами сценария."""
+
+
+class BrowseScenario(Scenario):
+    """Аноним просматривает каталог, карточки и отзывы произведений."""
+
+    name = 'browse'
+    description = 'аноним: каталог, фильтры, карточки и отзывы'
+
+    def prepare(self, count):
+        self.titles = [pk for pk, in sample_rows(Title, self.rng, ('pk',))]
+        self.genres = self.slugs('genres')
+        self.categories = self.slugs('categories')
+
+    def slugs(self, name):
+        """Slug жанров или категорий из списка первой страницы."""
+        return [
+            item['slug'] for item in Client().get(
+                f'{API_PREFIX}/{name}/', {'limit': 100}
+            ).json()['results']
+        ]
+
+    def call(self, number):
+        title_id = self.rng.choice(self.titles)
+        return self.rng.choice((
+            Call('get', f'{API_PREFIX}/titles/', {
+                'limit': 10, 'offset': self.rng.randrange(0, 200, 10)
+            }),
+            Call('get', f'{API_PREFIX}/titles/', {
+                'genre': self.rng.choice(self.genres)
+            }),
+            Call('get', f'{API_PREFIX}/titles/', {
+                'category': self.rng.choice(self.categories),
+                'cursor': ''
+            }),
+            Call('get', f'{API_PREFIX}/titles/{title_id}/'),
+            Call('get', f'{API_PREFIX}/titles/{title_id}/reviews/'),
+            Call('get', f'{API_PREFIX}/categories/'),
+            Call('get', f'{API_PREFIX}/genres/'),
+        ))
+
+
+class ReviewScenario(Scenario):
+    """Пользователи публикуют отзывы.
+
+    Авторы — отдельные пользователи bench-writer-N без отзывов, каждый
+    пишет по одному отзыву на произведения из выборки, чтобы пара
+    (title, author) не повторялась.
+    """
+
+    name = 'review'
+    description = 'пользователь: публикация отзыва'
+
+    def prepare(self, count):
+        self.titles = [pk for pk, in sample_rows(Title, self.rng, ('pk',))]
+        writers = -(-count // len(self.titles))
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f'{WRITER_PREFIX}{number}',
+                    email=f'{WRITER_PREFIX}{number}@yamdb.fake',
+                    password='!'
+                )
+                for number in range(writers)
+            ],
+            ignore_conflicts=True
+        )
+        self.writers = [
+            bearer(user) for user in User.objects.filter(
+                username__startswith=WRITER_PREFIX
+            ).order_by('pk')[:writers]
+        ]
+
+    def call(self, number):
+        writer, position = divmod(number, len(self.titles))
+        return Call(
+            'post',
+            f'{API_PREFIX}/titles/{self.titles[position]}/reviews/',
+            {'text': LOAD_TEXT, 'score': self.rng.randint(1, 10)},
+            self.writers[writer]
+        )
+
+    def cleanup(self):
+        User.objects.filter(username__startswith=WRITER_PREFIX).delete()
+
+
+class CommentScenario(Scenario):
+    """Пользователи читают ветки комментариев и отвечают в них."""
+
+    name = 'comments'
+    description = 'пользователь: ветка комментариев, каждый 5-й — ответ'
+
+    def prepare(self, count):
+        self.reviews = sample_rows(Review, self.rng, ('title_id', 'pk'))
+        self.users = [
+            bearer(user) for user in User.objects.filter(pk__in=[
+                pk for pk, in sample_rows(User, self.rng, ('pk',), 50)
+            ])
+        ]
+
+    def call(self, number):
+        title_id, review_id = self.rng.choice(self.reviews)
+        path = (
+            f'{API_PREFIX}/titles/{title_id}/reviews/{review_id}/comments/'
+        )
+        headers = self.rng.choice(self.users)
+        if number % 5 == 4:
+            return Call('post', path, {'text': LOAD_TEXT}, headers)
+        return Call('get', path, None, headers)
+
+    def cleanup(self):
+        Comment.objects.filter(text=LOAD_TEXT).delete()
+
+
+class AdminSearchScenario(Scenario):
+    """Администратор ищет пользователей и открывает их профили."""
+
+    name = 'admin'
+    description = 'администратор: поиск и профили пользователей'
+
+    def prepare(self, count):
+        admin, _ = User.objects.get_or_create(
+            username=ADMIN_USERNAME,
+            defaults={
+                'email': f'{ADMIN_USERNAME}@yamdb.fake',
+                'role': User.ADMIN
+            }
+        )
+        self.admin = bearer(admin)
+        self.usernames = [
+            username for username, in sample_rows(
+                User, self.rng, ('username',)
+            )
+        ]
+
+    def call(self, number):
+        username = self.rng.choice(self.usernames)
+        if number % 2:
+            return Call(
+                'get', f'{API_PREFIX}/users/{username}/', None, self.admin
+            )
+        return Call('get', f'{API_PREFIX}/users/', {
+            'search': username[:self.rng.randint(1, len(username))]
+        }, self.admin)
+
+    def cleanup(self):
+        User.objects.filter(username=ADMIN_USERNAME).delete()
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        BrowseScenario, ReviewScenario, CommentScenario, AdminSearchScenario
+    )
+}
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)."""
+    rank = max(1, round(len(values) * fraction))
+    return values[min(len(values), rank) - 1]
+
+
+@dataclass
+class Report:
+    """Результаты прогона одного сценария."""
+
+    name: str
+    elapsed: float
+    durations: list
+    queries: list
+    statuses: dict
+
+    @property
+    def throughput(self):
+        """Запросов в секунду."""
+        return len(self.durations) / self.elapsed if self.elapsed else 0
+
+    @property
+    def latency(self):
+        """Перцентили времени ответа, мс."""
+        durations = sorted(self.durations)
+        return {
+            fraction: percentile(durations, fraction) * 1000
+            for fraction in PERCENTILES
+        }
+
+    @property
+    def queries_per_request(self):
+        """Среднее число SQL-запросов на запрос."""
+        return sum(self.queries) / len(self.queries)
+
+    @property
+    def errors(self):
+        """Число ответов с кодом 4xx и 5xx."""
+        return sum(
+            total for status, total in self.statuses.items() if status >= 400
+        )
+
+
+def execute(calls, results, lock):
+    """Выполняет запросы одним клиентом и добавляет результаты."""
+    client = Client()
+    measured = []
+    try:
+        for call in calls:
+            kwargs = dict(call.headers)
+            if call.method == 'get':
+                kwargs['data'] = call.data
+            else:
+                kwargs['data'] = json.dumps(call.data)
+                kwargs['content_type'] = 'application/json'
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, call.method)(call.path, **kwargs)
+                duration = time.perf_counter() - started
+            measured.append((duration, len(queries), response.status_code))
+    finally:
+        connection.close()
+        with lock:
+            results.extend(measured)
+
+
+def run(scenario_class, requests, threads=1, seed=1):
+    """Выполняет `requests` запросов сценария в `threads` потоках."""
+    scenario = scenario_class(random.Random(seed))
+    calls = scenario.calls(requests)
+    results = []
+    lock = threading.Lock()
+    workers = [
+        threading.Thread(
+            target=execute, args=(calls[number::threads], results, lock)
+        )
+        for number in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    scenario.cleanup()
+    statuses = {}
+    for _, _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return Report(
+        name=scenario.name,
+        elapsed=elapsed,
+        durations=[duration for duration, _, _ in results],
+        queries=[queries for _, queries, _ in results],
+        statuses=statuses,
+    )
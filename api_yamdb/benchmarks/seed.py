@@ -0,0 +1,129 @@
+"""Генерация тестовых данных для бенчмарков."""
+import math
+import time
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from reviews.models import (
+    Category, Comment, Genre,
+    Review, Title, User
+)
+from reviews.ratings import rebuild_ratings
+from reviews.search import index_titles
+from reviews.versions import bump_version
+
+BATCH_SIZE = 10000
+GENRES = 10
+CATEGORIES = 3
+COMMENTS_PER_REVIEW = 0.1
+# Размеры базы по числу отзывов.
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+
+def parse_size(value):
+    """Число отзывов: имя размера из SIZES или целое число."""
+    if value.lower() in SIZES:
+        return SIZES[value.lower()]
+    return int(value)
+
+
+def batched(items, size=BATCH_SIZE):
+    """Разбивает генератор объектов на пакеты."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bulk_insert(model, items, stdout=None):
+    """Сохраняет объекты пакетами, каждый в своей транзакции."""
+    started = time.monotonic()
+    created = 0
+    for batch in batched(items):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        created += len(batch)
+    if stdout is not None:
+        elapsed = time.monotonic() - started
+        stdout.write(
+            f'{model._meta.model_name}: {created} за {elapsed:.1f} с\n'
+        )
+    return created
+
+
+def seed(reviews, comments_per_review=COMMENTS_PER_REVIEW, stdout=None):
+    """Заполняет пустую базу заданным количеством отзывов.
+
+    Отзывы лежат на сетке √reviews произведений × √reviews пользователей,
+    чтобы пара (title, author) оставалась уникальной. Строки вставляются с
+    явными id, поэтому после вставки последовательности id сдвигаются за
+    них, как в import_csv.
+    """
+    titles = max(1, math.isqrt(reviews))
+    users = math.ceil(reviews / titles)
+    bulk_insert(Category, (
+        Category(id=i, name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(1, CATEGORIES + 1)
+    ), stdout)
+    bulk_insert(Genre, (
+        Genre(id=i, name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(1, GENRES + 1)
+    ), stdout)
+    bulk_insert(Title, (
+        Title(
+            id=i,
+            name=f'Произведение {i % 997}',
+            year=1900 + i % 120,
+            description=f'Описание произведения {i}',
+            category_id=i % CATEGORIES + 1
+        )
+        for i in range(1, titles + 1)
+    ), stdout)
+    bulk_insert(Title.genre.through, (
+        Title.genre.through(title_id=i, genre_id=i % GENRES + 1)
+        for i in range(1, titles + 1)
+    ), stdout)
+    bulk_insert(User, (
+        User(
+            id=i,
+            username=f'user{i}',
+            email=f'user{i}@yamdb.fake',
+            password='!'
+        )
+        for i in range(1, users + 1)
+    ), stdout)
+    bulk_insert(Review, (
+        Review(
+            id=i + 1,
+            title_id=i % titles + 1,
+            author_id=i // titles + 1,
+            text=f'Отзыв {i + 1}',
+            score=i % 10 + 1
+        )
+        for i in range(reviews)
+    ), stdout)
+    if comments_per_review:
+        step = max(1, round(1 / comments_per_review))
+        bulk_insert(Comment, (
+            Comment(
+                review_id=review_id,
+                author_id=review_id % users + 1,
+                text=f'Комментарий к отзыву {review_id}'
+            )
+            for review_id in range(1, reviews + 1, step)
+        ), stdout)
+    models = (Category, Comment, Genre, Review, Title, User)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(), [*models, Title.genre.through]
+        ):
+            cursor.execute(sql)
+    rebuild_ratings()
+    index_titles()
+    for model in models:
+        bump_version(model)
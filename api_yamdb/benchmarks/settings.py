@@ -0,0 +1,22 @@
+"""Настройки для запуска бенчмарков на отдельной базе.
+
+По умолчанию используется файл SQLite benchmarks/bench.sqlite3; локальная
+СУБД подключается переменными BENCH_DB_ENGINE, BENCH_DB (имя базы),
+BENCH_DB_USER, BENCH_DB_PASSWORD, BENCH_DB_HOST и BENCH_DB_PORT.
+"""
+import os
+
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import BASE_DIR, DATABASES
+
+DEBUG = False
+
+DATABASES['default']['ENGINE'] = os.environ.get(
+    'BENCH_DB_ENGINE', DATABASES['default']['ENGINE']
+)
+DATABASES['default']['NAME'] = os.environ.get(
+    'BENCH_DB', BASE_DIR / 'benchmarks' / 'bench.sqlite3'
+)
+for key in ('USER', 'PASSWORD', 'HOST', 'PORT'):
+    if f'BENCH_DB_{key}' in os.environ:
+        DATABASES['default'][key] = os.environ[f'BENCH_DB_{key}']
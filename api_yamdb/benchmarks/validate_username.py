@@ -0,0 +1,78 @@
+"""Скорость проверки username до и после предкомпиляции шаблона.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.validate_username --count 10000
+"""
+import argparse
+import random
+import re
+import string
+import timeit
+
+from django.core.exceptions import ValidationError
+
+from config import USERNAME_LENGTH, USERNAME_VALID_PATTERN
+from reviews.validators import validate_username_via_regex
+
+REPEAT = 5
+VALID_CHARACTERS = string.ascii_letters + string.digits + '_.@+-'
+INVALID_CHARACTERS = ' !#$%^&*()'
+
+
+def validate_username_before(username):
+    """Прежняя реализация: re.sub с некомпилированным шаблоном."""
+    invalid_characters = re.sub(USERNAME_VALID_PATTERN, '', username)
+    if invalid_characters:
+        invalid_characters = ''.join(set(invalid_characters))
+        raise ValidationError(
+            f'В username найдены недопустимые символы '
+            f'{invalid_characters}'
+        )
+    return username
+
+
+def usernames(count, invalid_share):
+    """Случайные username, часть из которых содержит недопустимые символы."""
+    generator = random.Random(count)
+    for _ in range(count):
+        name = ''.join(generator.choices(
+            VALID_CHARACTERS, k=generator.randint(3, USERNAME_LENGTH // 5)
+        ))
+        if generator.random() < invalid_share:
+            name += generator.choice(INVALID_CHARACTERS)
+        yield name
+
+
+def run(validator, names):
+    """Проверяет все имена, игнорируя ошибки валидации."""
+    for name in names:
+        try:
+            validator(name)
+        except ValidationError:
+            pass
+
+
+def measure(validator, names):
+    """Лучшее время проверки всех имён из REPEAT прогонов, мс."""
+    return min(
+        timeit.repeat(lambda: run(validator, names), number=1, repeat=REPEAT)
+    ) * 1000
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--invalid-share', type=float, default=0.05)
+    args = parser.parse_args()
+    names = list(usernames(args.count, args.invalid_share))
+    before = measure(validate_username_before, names)
+    after = measure(validate_username_via_regex, names)
+    print(f'{args.count} username, недопустимых {args.invalid_share:.0%}')
+    print(f'До:    {before:.2f} мс')
+    print(f'После: {after:.2f} мс ({before / after:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -13,4 +13,48 @@ HTTP_METHODS = ('get', 'post', 'patch', 'delete')
 NOT_APPLICABLE_CONF_CODE = 'N/A'
 CONF_CODE_LENGTH = 16
 CONF_CODE_PATTERN = string.ascii_letters + string.digits
+CONF_CODE_LIFETIME = 15 * 60
 SERVER_EMAIL = 'from@example.com'
+
+COUNT_CACHE_TIMEOUT = 30
+APPROXIMATE_COUNT_THRESHOLD = 10000
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60
+BULK_CREATE_LIMIT = 500
+SEARCH_RESULTS_LIMIT = 1000
+SEARCH_INDEX_REVIEWS = True
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_KEY_LENGTH = 32
+RANKING_PRIOR_COUNT = 5
+RANKING_PRIOR_SCORE = (MIN_RATING + MAX_RATING) / 2
+LEADERBOARD_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+CATALOG_TOTALS_SHARDS = 16
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_POLL_INTERVAL = 1
+OUTBOX_KEEP_SENT = 24 * 60 * 60
+OUTBOX_CLAIM_TIMEOUT = 5 * 60
+
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TIMEOUT = 60
+
+THROTTLE_CACHE_ALIAS = 'default'
+VERSION_CACHE_ALIAS = 'versions'
+VERSION_LOCK_TIMEOUT = 5
+VERSION_CHECK_INTERVAL = 1
+VERSION_SNAPSHOT_KEEP = 60
+THROTTLE_STORE_SIZE = 10000
+
+INSTRUMENTATION_TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+INSTRUMENTATION_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+INSTRUMENTATION_SQL_LENGTH = 500
+
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+OUTBOX_SEND_BUCKETS = METRICS_DURATION_BUCKETS
+OUTBOX_DELIVERY_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)
@@ -1,5 +1,10 @@
 """Файл настройки приложения."""
+import logging
+
 from django.apps import AppConfig
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
 
 
 class ReviewsConfig(AppConfig):
@@ -7,3 +12,20 @@ class ReviewsConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        """Подключает обработчики сигналов."""
+        from reviews import signals  # noqa: F401
+
+    def warm_caches(self):
+        """Строит индексы в памяти процесса до первого запроса.
+
+        Вызывается из wsgi.py и asgi.py, а не из ready(), чтобы команды
+        управления и миграции не читали БД при запуске. Ошибка БД (например,
+        не выполнен migrate) не мешает запуску, но попадает в лог.
+        """
+        from reviews.autocomplete import autocomplete
+        try:
+            autocomplete.warm()
+        except DatabaseError:
+            logger.exception('Не удалось построить индексы автодополнения.')
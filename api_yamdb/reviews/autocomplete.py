@@ -0,0 +1,239 @@
+"""Автодополнение названий произведений, жанров и категорий.
+
+Индекс хранится в памяти процесса: для каждого типа объектов это
+отсортированные списки нормализованных названий и их хвостов, начиная со
+второго слова. Поиск по префиксу — два bisect и не больше `limit`
+шагов по списку, поэтому время ответа не зависит от размера таблицы.
+Совпадения с начала названия идут раньше совпадений с начала слова.
+
+Индекс строится при первом обращении (в WSGI-процессе — при старте) и
+обновляется обработчиками сигналов после коммита. Если версия таблицы
+(reviews.versions) изменилась не только записями этого процесса, индекс
+перестраивается; версии хранятся в общем кэше, поэтому так учитываются и
+записи других процессов. Версии всех запрошенных типов читаются одним
+вызовом до взятия блокировок из снимка версий процесса, который сверяется
+с общим кэшем не чаще раза в VERSION_CHECK_INTERVAL секунд.
+
+Поиск и изменение индекса выполняются под блокировкой индекса, поэтому
+поиск не видит списки в середине вставки или удаления.
+"""
+import threading
+from bisect import bisect_left, insort
+
+from django.db import transaction
+
+from config import AUTOCOMPLETE_KEY_LENGTH
+from reviews.models import Category, Genre, Title
+from reviews.versions import get_versions
+
+
+def normalize(name):
+    """Название без регистра и лишних пробелов."""
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def name_keys(name):
+    """Ключ названия и ключи хвостов, начиная со второго слова."""
+    words = name.split(' ')
+    return (
+        name[:AUTOCOMPLETE_KEY_LENGTH],
+        [
+            ' '.join(words[position:])[:AUTOCOMPLETE_KEY_LENGTH]
+            for position in range(1, len(words))
+        ]
+    )
+
+
+class PrefixIndex:
+    """Префиксный индекс по названиям объектов одной модели."""
+
+    def __init__(self, rows):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.names = {}
+        starts = []
+        inner = []
+        for pk, name, item in rows:
+            name = normalize(name)
+            self.items[pk] = item
+            self.names[pk] = name
+            start, tails = name_keys(name)
+            starts.append((start, pk))
+            inner.extend((tail, pk) for tail in tails)
+        starts.sort()
+        inner.sort()
+        self.starts = starts
+        self.inner = inner
+
+    def add(self, pk, name, item):
+        """Добавляет или заменяет объект."""
+        with self.lock:
+            self.discard(pk)
+            self.insert(pk, normalize(name), item)
+
+    def remove(self, pk):
+        """Удаляет объект, если он есть в индексе."""
+        with self.lock:
+            self.discard(pk)
+
+    def insert(self, pk, name, item):
+        """Вставляет объект; вызывается под блокировкой."""
+        self.items[pk] = item
+        self.names[pk] = name
+        start, tails = name_keys(name)
+        insort(self.starts, (start, pk))
+        for tail in tails:
+            insort(self.inner, (tail, pk))
+
+    def discard(self, pk):
+        """Удаляет объект; вызывается под блокировкой."""
+        name = self.names.pop(pk, None)
+        if name is None:
+            return
+        del self.items[pk]
+        start, tails = name_keys(name)
+        for entries, key in [(self.starts, start)] + [
+            (self.inner, tail) for tail in tails
+        ]:
+            position = bisect_left(entries, (key, pk))
+            if position < len(entries) and entries[position] == (key, pk):
+                del entries[position]
+
+    def scan(self, entries, prefix, limit, found, matches):
+        """Добавляет в `found` объекты из `entries` с ключом на `prefix`."""
+        key = prefix[:AUTOCOMPLETE_KEY_LENGTH]
+        position = bisect_left(entries, (key,))
+        while len(found) < limit and position < len(entries):
+            entry_key, pk = entries[position]
+            if not entry_key.startswith(key):
+                break
+            if pk not in found and matches(self.names[pk]):
+                found[pk] = self.items[pk]
+            position += 1
+
+    def search(self, prefix, limit):
+        """Объекты, название или слово которых начинается с `prefix`."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        with self.lock:
+            self.scan(
+                self.starts, prefix, limit, found,
+                lambda name: name.startswith(prefix)
+            )
+            self.scan(
+                self.inner, prefix, limit, found,
+                lambda name: f' {prefix}' in name
+            )
+        return list(found.values())
+
+
+def title_rows():
+    """Строки индекса произведений."""
+    for pk, name in Title.objects.values_list('pk', 'name').iterator():
+        yield pk, name, {'id': pk, 'name': name}
+
+
+def slug_rows(model):
+    """Строки индекса жанров или категорий."""
+    return lambda: (
+        (pk, name, {'name': name, 'slug': slug})
+        for pk, name, slug in model.objects.values_list(
+            'pk', 'name', 'slug'
+        ).iterator()
+    )
+
+
+def title_item(title):
+    """Элемент индекса для объекта произведения."""
+    return {'id': title.pk, 'name': title.name}
+
+
+def slug_item(instance):
+    """Элемент индекса для объекта жанра или категории."""
+    return {'name': instance.name, 'slug': instance.slug}
+
+
+SOURCES = {
+    'titles': (Title, title_rows, title_item),
+    'genres': (Genre, slug_rows(Genre), slug_item),
+    'categories': (Category, slug_rows(Category), slug_item),
+}
+KINDS = tuple(SOURCES)
+
+
+class Autocomplete:
+    """Индексы всех типов объектов с отслеживанием версий таблиц."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indexes = {}
+
+    def get_indexes(self, kinds):
+        """Индексы типов `kinds`; версии таблиц читаются одним вызовом."""
+        versions = get_versions(*(SOURCES[kind][0] for kind in kinds))
+        return [
+            self.get_index(kind, version)
+            for kind, version in zip(kinds, versions)
+        ]
+
+    def get_index(self, kind, version):
+        """Индекс типа `kind`, перестроенный, если версия таблицы иная."""
+        rows = SOURCES[kind][1]
+        built = self.indexes.get(kind)
+        if built is None or built[0] != version:
+            with self.lock:
+                built = self.indexes.get(kind)
+                if built is None or built[0] != version:
+                    built = self.indexes[kind] = (version, PrefixIndex(rows()))
+        return built[1]
+
+    def search(self, kinds, prefix, limit):
+        """До `limit` объектов каждого из типов `kinds` по префиксу."""
+        return {
+            kind: index.search(prefix, limit)
+            for kind, index in zip(kinds, self.get_indexes(kinds))
+        }
+
+    def warm(self):
+        """Строит индексы всех типов."""
+        self.get_indexes(KINDS)
+
+    def clear(self):
+        """Сбрасывает индексы."""
+        with self.lock:
+            self.indexes.clear()
+
+    def apply(self, kind, pk, entry):
+        """Обновляет построенный индекс; `entry` None — объект удалён.
+
+        Если с момента построения версия таблицы изменилась только этой
+        записью, индекс считается актуальным; иначе он будет перестроен
+        при следующем поиске. Версию увеличивает обработчик, который
+        подключён раньше и тоже срабатывает после коммита, поэтому к
+        вызову она уже изменена.
+        """
+        version = get_versions(SOURCES[kind][0])[0]
+        with self.lock:
+            built = self.indexes.get(kind)
+            if built is None:
+                return
+            built_version, index = built
+            if entry is None:
+                index.remove(pk)
+            else:
+                index.add(pk, *entry)
+            if built_version == version - 1:
+                self.indexes[kind] = (version, index)
+
+    def changed(self, kind, instance, deleted=False):
+        """Обновляет индекс после коммита текущей транзакции."""
+        pk = instance.pk
+        entry = None if deleted else (
+            instance.name, SOURCES[kind][2](instance)
+        )
+        transaction.on_commit(lambda: self.apply(kind, pk, entry))
+
+
+autocomplete = Autocomplete()
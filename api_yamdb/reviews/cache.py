@@ -0,0 +1,96 @@
+"""Кэш версий в таблице БД."""
+
+from django.apps import apps
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+class DatabaseVersionCache(BaseCache):
+    """Целые значения в таблице VersionCounter с атомарным incr.
+
+    В отличие от DatabaseCache, incr выполняется одним
+    UPDATE ... SET value = value + delta и не требует блокировки, а
+    get_many читает все ключи одним SELECT. Хранит только целые числа;
+    время жизни не поддерживается, значения бессрочны. Таблицу создаёт
+    миграция reviews, поэтому после migrate кэш готов к работе.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+
+    @property
+    def model(self):
+        """Модель таблицы значений."""
+        return apps.get_model('reviews', 'VersionCounter')
+
+    def make_keys(self, keys, version=None):
+        """Словарь ключ в таблице -> исходный ключ."""
+        made = {}
+        for key in keys:
+            made_key = self.make_key(key, version=version)
+            self.validate_key(made_key)
+            made[made_key] = key
+        return made
+
+    def get(self, key, default=None, version=None):
+        """Значение ключа или `default`."""
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        """Значения ключей одним запросом."""
+        keys = self.make_keys(keys, version=version)
+        return {
+            keys[key]: value
+            for key, value in self.model.objects.filter(
+                key__in=keys
+            ).values_list('key', 'value')
+        }
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Сохраняет значение, если ключа ещё нет."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        try:
+            with transaction.atomic():
+                self.model.objects.create(key=key, value=value)
+        except IntegrityError:
+            return False
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Сохраняет значение."""
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        while not self.model.objects.filter(key=made_key).update(
+            value=value
+        ):
+            if self.add(key, value, version=version):
+                return
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно увеличивает значение и возвращает новое."""
+        made_key = self.make_key(key, version=version)
+        self.validate_key(made_key)
+        if not self.model.objects.filter(key=made_key).update(
+            value=F('value') + delta
+        ):
+            raise ValueError(f"Key '{key}' not found")
+        return self.get(key, version=version)
+
+    def delete(self, key, version=None):
+        """Удаляет ключ."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        deleted, _ = self.model.objects.filter(key=key).delete()
+        return bool(deleted)
+
+    def has_key(self, key, version=None):
+        """Есть ли ключ."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self.model.objects.filter(key=key).exists()
+
+    def clear(self):
+        """Удаляет все значения."""
+        self.model.objects.all().delete()
@@ -0,0 +1,71 @@
+"""Потоковая выгрузка данных в форматах csv и ndjson."""
+import csv
+import json
+
+from reviews.management.commands.import_csv import (
+    Models, csv_fields, csv_files
+)
+from reviews.models import Title
+
+CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Колонки, значения которых берутся не из одноимённого поля модели.
+column_lookups = {
+    'author': 'author_id',
+    'category': 'category_id',
+}
+
+export_files = {
+    file_name.split('.')[0]: (
+        csv_fields[file_name] + ['rating']
+        if file_name == 'titles.csv' else csv_fields[file_name]
+    )
+    for file_name in csv_files
+}
+
+
+class Echo:
+    """Буфер, который сразу возвращает записанную строку."""
+
+    def write(self, value):
+        """Возвращает значение без буферизации."""
+        return value
+
+
+def serialize_value(value):
+    """Приводит дату ко времени в формате ISO 8601."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_rows(name, chunk_size=CHUNK_SIZE):
+    """Построчно отдаёт кортежи значений колонок таблицы `name`."""
+    queryset = Models[name].objects.all()
+    if Models[name] is Title:
+        queryset = queryset.with_rating()
+    columns = export_files[name]
+    rows = queryset.order_by('pk').values_list(
+        *(column_lookups.get(column, column) for column in columns)
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield tuple(serialize_value(value) for value in row)
+
+
+def export_lines(name, export_format='csv', chunk_size=CHUNK_SIZE):
+    """Построчно отдаёт таблицу `name` в формате csv или ndjson."""
+    columns = export_files[name]
+    rows = export_rows(name, chunk_size)
+    if export_format == 'ndjson':
+        for row in rows:
+            line = json.dumps(dict(zip(columns, row)), ensure_ascii=False)
+            yield f'{line}\n'
+        return
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
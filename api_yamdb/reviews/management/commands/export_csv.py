@@ -0,0 +1,70 @@
+"""Команда для экспорта данных в csv-файлы."""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.export import (
+    CHUNK_SIZE, EXPORT_FORMATS,
+    export_files, export_lines
+)
+
+
+EXPORT_DIR = settings.BASE_DIR / 'static' / 'export'
+
+
+class Command(BaseCommand):
+    """Класс команды."""
+
+    help = 'Потоково выгружает данные в csv- или ndjson-файлы.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--path',
+            default=EXPORT_DIR,
+            type=lambda value: settings.BASE_DIR / value,
+            help='Каталог для файлов.'
+        )
+        parser.add_argument(
+            '--format',
+            default='csv',
+            choices=EXPORT_FORMATS,
+            dest='export_format',
+            help='Формат файлов.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            default=CHUNK_SIZE,
+            type=int,
+            help='Количество строк, читаемых из БД за раз.'
+        )
+
+    def handle(self, *args, **options):
+        """Функция экспорта."""
+        path = options['path']
+        path.mkdir(parents=True, exist_ok=True)
+        export_format = options['export_format']
+        for name in export_files:
+            started = time.monotonic()
+            lines = 0
+            with open(
+                path / f'{name}.{export_format}',
+                'w',
+                encoding='utf-8',
+                newline=''
+            ) as file:
+                for line in export_lines(
+                    name, export_format, options['chunk_size']
+                ):
+                    file.write(line)
+                    lines += 1
+            if export_format == 'csv':
+                lines -= 1
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{name}: выгружено {lines}, '
+                    f'{lines / elapsed if elapsed else 0:.0f} строк/с'
+                )
+            )
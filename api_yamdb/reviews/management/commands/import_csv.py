@@ -1,14 +1,26 @@
 """Команда для импорта csv-файлов."""
 import csv
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
 
 from reviews.models import (
     Category, Comment, Genre,
     Review, Title, User
 )
+from reviews.ratings import rebuild_ratings
+from reviews.search import index_titles
+from reviews.versions import bump_version
 
 
+DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+BATCH_SIZE = 1000
+
 csv_files = [
     'category.csv',
     'genre.csv',
@@ -41,97 +53,189 @@ Models = {
     'users': User,
 }
 
+# Внешние ключи: атрибут модели -> модель, на которую он ссылается.
+foreign_keys = {
+    'comments': {'review_id': Review, 'author_id': User},
+    'genre_title': {'title_id': Title, 'genre_id': Genre},
+    'review': {'title_id': Title, 'author_id': User},
+    'titles': {'category_id': Category},
+}
+
 
-def csv_reader_file(csv_file_name):
-    """Функция чтения из файла."""
+def csv_reader_file(csv_file_name, data_dir=DATA_DIR):
+    """Построчно читает csv-файл."""
     with open(
-        'static/data/' + csv_file_name,
+        data_dir / csv_file_name,
         'r',
-        encoding='utf-8'
-    )as csvfile:
-        csvreader = csv.DictReader(csvfile)
-        return list(csvreader)
+        encoding='utf-8-sig'
+    ) as csvfile:
+        yield from csv.DictReader(csvfile)
+
+
+def optional_int(value):
+    """Преобразует непустое значение в int."""
+    return int(value) if value else None
+
+
+def build_item(model, row):
+    """Создаёт объект модели по строке csv-файла."""
+    if model == 'users':
+        return User(
+            id=int(row['id']),
+            username=row['username'],
+            email=row['email'],
+            role=row['role'],
+            bio=row['bio'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            password='qwerty12345'
+        )
+    if model in ('category', 'genre'):
+        return Models[model](
+            id=int(row['id']),
+            name=row['name'],
+            slug=row['slug']
+        )
+    if model == 'titles':
+        return Title(
+            id=int(row['id']),
+            name=row['name'],
+            year=int(row['year']),
+            category_id=optional_int(row['category'])
+        )
+    if model == 'genre_title':
+        return Title.genre.through(
+            id=int(row['id']),
+            title_id=int(row['title_id']),
+            genre_id=int(row['genre_id'])
+        )
+    if model == 'review':
+        return Review(
+            id=int(row['id']),
+            title_id=int(row['title_id']),
+            text=row['text'],
+            author_id=int(row['author']),
+            score=int(row['score']),
+            pub_date=row['pub_date']
+        )
+    if model == 'comments':
+        return Comment(
+            id=int(row['id']),
+            review_id=int(row['review_id']),
+            text=row['text'],
+            author_id=int(row['author']),
+            pub_date=row['pub_date']
+        )
+    raise CommandError(f'Не удалось создать запись {model}')
 
 
 class Command(BaseCommand):
     """Класс команды."""
 
+    help = 'Импортирует данные из csv-файлов пакетами через bulk_create.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--path',
+            default=DATA_DIR,
+            type=lambda value: settings.BASE_DIR / value,
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            default=BATCH_SIZE,
+            type=int,
+            help='Количество записей в одном bulk_create.'
+        )
+        parser.add_argument(
+            '--no-validate',
+            action='store_false',
+            dest='validate',
+            help='Не вызывать full_clean() для записей.'
+        )
+
     def handle(self, *args, **options):
-        """Функция валидации полей и импорта."""
+        """Функция импорта."""
+        self.id_maps = {}
         for csv_file_name in csv_files:
-            for row in csv_reader_file(csv_file_name):
-                model = csv_file_name.split('.')[0]
-                model_class = Models.get(model)
-                item = None
-                if model_class == User:
-                    item = User(
-                        id=int(row['id']),
-                        username=row['username'],
-                        email=row['email'],
-                        role=row['role'],
-                        bio=row['bio'],
-                        first_name=row['first_name'],
-                        last_name=row['last_name'],
-                        password='qwerty12345'
-                    )
-                elif model_class == Category:
-                    item = Category(
-                        id=row['id'],
-                        name=row['name'],
-                        slug=row['slug']
-                    )
-                elif model_class == Review:
-                    title_id = int(row['title_id'])
-                    author_id = int(row['author'])
-                    item = Review(
-                        id=int(row['id']),
-                        title=Title.objects.get(pk=title_id),
-                        text=row['text'],
-                        author=User.objects.get(pk=author_id),
-                        score=int(row['score']),
-                        pub_date=row['pub_date']
-                    )
-                elif model_class == Comment:
-                    review_id = int(row['review_id'])
-                    author_id = int(row['author'])
-                    item = Comment(
-                        id=int(row['id']),
-                        review=Review.objects.get(pk=review_id),
-                        text=row['text'],
-                        author=User.objects.get(pk=author_id),
-                        pub_date=row['pub_date']
-                    )
-                elif model_class == Genre:
-                    item = Genre(
-                        id=row['id'],
-                        name=row['name'],
-                        slug=row['slug']
-                    )
-                elif model_class == Title:
-                    category_id = int(row['category'])
-                    item = Title(
-                        name=row['name'],
-                        year=int(row['year']),
-                        category=Category.objects.get(pk=category_id)
-                    )
-                elif model_class == Title.genre.through:
-                    genre_id = int(row['genre_id'])
-                    title_id = int(row['title_id'])
-                    item = Title.genre.through.objects.create(
-                        genre=Genre.objects.get(pk=genre_id),
-                        title=Title.objects.get(pk=title_id)
-                    )
-                else:
+            self.import_file(
+                csv_file_name,
+                options['path'],
+                options['batch_size'],
+                options['validate']
+            )
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(Models.values())
+            ):
+                cursor.execute(sql)
+        rebuild_ratings()
+        index_titles()
+        for model_class in Models.values():
+            bump_version(model_class)
+
+    def get_ids(self, model_class):
+        """Множество существующих id модели."""
+        if model_class not in self.id_maps:
+            self.id_maps[model_class] = set(
+                model_class.objects.values_list('pk', flat=True)
+            )
+        return self.id_maps[model_class]
+
+    def validate_item(self, model, item):
+        """Проверяет запись; внешние ключи сверяются с id в памяти."""
+        fields = foreign_keys.get(model, {})
+        for attname, model_class in fields.items():
+            value = getattr(item, attname)
+            if value is not None and value not in self.get_ids(model_class):
+                raise ValidationError(
+                    {attname: f'{model_class.__name__} {value} не найден.'}
+                )
+        item.full_clean(
+            exclude=[attname[:-len('_id')] for attname in fields],
+            validate_unique=False
+        )
+
+    def import_file(self, csv_file_name, data_dir, batch_size, validate):
+        """Импортирует один файл пакетами."""
+        model = csv_file_name.split('.')[0]
+        model_class = Models[model]
+        ids = self.get_ids(model_class)
+        rows = csv_reader_file(csv_file_name, data_dir)
+        created = skipped = 0
+        started = time.monotonic()
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            batch = []
+            for row in chunk:
+                item = build_item(model, row)
+                try:
+                    if validate:
+                        self.validate_item(model, item)
+                except ValidationError as error:
+                    skipped += 1
                     self.stdout.write(
                         self.style.ERROR(
-                            f'Не удалось создать запись {model}'
+                            f'Не удалось создать запись {model}: '
+                            f'{row} {error.messages}'
                         )
                     )
                     continue
-                item.full_clean()
-                item.save()
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Запись для модели {model} добавлена: {row}'
-                    )
-                )
+                batch.append(item)
+            try:
+                with transaction.atomic():
+                    model_class.objects.bulk_create(batch, batch_size)
+            except IntegrityError as error:
+                raise CommandError(f'{model}: {error}')
+            ids.update(item.pk for item in batch)
+            created += len(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{model}: добавлено {created}, пропущено {skipped}, '
+                f'{created / elapsed if elapsed else 0:.0f} строк/с'
+            )
+        )
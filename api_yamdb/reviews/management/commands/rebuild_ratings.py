@@ -0,0 +1,21 @@
+"""Команда для пересчёта рейтингов произведений."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    """Класс команды."""
+
+    help = 'Пересчитывает сохранённые рейтинги произведений по отзывам.'
+
+    def handle(self, *args, **options):
+        """Функция пересчёта."""
+        with transaction.atomic():
+            updated = rebuild_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рейтинги пересчитаны для произведений: {updated}'
+            )
+        )
@@ -0,0 +1,54 @@
+"""Команда для отправки писем из очереди."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from config import OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL
+from reviews.outbox import drain_outbox, metrics, purge_sent, sample_queue
+
+
+class Command(BaseCommand):
+    """Класс команды."""
+
+    help = 'Отправляет письма из очереди EmailOutbox пакетами.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--batch-size',
+            default=OUTBOX_BATCH_SIZE,
+            type=int,
+            help='Количество писем на одно SMTP-соединение.'
+        )
+        parser.add_argument(
+            '--interval',
+            default=OUTBOX_POLL_INTERVAL,
+            type=float,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить текущую очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        """Функция отправки."""
+        while True:
+            processed = drain_outbox(options['batch_size'])
+            if processed:
+                sample_queue()
+                totals = metrics.snapshot()
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Обработано писем: {processed}, '
+                        f'отправлено: {totals["sent"]}, '
+                        f'ошибок: {totals["failed"]}, '
+                        f'в очереди: {totals["depth"]}'
+                    )
+                )
+                continue
+            purge_sent()
+            if options['once']:
+                return
+            time.sleep(options['interval'])
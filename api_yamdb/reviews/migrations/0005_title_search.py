@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# Схема и начальное заполнение индекса на момент миграции; дальше индекс
+# ведёт reviews.search.
+CREATE_SQL = {
+    'sqlite': (
+        'CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_search USING fts5('
+        'name, description, reviews, '
+        "tokenize = 'unicode61 remove_diacritics 2')",
+        'DELETE FROM reviews_title_search',
+        'INSERT INTO reviews_title_search (rowid, name, description, reviews) '
+        "SELECT t.id, t.name, COALESCE(t.description, ''), "
+        "COALESCE((SELECT group_concat(r.text, ' ') FROM reviews_review r "
+        "WHERE r.title_id = t.id), '') FROM reviews_title t",
+    ),
+    'postgresql': (
+        'CREATE TABLE IF NOT EXISTS reviews_title_search ('
+        'title_id bigint PRIMARY KEY REFERENCES reviews_title (id) '
+        'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS reviews_title_search_document_idx '
+        'ON reviews_title_search USING gin (document)',
+        'DELETE FROM reviews_title_search',
+        'INSERT INTO reviews_title_search (title_id, document) '
+        "SELECT t.id, setweight(to_tsvector('simple', t.name), 'A') || "
+        "setweight(to_tsvector('simple', COALESCE(t.description, '')), 'B') "
+        "|| setweight(to_tsvector('simple', COALESCE((SELECT "
+        "string_agg(r.text, ' ') FROM reviews_review r "
+        "WHERE r.title_id = t.id), '')), 'C') FROM reviews_title t",
+    ),
+}
+DROP_SQL = 'DROP TABLE IF EXISTS reviews_title_search'
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_email_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
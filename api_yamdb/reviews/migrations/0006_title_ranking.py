@@ -0,0 +1,90 @@
+# Generated by Django 3.2 on 2026-10-17 15:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Значения RANKING_PRIOR_COUNT и RANKING_PRIOR_SCORE на момент миграции.
+PRIOR_COUNT = 5
+PRIOR_SCORE = 5.5
+BATCH_SIZE = 1000
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    genres = {}
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+        'title_id', 'genre_id'
+    ):
+        genres.setdefault(title_id, []).append(genre_id)
+    batch = []
+    for title_id, year, category_id, rating_sum, rating_count in (
+        Title.objects.filter(rating_count__gt=0).order_by('pk').values_list(
+            'pk', 'year', 'category_id', 'rating_sum', 'rating_count'
+        ).iterator()
+    ):
+        values = {
+            'rating': rating_sum / rating_count,
+            'bayesian_rating': (
+                PRIOR_SCORE * PRIOR_COUNT + rating_sum
+            ) / (PRIOR_COUNT + rating_count),
+            'review_count': rating_count,
+        }
+        scopes = [('all', 0), ('year', year)] + [
+            ('genre', genre_id) for genre_id in genres.get(title_id, ())
+        ]
+        if category_id is not None:
+            scopes.append(('category', category_id))
+        batch.extend(
+            TitleRanking(
+                scope=scope, scope_id=scope_id, title_id=title_id, **values
+            )
+            for scope, scope_id in scopes
+        )
+        if len(batch) >= BATCH_SIZE:
+            TitleRanking.objects.bulk_create(batch)
+            batch = []
+    TitleRanking.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('genre', 'Жанр'), ('category', 'Категория'), ('year', 'Год')], max_length=8, verbose_name='Разрез')),
+                ('scope_id', models.IntegerField(default=0, verbose_name='Жанр, категория или год')),
+                ('rating', models.FloatField(verbose_name='Средняя оценка')),
+                ('bayesian_rating', models.FloatField(verbose_name='Байесовская оценка')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг произведения',
+                'verbose_name_plural': 'Рейтинги произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_id', '-bayesian_rating', 'title'], name='ranking_bayesian_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_id', '-rating', 'title'], name='ranking_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_id', '-review_count', 'title'], name='ranking_review_count_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_id', 'title'), name='unique_title_ranking'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-17 17:15
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+SCORES = range(1, 11)
+
+
+def fill_totals(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    CatalogTotals = apps.get_model('reviews', 'CatalogTotals')
+    CatalogTotals.objects.create(pk=1, **Title.objects.aggregate(
+        titles=Count('pk'),
+        reviews=Coalesce(Sum('rating_count'), 0),
+        **{
+            f'score_{score}': Coalesce(Sum(f'score_{score}'), 0)
+            for score in SCORES
+        }
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titles', models.PositiveIntegerField(default=0, verbose_name='Количество произведений')),
+                ('reviews', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 10')),
+            ],
+            options={
+                'verbose_name': 'Счётчики каталога',
+                'verbose_name_plural': 'Счётчики каталога',
+            },
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
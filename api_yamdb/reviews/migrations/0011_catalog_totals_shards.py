@@ -0,0 +1,90 @@
+# Generated by Django 3.2 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+SHARDS = 16
+
+
+def add_shards(apps, schema_editor):
+    CatalogTotals = apps.get_model('reviews', 'CatalogTotals')
+    CatalogTotals.objects.bulk_create(
+        CatalogTotals(shard=shard) for shard in range(SHARDS)
+        if not CatalogTotals.objects.filter(shard=shard).exists()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_version_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogtotals',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0, unique=True, verbose_name='Доля'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='titles',
+            field=models.IntegerField(default=0, verbose_name='Количество произведений'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='reviews',
+            field=models.IntegerField(default=0, verbose_name='Количество отзывов'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_1',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 1'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_2',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 2'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_3',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 3'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_4',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 4'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_5',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 5'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_6',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 6'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_7',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 7'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_8',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 8'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_9',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 9'),
+        ),
+        migrations.AlterField(
+            model_name='catalogtotals',
+            name='score_10',
+            field=models.IntegerField(default=0, verbose_name='Отзывов с оценкой 10'),
+        ),
+        migrations.RunPython(add_shards, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,9 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import (MinValueValidator,
                                     MaxValueValidator)
 from django.db import models
+from django.db.models import ExpressionWrapper, F
+from django.db.models.functions import NullIf
+from django.utils import timezone
 
 from config import (
     MIN_RATING, MAX_RATING,
@@ -18,6 +21,7 @@ from reviews.validators import (
 
 NAME_MAX_LENGTH = 256
 SLUG_MAX_LENGTH = 50
+VERSION_KEY_MAX_LENGTH = 255
 TEXT_LIMIT = 20
 
 
@@ -123,6 +127,19 @@ class Category(NameSlugModel):
         verbose_name_plural = 'Категории'
 
 
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений."""
+
+    def with_rating(self):
+        """Добавляет рейтинг из сохранённых счётчиков оценок."""
+        return self.annotate(
+            rating=ExpressionWrapper(
+                F('rating_sum') / NullIf(F('rating_count'), 0),
+                output_field=models.IntegerField()
+            )
+        )
+
+
 class Title(models.Model):
     """Модель произведения."""
 
@@ -154,16 +171,121 @@ class Title(models.Model):
         null=True,
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
 
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('year', 'name')
+        indexes = [
+            models.Index(
+                fields=('year', 'name', 'id'),
+                name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=('name', 'year', 'id'),
+                name='title_name_year_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_histogram(self):
+        """Количество отзывов с каждой оценкой."""
+        return {
+            score: getattr(self, score_field(score)) for score in SCORES
+        }
+
+
+def score_field(score):
+    """Имя поля-счётчика отзывов с оценкой `score`."""
+    return f'score_{score}'
+
+
+SCORES = range(MIN_RATING, MAX_RATING + 1)
+
+for score in SCORES:
+    Title.add_to_class(score_field(score), models.PositiveIntegerField(
+        verbose_name=f'Отзывов с оценкой {score}',
+        default=0,
+        editable=False,
+    ))
+
+
+class CatalogTotals(models.Model):
+    """Доля общих счётчиков каталога.
+
+    Обновляются теми же F()-выражениями, что и счётчики произведений, и
+    позволяют читать число произведений и отзывов без COUNT(*). Записи
+    распределены по CATALOG_TOTALS_SHARDS строкам, значения каталога —
+    суммы по ним; отдельная строка может быть отрицательной.
+    """
+
+    shard = models.PositiveSmallIntegerField(
+        verbose_name='Доля',
+        unique=True,
+    )
+    titles = models.IntegerField(
+        verbose_name='Количество произведений',
+        default=0,
+    )
+    reviews = models.IntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+    )
+
+    class Meta:
+
+        verbose_name = 'Счётчики каталога'
+        verbose_name_plural = 'Счётчики каталога'
+
+    def __str__(self):
+        return f'{self.shard}: {self.titles} / {self.reviews}'
+
+
+for score in SCORES:
+    CatalogTotals.add_to_class(
+        score_field(score), models.IntegerField(
+            verbose_name=f'Отзывов с оценкой {score}',
+            default=0,
+        )
+    )
+
+
+class VersionCounter(models.Model):
+    """Значение кэша версий (reviews.cache.DatabaseVersionCache)."""
+
+    key = models.CharField(
+        verbose_name='Ключ',
+        max_length=VERSION_KEY_MAX_LENGTH,
+        primary_key=True,
+    )
+    value = models.BigIntegerField(
+        verbose_name='Значение',
+    )
+
+    class Meta:
+
+        verbose_name = 'Версия'
+        verbose_name_plural = 'Версии'
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
+
 
 class AuthorTextPubDateModel(models.Model):
     """Базовая модель для комментариев и отзывов."""
@@ -221,6 +343,12 @@ class Review(AuthorTextPubDateModel):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(AuthorTextPubDateModel):
@@ -236,3 +364,137 @@ class Comment(AuthorTextPubDateModel):
 
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class EmailOutbox(models.Model):
+    """Модель исходящего письма."""
+
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=NAME_MAX_LENGTH,
+    )
+    message = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.EmailField(
+        verbose_name='Отправитель',
+        max_length=EMAIL_FIELD_LENGTH,
+    )
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=EMAIL_FIELD_LENGTH,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Количество попыток',
+        default=0,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at',)
+        indexes = [
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'),
+                name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject[:TEXT_LIMIT]}'
+
+
+class TitleRanking(models.Model):
+    """Материализованная строка рейтинга произведения в разрезе.
+
+    Для каждого произведения с отзывами хранится строка общего рейтинга и
+    строки по каждому жанру, категории и году выпуска.
+    """
+
+    ALL = 'all'
+    GENRE = 'genre'
+    CATEGORY = 'category'
+    YEAR = 'year'
+    SCOPES = (
+        (ALL, 'Все произведения'),
+        (GENRE, 'Жанр'),
+        (CATEGORY, 'Категория'),
+        (YEAR, 'Год'),
+    )
+
+    scope = models.CharField(
+        verbose_name='Разрез',
+        max_length=max(len(scope) for scope, _ in SCOPES),
+        choices=SCOPES,
+    )
+    scope_id = models.IntegerField(
+        verbose_name='Жанр, категория или год',
+        default=0,
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='rankings',
+    )
+    rating = models.FloatField(
+        verbose_name='Средняя оценка',
+    )
+    bayesian_rating = models.FloatField(
+        verbose_name='Байесовская оценка',
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+    )
+
+    class Meta:
+
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинги произведений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('scope', 'scope_id', 'title'),
+                name='unique_title_ranking'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('scope', 'scope_id', '-bayesian_rating', 'title'),
+                name='ranking_bayesian_idx'
+            ),
+            models.Index(
+                fields=('scope', 'scope_id', '-rating', 'title'),
+                name='ranking_rating_idx'
+            ),
+            models.Index(
+                fields=('scope', 'scope_id', '-review_count', 'title'),
+                name='ranking_review_count_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} {self.scope_id}: {self.title_id}'
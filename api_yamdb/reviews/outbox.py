@@ -0,0 +1,315 @@
+"""Очередь исходящих писем.
+
+Письмо сохраняется в таблицу EmailOutbox в транзакции вызывающего кода,
+а отправляется позже пакетами через одно SMTP-соединение. Режим доставки
+задаётся настройкой EMAIL_OUTBOX_MODE:
+
+- 'sync' — после коммита в потоке запроса (для тестов);
+- 'thread' — после коммита в фоновом потоке процесса (по умолчанию, в
+  том числе если настройка не задана);
+- 'worker' — отдельным процессом `python manage.py send_outbox`.
+
+В режиме 'thread' в очереди пула ждёт не больше одной задачи: она
+отправляет всю очередь писем, поэтому письма, сохранённые до её начала,
+новых задач не добавляют. Если после отправки в очереди остались
+отложенные письма или чужая аренда, задача заводит таймер на ближайшую
+попытку, и повтор не ждёт следующей регистрации.
+
+Пакет писем забирается короткой транзакцией: строки блокируются и
+получают аренду — next_attempt_at сдвигается на OUTBOX_CLAIM_TIMEOUT, —
+после чего SMTP-отправка идёт вне транзакции, а результат сохраняется
+отдельным запросом. Если отправитель упадёт, письма вернутся в очередь
+по истечении аренды.
+
+Письма отправляются бэкендом EMAIL_BACKEND, поэтому в тестах вместо
+SMTP работает locmem-бэкенд Django.
+"""
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_TIMEOUT, OUTBOX_DELIVERY_BUCKETS,
+    OUTBOX_KEEP_SENT, OUTBOX_MAX_ATTEMPTS, OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_DELAY, OUTBOX_SEND_BUCKETS
+)
+from reviews.models import EmailOutbox
+
+DEFAULT_MODE = 'thread'
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+drain_scheduled = threading.Semaphore(1)
+
+
+class OutboxMetrics:
+    """Счётчики и гистограммы отправки писем, безопасные для потоков.
+
+    Гистограмма — список: количество значений в каждом интервале
+    (последний — +Inf), затем сумма и количество значений. Глубина очереди
+    замеряется после отправки (sample_queue), а не при чтении метрик.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.depth = 0
+        self.send_seconds = [0] * (len(OUTBOX_SEND_BUCKETS) + 3)
+        self.delivery_seconds = [0] * (len(OUTBOX_DELIVERY_BUCKETS) + 3)
+
+    @staticmethod
+    def observe_histogram(histogram, buckets, value):
+        """Учитывает значение в гистограмме."""
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def observe(self, sent, failed, send_seconds=(), delivery_seconds=()):
+        """Учитывает результат отправки пакета.
+
+        `send_seconds` — время SMTP-отправки каждого письма,
+        `delivery_seconds` — время от постановки в очередь до отправки.
+        """
+        with self.lock:
+            self.sent += sent
+            self.failed += failed
+            for value in send_seconds:
+                self.observe_histogram(
+                    self.send_seconds, OUTBOX_SEND_BUCKETS, value
+                )
+            for value in delivery_seconds:
+                self.observe_histogram(
+                    self.delivery_seconds, OUTBOX_DELIVERY_BUCKETS, value
+                )
+
+    def set_depth(self, depth):
+        """Запоминает замеренную глубину очереди."""
+        with self.lock:
+            self.depth = depth
+
+    def snapshot(self):
+        """Копия счётчиков и гистограмм."""
+        with self.lock:
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'depth': self.depth,
+                'send_seconds': list(self.send_seconds),
+                'delivery_seconds': list(self.delivery_seconds),
+            }
+
+
+metrics = OutboxMetrics()
+
+
+class RetryTimer:
+    """Единственный таймер повторной отправки очереди в режиме 'thread'."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def schedule(self, at):
+        """Заменяет таймер таймером на момент `at`."""
+        delay = max(
+            (at - timezone.now()).total_seconds(), OUTBOX_POLL_INTERVAL
+        )
+        timer = threading.Timer(delay, schedule_drain)
+        timer.daemon = True
+        with self.lock:
+            self.cancel_locked()
+            self.timer = timer
+            timer.start()
+
+    def cancel(self):
+        """Отменяет таймер."""
+        with self.lock:
+            self.cancel_locked()
+
+    def cancel_locked(self):
+        """Отменяет таймер; вызывается под блокировкой."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+retry_timer = RetryTimer()
+
+
+def pending():
+    """Неотправленные письма, для которых остались попытки."""
+    return EmailOutbox.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=OUTBOX_MAX_ATTEMPTS
+    )
+
+
+def queue_depth():
+    """Количество писем в очереди."""
+    return pending().count()
+
+
+def sample_queue():
+    """Замеряет глубину очереди и возвращает время ближайшей попытки.
+
+    Оба значения читаются одним запросом; глубина сохраняется в метриках.
+    Возвращает None, если очередь пуста.
+    """
+    state = pending().aggregate(
+        depth=Count('pk'), next_attempt_at=Min('next_attempt_at')
+    )
+    metrics.set_depth(state['depth'])
+    return state['next_attempt_at']
+
+
+def enqueue_email(subject, message, from_email, recipient):
+    """Сохраняет письмо в очередь в текущей транзакции."""
+    email = EmailOutbox.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient=recipient,
+    )
+    mode = getattr(settings, 'EMAIL_OUTBOX_MODE', DEFAULT_MODE)
+    if mode == 'sync':
+        transaction.on_commit(lambda: drain_outbox(ids=[email.pk]))
+    elif mode == 'thread':
+        transaction.on_commit(schedule_drain)
+    return email
+
+
+def schedule_drain():
+    """Ставит отправку очереди в пул, если она ещё не ждёт там."""
+    if drain_scheduled.acquire(blocking=False):
+        executor.submit(drain_in_thread)
+
+
+def drain_in_thread():
+    """Отправляет очередь из фонового потока.
+
+    Оставшиеся в очереди письма ждут таймера на ближайшую попытку.
+    """
+    drain_scheduled.release()
+    try:
+        while drain_outbox():
+            pass
+        next_attempt_at = sample_queue()
+        if next_attempt_at is None:
+            retry_timer.cancel()
+        else:
+            retry_timer.schedule(next_attempt_at)
+    finally:
+        close_old_connections()
+
+
+def defer(email, error):
+    """Откладывает письмо с экспоненциальной задержкой."""
+    metrics.observe(sent=0, failed=1)
+    email.attempts += 1
+    email.last_error = str(error)
+    email.next_attempt_at = timezone.now() + timedelta(
+        seconds=OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+    )
+
+
+def claim(batch_size, ids=None):
+    """Забирает пакет писем, готовых к отправке, на OUTBOX_CLAIM_TIMEOUT."""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = pending().filter(next_attempt_at__lte=now)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        batch = list(
+            queryset.select_for_update(skip_locked=True)[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(
+                next_attempt_at=now + timedelta(seconds=OUTBOX_CLAIM_TIMEOUT)
+            )
+    return batch
+
+
+def send_email(connection, email):
+    """Отправляет письмо через открытое соединение.
+
+    Возвращает время отправки или None, если письмо отложено. Ошибка, не
+    связанная с SMTP (например, некорректный заголовок), тоже засчитывает
+    попытку и пробрасывается дальше.
+    """
+    started = time.monotonic()
+    try:
+        connection.send_messages([EmailMessage(
+            subject=email.subject,
+            body=email.message,
+            from_email=email.from_email,
+            to=[email.recipient],
+        )])
+    except (SMTPException, OSError) as error:
+        defer(email, error)
+        return None
+    except Exception as error:
+        defer(email, error)
+        raise
+    email.attempts += 1
+    email.sent_at = timezone.now()
+    return time.monotonic() - started
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, ids=None):
+    """Отправляет пакет писем через одно соединение.
+
+    Неудачные письма откладываются с экспоненциальной задержкой. Результат
+    пакета сохраняется и соединение закрывается, даже если отправка
+    прервалась исключением: уже отправленные письма не уйдут повторно.
+    Возвращает количество обработанных писем.
+    """
+    batch = claim(batch_size, ids)
+    if not batch:
+        return 0
+    send_seconds, delivery_seconds = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        try:
+            connection.open()
+        except (SMTPException, OSError) as error:
+            for email in batch:
+                defer(email, error)
+            return len(batch)
+        try:
+            for email in batch:
+                seconds = send_email(connection, email)
+                if seconds is None:
+                    continue
+                send_seconds.append(seconds)
+                delivery_seconds.append(
+                    (email.sent_at - email.created_at).total_seconds()
+                )
+        finally:
+            connection.close()
+    finally:
+        EmailOutbox.objects.bulk_update(
+            batch, ('attempts', 'last_error', 'next_attempt_at', 'sent_at')
+        )
+        metrics.observe(
+            len(send_seconds), 0, send_seconds, delivery_seconds
+        )
+    return len(batch)
+
+
+def purge_sent(keep_seconds=OUTBOX_KEEP_SENT):
+    """Удаляет давно отправленные письма."""
+    deleted, _ = EmailOutbox.objects.filter(
+        sent_at__lt=timezone.now() - timedelta(seconds=keep_seconds)
+    ).delete()
+    return deleted
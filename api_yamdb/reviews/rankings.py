@@ -0,0 +1,104 @@
+"""Материализованные рейтинги произведений для лидербордов.
+
+Для каждого произведения с отзывами TitleRanking хранит строку общего
+рейтинга и строки по жанрам, категории и году. Строки обновляются из
+хуков reviews.ratings при каждом изменении оценок и пересоздаются при
+изменении жанров, категории или года произведения. Чтение лидерборда —
+проход по индексу (scope, scope_id, -поле, title) на длину страницы.
+
+Байесовская оценка сдвигает среднее к RANKING_PRIOR_SCORE с весом
+RANKING_PRIOR_COUNT отзывов. Априорное среднее постоянно, поэтому отзыв
+меняет строки только своего произведения.
+"""
+from itertools import islice
+
+from django.db import transaction
+
+from config import RANKING_PRIOR_COUNT, RANKING_PRIOR_SCORE
+from reviews.models import Title, TitleRanking
+
+BATCH_SIZE = 1000
+RANKING_ORDERS = {
+    'bayesian': '-bayesian_rating',
+    'rating': '-rating',
+    'reviews': '-review_count',
+}
+
+
+def scores(rating_sum, rating_count):
+    """Средняя и байесовская оценки по счётчикам произведения."""
+    return {
+        'rating': rating_sum / rating_count,
+        'bayesian_rating': (
+            RANKING_PRIOR_SCORE * RANKING_PRIOR_COUNT + rating_sum
+        ) / (RANKING_PRIOR_COUNT + rating_count),
+        'review_count': rating_count,
+    }
+
+
+def build_rankings(titles):
+    """Строки рейтинга для произведений с отзывами."""
+    rows = titles.filter(rating_count__gt=0).order_by('pk').values_list(
+        'pk', 'year', 'category_id', 'rating_sum', 'rating_count'
+    ).iterator()
+    while True:
+        chunk = list(islice(rows, BATCH_SIZE))
+        if not chunk:
+            return
+        genres = {}
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=[row[0] for row in chunk]
+        ).values_list('title_id', 'genre_id'):
+            genres.setdefault(title_id, []).append(genre_id)
+        batch = []
+        for title_id, year, category_id, rating_sum, rating_count in chunk:
+            values = scores(rating_sum, rating_count)
+            scopes = [(TitleRanking.ALL, 0), (TitleRanking.YEAR, year)] + [
+                (TitleRanking.GENRE, genre_id)
+                for genre_id in genres.get(title_id, ())
+            ]
+            if category_id is not None:
+                scopes.append((TitleRanking.CATEGORY, category_id))
+            batch.extend(
+                TitleRanking(
+                    scope=scope, scope_id=scope_id, title_id=title_id,
+                    **values
+                )
+                for scope, scope_id in scopes
+            )
+        TitleRanking.objects.bulk_create(batch)
+
+
+def rebuild_rankings(titles=None):
+    """Пересоздаёт строки рейтинга произведений; None — всех."""
+    if titles is None:
+        titles = Title.objects.all()
+    with transaction.atomic():
+        TitleRanking.objects.filter(title__in=titles).delete()
+        build_rankings(titles)
+
+
+def refresh_title(title_id):
+    """Обновляет строки рейтинга произведения после изменения оценок."""
+    counters = Title.objects.filter(pk=title_id).values_list(
+        'rating_sum', 'rating_count'
+    ).first()
+    if counters is None or not counters[1]:
+        TitleRanking.objects.filter(title_id=title_id).delete()
+        return
+    if not TitleRanking.objects.filter(title_id=title_id).update(
+        **scores(*counters)
+    ):
+        rebuild_rankings(Title.objects.filter(pk=title_id))
+
+
+def remove_scope(scope, scope_id):
+    """Удаляет строки удалённого жанра или категории."""
+    TitleRanking.objects.filter(scope=scope, scope_id=scope_id).delete()
+
+
+def leaderboard(scope=TitleRanking.ALL, scope_id=0, order='bayesian'):
+    """Строки лидерборда в порядке убывания выбранного показателя."""
+    return TitleRanking.objects.filter(
+        scope=scope, scope_id=scope_id
+    ).order_by(RANKING_ORDERS[order], 'title').select_related('title')
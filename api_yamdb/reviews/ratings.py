@@ -0,0 +1,220 @@
+"""Поддержка денормализованного рейтинга произведений.
+
+Те же хуки ведут общие счётчики каталога (CatalogTotals): число
+произведений, отзывов и отзывов по оценкам. Счётчики разбиты на
+CATALOG_TOTALS_SHARDS строк: запись в произведение обновляет строку,
+выбранную по его id, поэтому записи в разные произведения не ждут одну
+общую блокировку. Чтение счётчиков — одна сумма по этим строкам.
+"""
+
+import random
+
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from config import CATALOG_TOTALS_SHARDS
+from reviews.models import (
+    SCORES, CatalogTotals, Review, Title, score_field
+)
+from reviews.rankings import rebuild_rankings, refresh_title
+from reviews.versions import bump_version_on_commit
+
+TOTALS_FIELDS = (
+    'titles', 'reviews', *(score_field(score) for score in SCORES)
+)
+
+
+def totals_values(titles):
+    """Число произведений, отзывов и отзывов по оценкам по их счётчикам."""
+    return titles.aggregate(
+        titles=Count('pk'),
+        reviews=Coalesce(Sum('rating_count'), 0),
+        **{
+            score_field(score): Coalesce(Sum(score_field(score)), 0)
+            for score in SCORES
+        }
+    )
+
+
+def rebuild_totals():
+    """Пересчитывает счётчики каталога по счётчикам всех произведений.
+
+    Итог записывается в первую строку, остальные обнуляются.
+    """
+    totals = totals_values(Title.objects.all())
+    zeros = dict.fromkeys(TOTALS_FIELDS, 0)
+    for shard in range(CATALOG_TOTALS_SHARDS):
+        CatalogTotals.objects.update_or_create(
+            shard=shard, defaults=zeros if shard else totals
+        )
+    return totals
+
+
+def get_totals():
+    """Счётчики каталога; пустая таблица пересчитывается."""
+    totals = CatalogTotals.objects.aggregate(
+        shards=Count('pk'),
+        **{field: Sum(field) for field in TOTALS_FIELDS}
+    )
+    if not totals.pop('shards'):
+        return rebuild_totals()
+    return totals
+
+
+def totals_shard(title_id=None):
+    """Строка счётчиков каталога для записи в произведение.
+
+    Без произведения (массовые пересчёты) строка выбирается случайно.
+    """
+    if title_id is None:
+        return random.randrange(CATALOG_TOTALS_SHARDS)
+    return title_id % CATALOG_TOTALS_SHARDS
+
+
+def update_totals(shard, **deltas):
+    """Прибавляет приращения к строке `shard` счётчиков каталога.
+
+    Вызывается после записи в произведения, поэтому отсутствующую строку
+    (пустая таблица или увеличенное CATALOG_TOTALS_SHARDS) можно
+    пересчитать вместе с остальными, не теряя это изменение.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if not CatalogTotals.objects.filter(shard=shard).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    }):
+        rebuild_totals()
+
+
+def title_created(title):
+    """Учитывает новое произведение в счётчиках каталога."""
+    update_totals(totals_shard(title.pk), titles=1)
+
+
+def title_deleted(title):
+    """Исключает удалённое произведение и его отзывы из счётчиков каталога."""
+    update_totals(
+        totals_shard(title.pk),
+        titles=-1,
+        reviews=-title.rating_count,
+        **{
+            score_field(score): -count
+            for score, count in title.score_histogram.items()
+        }
+    )
+
+
+def review_created(review):
+    """Учитывает оценку нового отзыва в рейтинге произведения."""
+    field = score_field(review.score)
+    Title.objects.filter(pk=review.title_id).update(
+        rating_sum=F('rating_sum') + review.score,
+        rating_count=F('rating_count') + 1,
+        **{field: F(field) + 1},
+    )
+    update_totals(totals_shard(review.title_id), reviews=1, **{field: 1})
+    refresh_title(review.title_id)
+
+
+def review_rescored(review, old_score):
+    """Учитывает изменение оценки отзыва."""
+    if review.score == old_score:
+        return
+    new_field, old_field = score_field(review.score), score_field(old_score)
+    Title.objects.filter(pk=review.title_id).update(
+        rating_sum=F('rating_sum') + review.score - old_score,
+        **{new_field: F(new_field) + 1, old_field: F(old_field) - 1},
+    )
+    update_totals(
+        totals_shard(review.title_id), **{new_field: 1, old_field: -1}
+    )
+    refresh_title(review.title_id)
+
+
+def review_deleted(review):
+    """Исключает оценку удалённого отзыва из рейтинга произведения."""
+    field = score_field(review.score)
+    Title.objects.filter(pk=review.title_id).update(
+        rating_sum=F('rating_sum') - review.score,
+        rating_count=F('rating_count') - 1,
+        **{field: F(field) - 1},
+    )
+    update_totals(totals_shard(review.title_id), reviews=-1, **{field: -1})
+    refresh_title(review.title_id)
+
+
+def rebuild_ratings(titles=None):
+    """Пересчитывает счётчики и гистограмму оценок по таблице отзывов.
+
+    Строки лидербордов пересоздаются по новым счётчикам, счётчики
+    каталога изменяются на разницу. Возвращает количество обновлённых
+    произведений.
+    """
+    rebuild_all = titles is None
+    if rebuild_all:
+        titles = Title.objects.all()
+    else:
+        before = totals_values(titles)
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    updated = titles.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0
+        ),
+        **{
+            score_field(score): Coalesce(Subquery(
+                reviews.filter(score=score).annotate(
+                    total=Count('id')
+                ).values('total')
+            ), 0)
+            for score in SCORES
+        },
+    )
+    if rebuild_all:
+        rebuild_totals()
+    else:
+        after = totals_values(titles)
+        update_totals(totals_shard(), **{
+            field: after[field] - before[field] for field in after
+        })
+    rebuild_rankings(titles)
+    bump_version_on_commit(Title)
+    return updated
+
+
+def rating_stats(title):
+    """Гистограмма, количество, среднее и медиана оценок произведения.
+
+    Считается по счётчикам произведения без запросов к отзывам.
+    """
+    histogram = title.score_histogram
+    count = sum(histogram.values())
+    stats = {
+        'count': count,
+        'mean': None,
+        'median': None,
+        'histogram': {str(score): total for score, total in histogram.items()},
+    }
+    if not count:
+        return stats
+    stats['mean'] = sum(
+        score * total for score, total in histogram.items()
+    ) / count
+    lower, upper = (count - 1) // 2, count // 2
+    middle = []
+    seen = 0
+    for score, total in histogram.items():
+        middle.extend(
+            score for position in (lower, upper)
+            if seen <= position < seen + total
+        )
+        seen += total
+    stats['median'] = sum(middle) / 2
+    return stats
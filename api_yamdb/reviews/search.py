@@ -0,0 +1,287 @@
+"""Полнотекстовый поиск произведений.
+
+Инвертированный индекс строится по названию, описанию и, если включён
+SEARCH_INDEX_REVIEWS, по текстам отзывов. Бэкенд выбирается по СУБД:
+
+- SQLite — виртуальная таблица FTS5, ранжирование bm25;
+- PostgreSQL — таблица с tsvector и GIN-индексом, ранжирование ts_rank_cd;
+- прочие — поиск icontains без индекса.
+
+Настройка SEARCH_BACKEND (путь к классу) заменяет выбор по СУБД.
+Индекс обновляется обработчиками сигналов после коммита транзакции;
+изменения одного произведения в транзакции схлопываются в одну запись.
+Текст нового отзыва дописывается к документу произведения одним UPDATE,
+а правка или удаление отзыва пересчитывает документ целиком.
+"""
+import re
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from config import SEARCH_INDEX_REVIEWS, SEARCH_RESULTS_LIMIT
+
+TITLE_TABLE = 'reviews_title'
+REVIEW_TABLE = 'reviews_review'
+SEARCH_TABLE = 'reviews_title_search'
+WORD_REGEX = re.compile(r'\w+')
+
+local = threading.local()
+
+
+def query_words(query):
+    """Слова поискового запроса без операторов синтаксиса СУБД."""
+    return WORD_REGEX.findall(query.lower())
+
+
+class SearchBackend:
+    """Бэкенд без индекса: поиск подстроки в названии и описании."""
+
+    append_sql = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        """Создаёт структуры индекса."""
+
+    def drop(self):
+        """Удаляет структуры индекса."""
+
+    def index(self, title_ids=None):
+        """Переиндексирует произведения; None — все."""
+
+    def append(self, texts):
+        """Дописывает тексты отзывов к документам произведений.
+
+        `texts` — словарь {id произведения: текст}. Возвращает id
+        произведений, у которых нет документа в индексе.
+        """
+        missing = []
+        if self.append_sql is None:
+            return missing
+        with self.connection.cursor() as cursor:
+            for title_id, text in texts.items():
+                cursor.execute(self.append_sql, (text, title_id))
+                if not cursor.rowcount:
+                    missing.append(title_id)
+        return missing
+
+    def search(self, words, limit):
+        """Id подходящих произведений по убыванию релевантности."""
+        from reviews.models import Title
+        condition = Q()
+        for word in words:
+            condition &= Q(name__icontains=word) | Q(
+                description__icontains=word
+            )
+        return list(Title.objects.using(self.connection.alias).filter(
+            condition
+        ).order_by('name', 'pk').values_list('pk', flat=True)[:limit])
+
+    def execute(self, sql, params=()):
+        """Выполняет запрос и возвращает строки результата."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else []
+
+    def id_condition(self, column, title_ids):
+        """Условие WHERE по списку id."""
+        if title_ids is None:
+            return '', []
+        placeholders = ', '.join(['%s'] * len(title_ids))
+        return f'WHERE {column} IN ({placeholders})', list(title_ids)
+
+    def reviews_sql(self):
+        """Подзапрос с текстами отзывов произведения."""
+        if not SEARCH_INDEX_REVIEWS:
+            return "''"
+        return (
+            f"COALESCE((SELECT {self.concat_function}(r.text, ' ') "
+            f'FROM {REVIEW_TABLE} r WHERE r.title_id = t.id), \'\')'
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Индекс в виртуальной таблице FTS5."""
+
+    concat_function = 'group_concat'
+    append_sql = (
+        f"UPDATE {SEARCH_TABLE} SET reviews = reviews || ' ' || %s "
+        f'WHERE rowid = %s'
+    )
+
+    def create(self):
+        """Создаёт таблицу FTS5 и индексирует произведения."""
+        self.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+            f"name, description, reviews, "
+            f"tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        self.index()
+
+    def drop(self):
+        """Удаляет таблицу FTS5."""
+        self.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def index(self, title_ids=None):
+        """Заменяет строки индекса строками из таблиц произведений."""
+        where, params = self.id_condition('rowid', title_ids)
+        self.execute(f'DELETE FROM {SEARCH_TABLE} {where}', params)
+        where, params = self.id_condition('t.id', title_ids)
+        self.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, description, reviews) '
+            f"SELECT t.id, t.name, COALESCE(t.description, ''), "
+            f'{self.reviews_sql()} FROM {TITLE_TABLE} t {where}',
+            params
+        )
+
+    def search(self, words, limit):
+        """Поиск по префиксам слов с ранжированием bm25."""
+        match = ' '.join(f'"{word}"*' for word in words)
+        return [row[0] for row in self.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 4.0, 1.0), rowid LIMIT %s',
+            (match, limit)
+        )]
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """Индекс в таблице с tsvector и GIN-индексом."""
+
+    concat_function = 'string_agg'
+    append_sql = (
+        f'UPDATE {SEARCH_TABLE} SET document = document || '
+        f"setweight(to_tsvector('simple', %s), 'C') WHERE title_id = %s"
+    )
+
+    def create(self):
+        """Создаёт таблицу документов и индексирует произведения."""
+        self.execute(
+            f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+            f'title_id bigint PRIMARY KEY REFERENCES {TITLE_TABLE} (id) '
+            f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            f'document tsvector NOT NULL)'
+        )
+        self.execute(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx '
+            f'ON {SEARCH_TABLE} USING gin (document)'
+        )
+        self.index()
+
+    def drop(self):
+        """Удаляет таблицу документов."""
+        self.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def index(self, title_ids=None):
+        """Пересчитывает документы произведений."""
+        where, params = self.id_condition('title_id', title_ids)
+        self.execute(f'DELETE FROM {SEARCH_TABLE} {where}', params)
+        where, params = self.id_condition('t.id', title_ids)
+        self.execute(
+            f'INSERT INTO {SEARCH_TABLE} (title_id, document) '
+            f"SELECT t.id, "
+            f"setweight(to_tsvector('simple', t.name), 'A') || "
+            f"setweight(to_tsvector('simple', "
+            f"COALESCE(t.description, '')), 'B') || "
+            f"setweight(to_tsvector('simple', {self.reviews_sql()}), 'C') "
+            f'FROM {TITLE_TABLE} t {where}',
+            params
+        )
+
+    def search(self, words, limit):
+        """Поиск по префиксам слов с ранжированием ts_rank_cd."""
+        return [row[0] for row in self.execute(
+            f'SELECT title_id FROM {SEARCH_TABLE}, '
+            f"to_tsquery('simple', %s) query "
+            f'WHERE document @@ query '
+            f'ORDER BY ts_rank_cd(document, query) DESC, title_id LIMIT %s',
+            (' & '.join(f'{word}:*' for word in words), limit)
+        )]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """Бэкенд поиска для соединения `using`."""
+    connection = connections[using]
+    name = getattr(settings, 'SEARCH_BACKEND', None)
+    if name:
+        return import_string(name)(connection)
+    return SEARCH_BACKENDS.get(connection.vendor, SearchBackend)(connection)
+
+
+def search_titles(query, limit=SEARCH_RESULTS_LIMIT, using=DEFAULT_DB_ALIAS):
+    """Id произведений по запросу в порядке релевантности."""
+    words = query_words(query)
+    if not words:
+        return []
+    return get_backend(using).search(words, limit)
+
+
+def index_titles(title_ids=None, using=DEFAULT_DB_ALIAS):
+    """Переиндексирует произведения сразу; None — все."""
+    if title_ids is not None:
+        title_ids = sorted(title_ids)
+        if not title_ids:
+            return
+    get_backend(using).index(title_ids)
+
+
+def append_reviews(review_ids, skip=(), using=DEFAULT_DB_ALIAS):
+    """Дописывает тексты отзывов к документам их произведений.
+
+    Отзывы произведений из `skip` пропускаются. Возвращает id
+    произведений, которые нужно проиндексировать целиком.
+    """
+    from reviews.models import Review
+    texts = {}
+    for title_id, text in Review.objects.using(using).filter(
+        pk__in=review_ids
+    ).exclude(title_id__in=skip).values_list('title_id', 'text'):
+        texts.setdefault(title_id, []).append(text)
+    if not texts:
+        return []
+    return get_backend(using).append({
+        title_id: ' '.join(parts) for title_id, parts in texts.items()
+    })
+
+
+def flush_pending():
+    """Обновляет индекс по изменениям завершённой транзакции.
+
+    Тексты новых отзывов читаются из БД, поэтому отзывы из откаченных
+    транзакций не попадают в индекс.
+    """
+    title_ids = getattr(local, 'pending', set())
+    review_ids = getattr(local, 'reviews', set())
+    local.pending = set()
+    local.reviews = set()
+    if review_ids:
+        title_ids |= set(append_reviews(review_ids, skip=title_ids))
+    index_titles(title_ids)
+
+
+def schedule_index(title_id):
+    """Переиндексирует произведение после коммита текущей транзакции."""
+    if not hasattr(local, 'pending'):
+        local.pending = set()
+    local.pending.add(title_id)
+    transaction.on_commit(flush_pending)
+
+
+def schedule_review(review_id):
+    """Дописывает текст нового отзыва в индекс после коммита."""
+    if not SEARCH_INDEX_REVIEWS:
+        return
+    if not hasattr(local, 'reviews'):
+        local.reviews = set()
+    local.reviews.add(review_id)
+    transaction.on_commit(flush_pending)
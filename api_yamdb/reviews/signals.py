@@ -0,0 +1,145 @@
+"""Обработчики сигналов моделей."""
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+
+from config import SEARCH_INDEX_REVIEWS
+from reviews.autocomplete import autocomplete
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, User
+)
+from reviews.rankings import rebuild_rankings, remove_scope
+from reviews.ratings import rebuild_ratings, title_created, title_deleted
+from reviews.search import schedule_index, schedule_review
+from reviews.versions import bump_row_version_on_commit, bump_version_on_commit
+
+VERSIONED_MODELS = (Category, Comment, Genre, Review, Title, User)
+
+
+def bump_model_version(sender, **kwargs):
+    """Меняет версию таблицы после коммита записи в неё."""
+    bump_version_on_commit(sender)
+
+
+def bump_user_version(sender, instance, **kwargs):
+    """Меняет версию пользователя: сбрасывает его в кэшах аутентификации."""
+    bump_row_version_on_commit(sender, instance.pk)
+
+
+def bump_genre_title_version(sender, action, **kwargs):
+    """Меняет версию связей произведений с жанрами."""
+    if action.startswith('post_'):
+        bump_version_on_commit(sender)
+
+
+def index_title(sender, instance, **kwargs):
+    """Обновляет поисковый индекс изменённого произведения."""
+    schedule_index(instance.pk)
+
+
+def index_review_title(sender, instance, created=False, **kwargs):
+    """Обновляет поисковый индекс произведения изменённого отзыва."""
+    if created:
+        schedule_review(instance.pk)
+    else:
+        schedule_index(instance.title_id)
+
+
+def count_title(sender, instance, created=False, **kwargs):
+    """Учитывает новое произведение в счётчиках каталога."""
+    if created:
+        title_created(instance)
+
+
+def uncount_title(sender, instance, **kwargs):
+    """Исключает удалённое произведение из счётчиков каталога."""
+    title_deleted(instance)
+
+
+def rank_title(sender, instance, **kwargs):
+    """Пересоздаёт строки рейтинга произведения после его изменения."""
+    rebuild_rankings(Title.objects.filter(pk=instance.pk))
+
+
+def rank_genre_titles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересоздаёт строки рейтинга после изменения жанров произведений."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        rebuild_rankings(Title.objects.filter(pk=instance.pk))
+    elif pk_set:
+        rebuild_rankings(Title.objects.filter(pk__in=pk_set))
+    else:
+        rebuild_rankings()
+
+
+def remember_reviewed_titles(sender, instance, **kwargs):
+    """Запоминает произведения, на которые удаляемый автор писал отзывы."""
+    instance._reviewed_title_ids = set(Review.objects.filter(
+        author_id=instance.pk
+    ).values_list('title_id', flat=True))
+
+
+def rerate_reviewed_titles(sender, instance, **kwargs):
+    """Пересчитывает рейтинг после каскадного удаления отзывов автора.
+
+    Отзывы к этому моменту уже удалены в той же транзакции.
+    """
+    title_ids = getattr(instance, '_reviewed_title_ids', None)
+    if title_ids:
+        rebuild_ratings(Title.objects.filter(pk__in=title_ids))
+
+
+def unrank_scope(scope):
+    """Обработчик, удаляющий строки рейтинга удалённого жанра/категории."""
+    def deleted(sender, instance, **kwargs):
+        remove_scope(scope, instance.pk)
+
+    return deleted
+
+
+def update_autocomplete(kind):
+    """Обработчики, обновляющие индекс автодополнения типа `kind`."""
+    def saved(sender, instance, **kwargs):
+        autocomplete.changed(kind, instance)
+
+    def deleted(sender, instance, **kwargs):
+        autocomplete.changed(kind, instance, deleted=True)
+
+    return saved, deleted
+
+
+AUTOCOMPLETE_MODELS = {
+    Title: 'titles',
+    Genre: 'genres',
+    Category: 'categories',
+}
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+m2m_changed.connect(bump_genre_title_version, sender=Title.genre.through)
+post_save.connect(bump_user_version, sender=User)
+post_delete.connect(bump_user_version, sender=User)
+post_save.connect(index_title, sender=Title)
+post_delete.connect(index_title, sender=Title)
+if SEARCH_INDEX_REVIEWS:
+    post_save.connect(index_review_title, sender=Review)
+    post_delete.connect(index_review_title, sender=Review)
+for model, kind in AUTOCOMPLETE_MODELS.items():
+    saved, deleted = update_autocomplete(kind)
+    post_save.connect(saved, sender=model, weak=False)
+    post_delete.connect(deleted, sender=model, weak=False)
+post_save.connect(rank_title, sender=Title)
+post_save.connect(count_title, sender=Title)
+post_delete.connect(uncount_title, sender=Title)
+pre_delete.connect(remember_reviewed_titles, sender=User)
+post_delete.connect(rerate_reviewed_titles, sender=User)
+m2m_changed.connect(rank_genre_titles, sender=Title.genre.through)
+post_delete.connect(
+    unrank_scope(TitleRanking.GENRE), sender=Genre, weak=False
+)
+post_delete.connect(
+    unrank_scope(TitleRanking.CATEGORY), sender=Category, weak=False
+)
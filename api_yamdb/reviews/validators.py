@@ -8,6 +8,9 @@ from config import (
     URL_PROFILE_PREF, USERNAME_VALID_PATTERN,
 )
 
+USERNAME_CHARACTER_REGEX = re.compile(USERNAME_VALID_PATTERN)
+USERNAME_REGEX = re.compile(f'{USERNAME_VALID_PATTERN}*')
+
 
 def validate_not_me(username):
     """Функция-валидатор. Проверяет, что username != me."""
@@ -21,16 +24,20 @@ def validate_not_me(username):
 
 
 def validate_username_via_regex(username):
-    """Валидация поля username."""
-    invalid_characters = re.sub(USERNAME_VALID_PATTERN, '', username)
-    if invalid_characters:
-        invalid_characters = "".join(set(invalid_characters))
-        raise ValidationError(
-            f'В username найдены недопустимые символы '
-            f'{invalid_characters}'
-        )
-
-    return username
+    """Валидация поля username.
+
+    Допустимое имя проверяется одним fullmatch; недопустимые символы
+    собираются только при ошибке.
+    """
+    if USERNAME_REGEX.fullmatch(username):
+        return username
+    invalid_characters = ''.join(
+        dict.fromkeys(USERNAME_CHARACTER_REGEX.sub('', username))
+    )
+    raise ValidationError(
+        f'В username найдены недопустимые символы '
+        f'{invalid_characters}'
+    )
 
 
 def validate_year(value):
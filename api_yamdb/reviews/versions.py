@@ -0,0 +1,227 @@
+"""Версии таблиц для инвалидации кэшей.
+
+Версии хранятся в кэше VERSION_CACHE_ALIAS, общем для процессов: запись
+в одном процессе сбрасывает кэши, построенные в других. Бэкенд задаётся
+в settings.CACHES: Memcached, если указан VERSION_CACHE_LOCATION, иначе
+таблица VersionCounter в БД (reviews.cache.DatabaseVersionCache). В обоих
+incr атомарен; для других бэкендов увеличение версии выполняется под
+блокировкой, взятой через cache.add, чтобы две одновременные записи
+всегда давали две разные версии.
+
+Процесс читает версии через локальный снимок: общий кэш опрашивается
+не чаще раза в VERSION_CHECK_INTERVAL секунд, одним get_many по всем
+ключам, которые запрашивались за последние VERSION_SNAPSHOT_KEEP секунд.
+Версии, изменённые в самом процессе, попадают в снимок сразу, изменения
+других процессов видны не позже чем через VERSION_CHECK_INTERVAL.
+"""
+
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.db import transaction
+
+from config import (VERSION_CACHE_ALIAS, VERSION_CHECK_INTERVAL,
+                    VERSION_LOCK_TIMEOUT, VERSION_SNAPSHOT_KEEP)
+from reviews.cache import DatabaseVersionCache
+
+VERSION_KEY = 'table-version:{}'
+MODIFIED_KEY = 'table-modified:{}'
+ROW_VERSION_KEY = 'row-version:{}:{}'
+LOCK_KEY = '{}:lock'
+LOCK_POLL_INTERVAL = 0.001
+ATOMIC_INCR_CACHES = (BaseMemcachedCache, DatabaseVersionCache)
+
+
+def version_key(model):
+    """Ключ кэша с версией таблицы модели."""
+    return VERSION_KEY.format(model._meta.db_table)
+
+
+def modified_key(model):
+    """Ключ кэша со временем последней записи в таблицу модели."""
+    return MODIFIED_KEY.format(model._meta.db_table)
+
+
+def row_version_key(model, pk):
+    """Ключ кэша с версией строки модели."""
+    return ROW_VERSION_KEY.format(model._meta.db_table, pk)
+
+
+def now_seconds():
+    """Текущее время (Unix time, целые секунды)."""
+    return int(time.time())
+
+
+def get_cache():
+    """Кэш, в котором хранятся версии таблиц."""
+    return caches[VERSION_CACHE_ALIAS]
+
+
+class VersionSnapshot:
+    """Локальная копия версий из общего кэша."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.used = {}
+        self.checked_at = None
+
+    def get(self, defaults):
+        """Значения ключей `defaults`, при необходимости из общего кэша.
+
+        `defaults` сопоставляет ключу функцию начального значения; ключ с
+        None не инициализируется и читается как None, пока его нет.
+        """
+        now = time.monotonic()
+        with self.lock:
+            for key in defaults:
+                self.used[key] = now
+            fresh = self.checked_at is not None and (
+                now - self.checked_at < VERSION_CHECK_INTERVAL
+            )
+            if fresh:
+                keys = [key for key in defaults if key not in self.values]
+            else:
+                keys = [
+                    key for key, used in self.used.items()
+                    if now - used < VERSION_SNAPSHOT_KEEP
+                ]
+        values = fetch_values(keys, defaults) if keys else {}
+        with self.lock:
+            if not fresh:
+                self.checked_at = now
+                self.used = {
+                    key: self.used[key] for key in keys if key in self.used
+                }
+                self.values = {
+                    key: value for key, value in self.values.items()
+                    if key in self.used
+                }
+            self.values.update(values)
+            return tuple(
+                values[key] if key in values else self.values.get(key)
+                for key in defaults
+            )
+
+    def set(self, key, value):
+        """Запоминает значение, изменённое в этом процессе."""
+        with self.lock:
+            self.values[key] = value
+
+    def clear(self):
+        """Забывает все значения: следующее чтение идёт в общий кэш."""
+        with self.lock:
+            self.values.clear()
+            self.used.clear()
+            self.checked_at = None
+
+
+snapshot = VersionSnapshot()
+
+
+def fetch_values(keys, defaults):
+    """Значения ключей из общего кэша одним get_many.
+
+    Отсутствующие ключи с функцией по умолчанию инициализируются ею.
+    """
+    cache = get_cache()
+    values = cache.get_many(keys)
+    missing = [
+        key for key in keys
+        if key not in values and defaults.get(key) is not None
+    ]
+    for key in missing:
+        cache.add(key, defaults[key](), timeout=None)
+    if missing:
+        values.update(cache.get_many(missing))
+    for key in keys:
+        values.setdefault(key, None)
+    return values
+
+
+def get_table_state(*models):
+    """Версии таблиц моделей и время последней записи в них.
+
+    Отсутствующая версия инициализируется текущим временем, поэтому после
+    вытеснения из кэша она не совпадает ни с одной из прежних.
+    """
+    defaults = dict.fromkeys(
+        (version_key(model) for model in models), time.time_ns
+    )
+    defaults.update(dict.fromkeys(
+        (modified_key(model) for model in models), now_seconds
+    ))
+    values = snapshot.get(defaults)
+    return values[:len(models)], max(values[len(models):])
+
+
+def get_versions(*models):
+    """Возвращает текущие версии таблиц моделей."""
+    return snapshot.get(dict.fromkeys(
+        (version_key(model) for model in models), time.time_ns
+    ))
+
+
+def get_row_version(model, pk):
+    """Текущая версия строки модели или None, пока строка не менялась."""
+    return snapshot.get({row_version_key(model, pk): None})[0]
+
+
+def get_last_modified(*models):
+    """Время последней записи в таблицы моделей (Unix time, секунды)."""
+    return get_table_state(*models)[1]
+
+
+def increment(key):
+    """Увеличивает версию по ключу и возвращает новое значение."""
+    cache = get_cache()
+    if isinstance(cache, ATOMIC_INCR_CACHES):
+        value = increment_value(cache, key)
+    else:
+        lock = LOCK_KEY.format(key)
+        deadline = time.monotonic() + VERSION_LOCK_TIMEOUT
+        while not cache.add(lock, True, timeout=VERSION_LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            value = increment_value(cache, key)
+        finally:
+            cache.delete(lock)
+    snapshot.set(key, value)
+    return value
+
+
+def increment_value(cache, key):
+    """incr значения; отсутствующее задаётся текущим временем."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        value = time.time_ns()
+        cache.add(key, value, timeout=None)
+        return cache.get(key, value)
+
+
+def bump_version(model):
+    """Увеличивает версию таблицы модели."""
+    increment(version_key(model))
+    key = modified_key(model)
+    modified = now_seconds()
+    get_cache().set(key, modified, timeout=None)
+    snapshot.set(key, modified)
+
+
+def bump_row_version_on_commit(model, pk):
+    """Увеличивает версию строки модели после коммита транзакции."""
+    transaction.on_commit(lambda: increment(row_version_key(model, pk)))
+
+
+def bump_version_on_commit(model):
+    """Увеличивает версию таблицы после коммита текущей транзакции.
+
+    Версия, изменённая до коммита, позволила бы другому процессу
+    закэшировать ещё не изменённые данные под новой версией.
+    """
+    transaction.on_commit(lambda: bump_version(model))
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,25 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    from api.authentication import user_cache
+    from api.instrumentation import registry
+    from api.metrics import collector
+    from api.throttling import clear_stores
+    from reviews.versions import snapshot
+    cache.clear()
+    snapshot.clear()
+    user_cache.clear()
+    clear_stores()
+    registry.clear()
+    collector.clear()
+
+
+@pytest.fixture(autouse=True)
+def sync_outbox(settings):
+    settings.EMAIL_OUTBOX_MODE = 'sync'
@@ -0,0 +1,95 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+from reviews.versions import snapshot
+
+
+@pytest.mark.django_db(transaction=True)
+class Test04TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    TITLES_COUNT = 15
+    # Оценка по статистике БД + COUNT(*) + выборка произведений
+    # с категорией + prefetch жанров.
+    LIST_QUERIES = 4
+    # Выборка произведения с категорией + prefetch жанров.
+    DETAIL_QUERIES = 2
+
+    def create_titles(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name='Ужасы', slug='horror'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        ]
+        titles = []
+        for idx in range(self.TITLES_COUNT):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000 + idx, category=category
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+
+    def warm_up(self, client, url):
+        # Первый запрос процесса читает версии таблиц из общего кэша;
+        # дальше они берутся из снимка версий процесса.
+        client.get(url)
+        cache.clear()
+
+    def test_01_titles_list_queries(self, client):
+        self.create_titles()
+        self.warm_up(client, self.TITLES_URL)
+        for limit in (1, 5, self.TITLES_COUNT):
+            # Сбрасываем закэшированный COUNT(*) предыдущего запроса.
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(self.TITLES_URL, {'limit': limit})
+            assert len(response.json()['results']) == limit
+            assert len(queries) == self.LIST_QUERIES, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}` выполняет '
+                f'{self.LIST_QUERIES} запроса к БД независимо от размера '
+                f'страницы. Сейчас при limit={limit} выполнено '
+                f'{len(queries)}.'
+            )
+
+    def test_02_title_detail_queries(self, client):
+        titles = self.create_titles()
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0].id)
+        self.warm_up(client, url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert len(response.json()['genre']) == 2
+        assert len(queries) == self.DETAIL_QUERIES, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE}` '
+            f'выполняет {self.DETAIL_QUERIES} запроса к БД. Сейчас '
+            f'выполнено {len(queries)}.'
+        )
+
+    def test_03_versions_read_once(self, client):
+        self.create_titles()
+        self.warm_up(client, self.TITLES_URL)
+        snapshot.clear()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(self.TITLES_URL)
+        version_queries = [
+            query for query in queries
+            if 'reviews_versioncounter' in query['sql']
+        ]
+        assert len(version_queries) == 1, (
+            'Проверьте, что версии таблиц для ETag и ключа количества '
+            'читаются из общего кэша одним запросом.'
+        )
+        assert len(queries) == self.LIST_QUERIES + 1
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(self.TITLES_URL)
+        assert not any(
+            'reviews_versioncounter' in query['sql'] for query in queries
+        ), (
+            'Проверьте, что версии таблиц берутся из снимка процесса, пока '
+            'не истёк VERSION_CHECK_INTERVAL.'
+        )
@@ -0,0 +1,52 @@
+import pytest
+
+from reviews.models import Category, Review, Title, TitleRanking
+
+
+@pytest.mark.django_db(transaction=True)
+class Test04TitleRating:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    USER_URL_TEMPLATE = '/api/v1/users/{username}/'
+
+    @pytest.fixture
+    def title(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return Title.objects.create(name='Фильм', year=2000, category=category)
+
+    def test_01_delete_reviewer(self, client, title, user, user_client,
+                                moderator_client, admin_client):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk)
+        for review_client, score in ((user_client, 3), (moderator_client, 9)):
+            response = review_client.post(
+                url, data={'text': 'Отзыв', 'score': score}
+            )
+            assert response.status_code == 201
+        response = admin_client.delete(
+            self.USER_URL_TEMPLATE.format(username=user.username)
+        )
+        assert response.status_code == 204
+        assert Review.objects.filter(title=title).count() == 1
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (9, 1), (
+            'Проверьте, что после удаления пользователя его оценки '
+            'исключаются из рейтинга произведения.'
+        )
+        assert (title.score_3, title.score_9) == (0, 1)
+        ranking = TitleRanking.objects.get(title=title, scope=TitleRanking.ALL)
+        assert ranking.review_count == 1 and ranking.rating == 9
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['rating'] == 9
+
+    def test_02_delete_last_reviewer(self, title, user, user_client):
+        response = user_client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk),
+            data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        user.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.score_7) == (
+            0, 0, 0
+        )
+        assert not TitleRanking.objects.filter(title=title).exists()
@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import cache
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test05ReviewQueries:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+    # COUNT(*) + выборка страницы с авторами, без запроса родителя.
+    LIST_QUERIES = 2
+    # COUNT(*) пустой страницы + запрос родителя для ответа 404.
+    MISSING_PARENT_QUERIES = 2
+
+    @pytest.fixture
+    def review(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=user, text='Комментарий')
+        return review
+
+    def warm_up(self, client, urls):
+        # Первый запрос процесса читает версии таблиц из общего кэша;
+        # дальше они берутся из снимка версий процесса.
+        for url in urls:
+            client.get(url)
+        cache.clear()
+
+    def test_01_list_without_parent_query(self, client, review,
+                                          django_assert_num_queries):
+        urls = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=review.title_id, review_id=review.pk
+            ),
+        )
+        self.warm_up(client, urls)
+        for url in urls:
+            with django_assert_num_queries(self.LIST_QUERIES):
+                response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.json()['results']) == 1, (
+                f'Проверьте, что `{url}` не запрашивает родительский объект, '
+                'если страница не пуста.'
+            )
+
+    def test_02_missing_parent(self, client, review,
+                               django_assert_num_queries):
+        urls = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id + 1),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=review.title_id, review_id=review.pk + 1
+            ),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=review.title_id + 1, review_id=review.pk
+            ),
+        )
+        self.warm_up(client, urls)
+        for url in urls:
+            with django_assert_num_queries(self.MISSING_PARENT_QUERIES):
+                response = client.get(url)
+            assert response.status_code == 404, (
+                f'Проверьте, что `{url}` возвращает 404 для '
+                'несуществующего родителя.'
+            )
@@ -0,0 +1,101 @@
+import json
+from base64 import b64encode
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08KeysetPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def crawl(self, client, url, limit):
+        pages = []
+        response = client.get(url, {'cursor': '', 'limit': limit})
+        while True:
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                f'Проверьте, что в keyset-режиме `{url}` не считает '
+                'общее количество записей.'
+            )
+            pages.append(data)
+            if not data['next']:
+                return pages
+            response = client.get(data['next'])
+
+    def test_01_titles_keyset(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        for idx in range(7):
+            Title.objects.create(
+                name=f'Произведение {idx % 3}', year=2000 + idx % 2,
+                category=category
+            )
+        expected = list(
+            Title.objects.order_by('year', 'name', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        pages = self.crawl(client, self.TITLES_URL, 3)
+        ids = [title['id'] for page in pages for title in page['results']]
+        assert ids == expected, (
+            f'Проверьте, что keyset-пагинация `{self.TITLES_URL}` обходит '
+            'все произведения в порядке (year, name, id) без повторов.'
+        )
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results'], (
+            'Проверьте, что ссылка `previous` keyset-пагинации ведёт на '
+            'предыдущую страницу.'
+        )
+
+    def test_02_reviews_keyset(self, client, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for idx in range(5):
+            author = django_user_model.objects.create_user(
+                username=f'user{idx}', email=f'user{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=5
+            )
+        expected = list(
+            Review.objects.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        pages = self.crawl(client, url, 2)
+        ids = [review['id'] for page in pages for review in page['results']]
+        assert ids == expected, (
+            f'Проверьте, что keyset-пагинация `{url}` обходит все отзывы в '
+            'порядке (-pub_date, id) без повторов.'
+        )
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get(self.TITLES_URL, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.parametrize('position', (
+        ['abc', 'x', 1], [{}, 1, 2], [2000, 'x', None], [[1], 'x', 1],
+    ))
+    def test_04_tampered_titles_cursor(self, client, position):
+        cursor = b64encode(json.dumps({'p': position}).encode()).decode()
+        response = client.get(self.TITLES_URL, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что `{self.TITLES_URL}` возвращает 404, если '
+            'значения курсора не подходят к полям сортировки.'
+        )
+
+    def test_05_tampered_reviews_cursor(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        for position in (['не дата', 1], ['2024-01-01T00:00:00', 'x']):
+            cursor = b64encode(json.dumps({'p': position}).encode()).decode()
+            response = client.get(url, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что `{url}` возвращает 404, если значения '
+                'курсора не подходят к полям сортировки.'
+            )
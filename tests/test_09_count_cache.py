@@ -0,0 +1,117 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.pagination import estimate_count
+from api_yamdb.settings import CACHES
+from reviews.cache import DatabaseVersionCache
+from reviews.models import Title, VersionCounter
+from reviews.ratings import rebuild_ratings
+from reviews.versions import bump_version, get_cache, get_versions, snapshot
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CountCache:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def count_queries(self, queries):
+        return sum('COUNT(' in query['sql'] for query in queries)
+
+    def test_01_count_cached_and_invalidated(self, client):
+        Title.objects.create(name='Произведение', year=2000)
+        client.get(self.TITLES_URL)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.TITLES_URL, {'offset': 0})
+        assert response.json()['count'] == 1
+        assert self.count_queries(queries) == 0, (
+            f'Проверьте, что количество для `{self.TITLES_URL}` берётся из '
+            'кэша при повторном запросе с тем же набором фильтров.'
+        )
+        Title.objects.create(name='Другое произведение', year=2001)
+        response = client.get(self.TITLES_URL)
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что кэш количества для `{self.TITLES_URL}` '
+            'сбрасывается при записи в таблицу.'
+        )
+        response = client.get(self.TITLES_URL, {'year': 2001})
+        assert response.json()['count'] == 1
+
+    def test_02_approximate_count(self, client, monkeypatch):
+        Title.objects.create(name='Произведение', year=2000)
+        monkeypatch.setattr(
+            'api.pagination.estimate_count', lambda queryset: 10 ** 6
+        )
+        data = client.get(self.TITLES_URL).json()
+        assert data['count'] == 10 ** 6
+        assert data['count_approximate'] is True, (
+            'Проверьте, что ответ сообщает о приблизительном количестве.'
+        )
+
+    def test_03_version_bumped_after_commit(self):
+        before = get_versions(Title)
+        with transaction.atomic():
+            Title.objects.create(name='Произведение', year=2000)
+            assert get_versions(Title) == before, (
+                'Проверьте, что версия таблицы не меняется до коммита '
+                'транзакции: иначе другой процесс закэширует старые данные '
+                'под новой версией.'
+            )
+        assert get_versions(Title) != before, (
+            'Проверьте, что версия таблицы меняется после коммита.'
+        )
+
+    def test_04_versions_shared_and_bumped_by_rebuild(self):
+        assert CACHES['versions']['BACKEND'].rsplit('.', 1)[-1] in (
+            'PyMemcacheCache', 'DatabaseVersionCache'
+        ), (
+            'Проверьте, что версии таблиц хранятся в кэше, общем для '
+            'процессов и серверов.'
+        )
+        Title.objects.create(name='Произведение', year=2000)
+        before = get_versions(Title)
+        rebuild_ratings()
+        assert get_versions(Title) != before, (
+            'Проверьте, что пересчёт рейтингов меняет версию таблицы '
+            'произведений.'
+        )
+
+    def test_05_database_versions(self):
+        assert isinstance(get_cache(), DatabaseVersionCache), (
+            'Проверьте, что без VERSION_CACHE_LOCATION версии хранятся в '
+            'таблице, которую создаёт migrate.'
+        )
+        before, = get_versions(Title)
+        for _ in range(3):
+            bump_version(Title)
+        snapshot.clear()
+        assert get_versions(Title) == (before + 3,), (
+            'Проверьте, что каждая запись увеличивает версию таблицы в БД.'
+        )
+        assert not VersionCounter.objects.filter(
+            key__endswith=':lock'
+        ).exists(), (
+            'Проверьте, что версия в БД увеличивается атомарно, без '
+            'блокировки.'
+        )
+
+    def test_06_sqlite_estimate(self):
+        for year in range(3):
+            Title.objects.create(name='Произведение', year=2000 + year)
+        assert estimate_count(Title.objects.all()) is None, (
+            'Проверьте, что без статистики SQLite оценка не выдаётся.'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        try:
+            assert estimate_count(Title.objects.all()) == 3, (
+                'Проверьте, что на SQLite размер таблицы оценивается по '
+                '`sqlite_stat1`.'
+            )
+            assert estimate_count(Title.objects.filter(year=2000)) is None, (
+                'Проверьте, что запрос с фильтрами на SQLite не оценивается '
+                'размером всей таблицы.'
+            )
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM sqlite_stat1')
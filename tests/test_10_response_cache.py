@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+    GENRES_URL = '/api/v1/genres/'
+
+    def test_01_anonymous_get_cached(self, client):
+        Genre.objects.create(name='Ужасы', slug='horror')
+        client.get(self.GENRES_URL)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.GENRES_URL)
+        assert response.json()['count'] == 1
+        assert len(queries) == 0, (
+            f'Проверьте, что повторный анонимный GET-запрос к '
+            f'`{self.GENRES_URL}` отдаётся из кэша без запросов к БД.'
+        )
+        client.get(self.GENRES_URL, {'search': 'Ужасы'})
+        Genre.objects.create(name='Комедия', slug='comedy')
+        response = client.get(self.GENRES_URL)
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что кэш `{self.GENRES_URL}` сбрасывается при '
+            'создании жанра.'
+        )
+
+    def test_02_review_write_invalidates_title(self, client, user_client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'{self.TITLES_URL}{title.id}/'
+        assert client.get(url).json()['rating'] is None
+        user_client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id),
+            data={'text': 'Текст', 'score': 7}
+        )
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что кэш произведения сбрасывается при создании '
+            'отзыва.'
+        )
+
+    def test_03_conditional_get(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for url in (
+            self.TITLES_URL,
+            f'{self.TITLES_URL}{title.id}/',
+            self.GENRES_URL,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id),
+        ):
+            response = client.get(url)
+            etag = response['ETag']
+            assert response.has_header('Last-Modified')
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+            assert len(queries) == 0
+        etag = client.get(self.TITLES_URL)['ETag']
+        Title.objects.create(name='Другое произведение', year=2001)
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_04_deleted_parent_changes_etag(self, client, user_client):
+        titles = [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(2)
+        ]
+        review_id = user_client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[1].id),
+            data={'text': 'Текст', 'score': 7}
+        ).json()['id']
+        for url, parent in (
+            (self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0].id),
+             titles[0]),
+            (self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[1].id, review_id=review_id
+            ), Review.objects.get(pk=review_id)),
+        ):
+            etag = client.get(url)['ETag']
+            parent.delete()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 404, (
+                f'Проверьте, что удаление родительского объекта меняет '
+                f'ETag `{url}`.'
+            )
@@ -0,0 +1,169 @@
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import transaction
+
+from config import OUTBOX_BATCH_SIZE
+from reviews import outbox
+from reviews.models import EmailOutbox
+from reviews.outbox import claim, drain_outbox, enqueue_email, queue_depth
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    VALID_DATA = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+
+    def test_01_signup_enqueues_email(self, client, settings):
+        settings.EMAIL_OUTBOX_MODE = 'worker'
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'В режиме `worker` регистрация не должна отправлять письмо '
+            'синхронно.'
+        )
+        assert queue_depth() == 1
+        assert drain_outbox() == 1
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert self.VALID_DATA['email'] in mail.outbox[-1].to
+        assert queue_depth() == 0
+
+    def test_02_failed_email_retried_later(self, client, settings,
+                                           monkeypatch):
+        settings.EMAIL_OUTBOX_MODE = 'worker'
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+
+        def fail(*args, **kwargs):
+            raise SMTPException('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        assert drain_outbox() == 1
+        email = EmailOutbox.objects.get()
+        assert email.attempts == 1
+        assert email.sent_at is None
+        assert email.next_attempt_at > email.created_at
+        assert drain_outbox() == 0, (
+            'Письмо с ошибкой отправки должно откладываться до следующей '
+            'попытки.'
+        )
+        assert queue_depth() == 1
+
+    def test_03_smtp_outside_transaction(self, client, settings,
+                                         monkeypatch):
+        settings.EMAIL_OUTBOX_MODE = 'worker'
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        in_transaction = []
+        send_messages = EmailBackend.send_messages
+
+        def record(backend, messages):
+            in_transaction.append(transaction.get_connection().in_atomic_block)
+            return send_messages(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', record)
+        assert drain_outbox() == 1
+        assert in_transaction == [False], (
+            'Проверьте, что письма отправляются вне транзакции, которая '
+            'блокирует строки очереди.'
+        )
+        assert EmailOutbox.objects.get().sent_at is not None
+
+    def test_04_claimed_email_skipped(self, client, settings):
+        settings.EMAIL_OUTBOX_MODE = 'worker'
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        assert len(claim(OUTBOX_BATCH_SIZE)) == 1
+        assert drain_outbox() == 0, (
+            'Проверьте, что забранное другим отправителем письмо не '
+            'отправляется повторно до истечения аренды.'
+        )
+
+    def test_05_unexpected_error_keeps_batch(self, settings, monkeypatch):
+        settings.EMAIL_OUTBOX_MODE = 'worker'
+        for recipient in ('first@yamdb.fake', 'bad@yamdb.fake',
+                          'last@yamdb.fake'):
+            enqueue_email('Тема', 'Текст', 'from@yamdb.fake', recipient)
+        send_messages = EmailBackend.send_messages
+        closed = []
+
+        def send(backend, messages):
+            if 'bad@yamdb.fake' in messages[0].to:
+                raise ValueError('Некорректный заголовок')
+            return send_messages(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send)
+        monkeypatch.setattr(
+            EmailBackend, 'close', lambda backend: closed.append(True)
+        )
+        outbox_before_count = len(mail.outbox)
+        with pytest.raises(ValueError):
+            drain_outbox()
+        assert closed, 'Проверьте, что соединение закрывается при ошибке.'
+        emails = {
+            email.recipient: email for email in EmailOutbox.objects.all()
+        }
+        assert emails['first@yamdb.fake'].sent_at is not None, (
+            'Проверьте, что результат пакета сохраняется при ошибке.'
+        )
+        bad = emails['bad@yamdb.fake']
+        assert bad.attempts == 1 and 'заголовок' in bad.last_error
+        assert emails['last@yamdb.fake'].attempts == 0
+        assert drain_outbox() == 1
+        assert [
+            message.to[0] for message in mail.outbox[outbox_before_count:]
+        ] == ['first@yamdb.fake', 'last@yamdb.fake']
+
+    def test_06_thread_mode_queue_bounded(self, settings, monkeypatch):
+        del settings.EMAIL_OUTBOX_MODE
+        tasks = []
+        monkeypatch.setattr(
+            outbox.executor, 'submit', lambda task: tasks.append(task)
+        )
+        for number in range(3):
+            with transaction.atomic():
+                enqueue_email(
+                    'Тема', 'Текст', 'from@yamdb.fake',
+                    f'user{number}@yamdb.fake'
+                )
+        assert len(tasks) == 1, (
+            'Проверьте, что по умолчанию используется режим `thread` и в '
+            'пуле ждёт не больше одной задачи отправки.'
+        )
+        outbox_before_count = len(mail.outbox)
+        tasks.pop()()
+        assert len(mail.outbox) == outbox_before_count + 3
+        enqueue_email('Тема', 'Текст', 'from@yamdb.fake', 'new@yamdb.fake')
+        assert len(tasks) == 1
+        tasks.pop()()
+
+    def test_07_thread_mode_retries_deferred(self, settings, monkeypatch):
+        del settings.EMAIL_OUTBOX_MODE
+        tasks, retries = [], []
+        monkeypatch.setattr(
+            outbox.executor, 'submit', lambda task: tasks.append(task)
+        )
+        monkeypatch.setattr(
+            outbox.retry_timer, 'schedule', lambda at: retries.append(at)
+        )
+        send_messages = EmailBackend.send_messages
+
+        def fail(*args, **kwargs):
+            raise SMTPException('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        enqueue_email('Тема', 'Текст', 'from@yamdb.fake', 'user@yamdb.fake')
+        tasks.pop()()
+        email = EmailOutbox.objects.get()
+        assert retries == [email.next_attempt_at], (
+            'Проверьте, что в режиме `thread` отложенное письмо получает '
+            'таймер на следующую попытку без новых регистраций.'
+        )
+        monkeypatch.setattr(EmailBackend, 'send_messages', send_messages)
+        EmailOutbox.objects.update(next_attempt_at=email.created_at)
+        outbox_before_count = len(mail.outbox)
+        outbox.schedule_drain()
+        tasks.pop()()
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert retries == [email.next_attempt_at]
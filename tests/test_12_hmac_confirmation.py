@@ -0,0 +1,43 @@
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12HmacConfirmation:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+    VALID_DATA = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+
+    def signup(self, client):
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        return mail.outbox[-1].body.split(': ')[-1]
+
+    def test_01_code_not_stored(self, client, settings, django_user_model):
+        settings.CONFIRMATION_CODE_MODE = 'hmac'
+        self.signup(client)
+        user = django_user_model.objects.get(username='valid_username')
+        assert not user.confirmation_code, (
+            'В режиме `hmac` код подтверждения не должен сохраняться в БД.'
+        )
+
+    def test_02_code_is_one_shot(self, client, settings):
+        settings.CONFIRMATION_CODE_MODE = 'hmac'
+        code = self.signup(client)
+        data = {'username': 'valid_username', 'confirmation_code': 'wrong'}
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == 400
+        assert all(
+            query['sql'].startswith('SELECT') for query in queries
+        ), 'Неверный HMAC-код не должен приводить к записи в БД.'
+        data['confirmation_code'] = code
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == 200
+        assert 'token' in response.json()
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == 400, (
+            'HMAC-код подтверждения должен быть одноразовым.'
+        )
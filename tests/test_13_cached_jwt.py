@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import access_token_for_user
+from reviews.versions import get_cache, increment_value, row_version_key
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13CachedJwt:
+
+    URL_ME = '/api/v1/users/me/'
+    URL_USER_TEMPLATE = '/api/v1/users/{username}/'
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for_user(user)}'
+        )
+        return client
+
+    def test_01_user_cached(self, user):
+        client = self.client_for(user)
+        assert client.get(self.URL_ME).status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.URL_ME)
+        assert response.status_code == 200
+        assert not any(
+            'FROM "reviews_user"' in query['sql']
+            or 'FROM "reviews_versioncounter"' in query['sql']
+            for query in queries
+        ), (
+            'Проверьте, что повторный запрос с тем же токеном не читает '
+            'из БД ни пользователя, ни его версию.'
+        )
+
+    def test_02_role_change_applies_to_old_token(self, admin, user):
+        user_client = self.client_for(user)
+        assert user_client.get(self.URL_ME).json()['role'] == 'user'
+        response = self.client_for(admin).patch(
+            self.URL_USER_TEMPLATE.format(username=user.username),
+            data={'role': 'moderator'}
+        )
+        assert response.status_code == 200
+        response = user_client.get(self.URL_ME)
+        assert response.status_code == 200, (
+            'Смена роли не должна разлогинивать пользователя.'
+        )
+        assert response.json()['role'] == 'moderator', (
+            'Проверьте, что после смены роли кэш пользователя сбрасывается.'
+        )
+
+    def test_03_changed_in_other_process(self, user, django_user_model,
+                                         monkeypatch):
+        user_client = self.client_for(user)
+        assert user_client.get(self.URL_ME).status_code == 200
+        # Другой процесс меняет строку и её версию в общем кэше, минуя
+        # сигналы и снимок версий этого процесса.
+        django_user_model.objects.filter(pk=user.pk).update(role='moderator')
+        increment_value(get_cache(), row_version_key(django_user_model, user.pk))
+        assert user_client.get(self.URL_ME).json()['role'] == 'user', (
+            'Проверьте, что до сверки снимка версий пользователь берётся '
+            'из кэша процесса.'
+        )
+        monkeypatch.setattr('reviews.versions.VERSION_CHECK_INTERVAL', 0)
+        assert user_client.get(self.URL_ME).json()['role'] == 'moderator', (
+            'Пользователь должен сбрасываться из кэша по версии в общем '
+            'кэше версий, а не только в процессе, изменившем его.'
+        )
+        django_user_model.objects.get(pk=user.pk).delete()
+        assert user_client.get(self.URL_ME).status_code == 401
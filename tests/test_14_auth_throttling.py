@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14AuthThrottling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+    RATES = {
+        'signup_ip': '3/hour',
+        'signup_username': '2/hour',
+        'token_ip': '100/hour',
+        'token_username': '2/hour',
+    }
+
+    @pytest.fixture(autouse=True)
+    def rates(self, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': self.RATES,
+        }
+
+    def test_01_signup_ip_limit(self, client):
+        for idx in range(3):
+            response = client.post(self.URL_SIGNUP, data={
+                'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'
+            })
+            assert response.status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.URL_SIGNUP, data={
+                'email': 'user3@yamdb.fake', 'username': 'user3'
+            })
+        assert response.status_code == 429, (
+            'Проверьте, что число регистраций с одного IP ограничено.'
+        )
+        assert 'Retry-After' in response
+        assert not queries, 'Отказ 429 не должен обращаться к БД.'
+
+    def test_02_token_username_limit(self, client):
+        data = {'username': 'victim', 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            assert client.post(self.URL_TOKEN, data=data).status_code != 429
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == 429, (
+            'Проверьте, что подбор кода для одного username ограничен.'
+        )
+        data['username'] = 'another'
+        assert client.post(self.URL_TOKEN, data=data).status_code != 429, (
+            'Лимит по username не должен влиять на других пользователей.'
+        )
+
+    def test_03_forwarded_for_ignored(self, client):
+        for idx in range(4):
+            response = client.post(self.URL_SIGNUP, data={
+                'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'
+            }, HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}')
+        assert response.status_code == 429, (
+            'Проверьте, что подменённый заголовок X-Forwarded-For не '
+            'сбрасывает лимит по IP.'
+        )
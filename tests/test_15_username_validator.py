@@ -0,0 +1,23 @@
+import pytest
+from django.core.exceptions import ValidationError
+
+from reviews.validators import validate_username_via_regex
+
+
+class Test15UsernameValidator:
+
+    @pytest.mark.parametrize('username', (
+        'user', 'user.name@mail+tag-1', 'юзер_2', ''
+    ))
+    def test_01_valid_username(self, username):
+        assert validate_username_via_regex(username) == username
+
+    def test_02_invalid_characters_reported(self):
+        with pytest.raises(ValidationError) as error:
+            validate_username_via_regex('bad name!!')
+        assert error.value.messages == [
+            'В username найдены недопустимые символы  !'
+        ], (
+            'Проверьте, что сообщение перечисляет недопустимые символы '
+            'без повторов в порядке их появления.'
+        )
@@ -0,0 +1,145 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.bulk import BulkReviewCreator
+from api.serializers import REVIEW_EXISTS
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16BulkCreate:
+
+    URL_REVIEWS = '/api/v1/bulk/reviews/'
+    URL_COMMENTS = '/api/v1/bulk/comments/'
+    URL_TITLE_TEMPLATE = '/api/v1/titles/{title_id}/'
+    # Проверки пакета, вставка, пересчёт рейтингов, лидербордов,
+    # поискового индекса и версий таблиц — постоянное число запросов.
+    MAX_QUERIES = 30
+
+    def create_titles(self, count):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return [
+            Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            for idx in range(count)
+        ]
+
+    def test_01_only_admin(self, user_client, moderator_client):
+        for client in (user_client, moderator_client):
+            response = client.post(self.URL_REVIEWS, data=[], format='json')
+            assert response.status_code == 403, (
+                'Пакетное создание доступно только администратору.'
+            )
+
+    def test_02_bulk_reviews(self, admin_client, admin, user):
+        titles = self.create_titles(20)
+        Review.objects.create(
+            title=titles[0], author=admin, text='Отзыв', score=1
+        )
+        items = [
+            {'title': title.pk, 'text': 'Текст', 'score': 5}
+            for title in titles
+        ] + [
+            {'title': titles[1].pk, 'text': 'Текст', 'score': 9,
+             'author': user.username},
+            {'title': titles[1].pk, 'text': 'Повтор', 'score': 9,
+             'author': user.username},
+            {'title': 0, 'text': 'Текст', 'score': 5},
+            {'title': titles[2].pk, 'text': 'Текст', 'score': 11},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(
+                self.URL_REVIEWS, data=items, format='json'
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data['created'] == 20
+        results = data['results']
+        assert len(results) == len(items)
+        assert 'errors' in results[0], 'Повторный отзыв должен отклоняться.'
+        assert all(result['id'] for result in results[1:21])
+        assert [
+            'errors' in result for result in results[21:]
+        ] == [True, True, True]
+        assert len(queries) <= self.MAX_QUERIES, (
+            'Проверьте, что число запросов к БД не зависит от размера пакета.'
+        )
+        response = admin_client.get(
+            self.URL_TITLE_TEMPLATE.format(title_id=titles[1].pk)
+        )
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что рейтинг пересчитывается после пакетной записи.'
+        )
+
+    def test_03_bulk_comments(self, admin_client, admin):
+        title = self.create_titles(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=1
+        )
+        items = [{'review': review.pk, 'text': f'Комментарий {idx}'}
+                 for idx in range(5)] + [{'review': 0, 'text': 'Нет отзыва'}]
+        response = admin_client.post(
+            self.URL_COMMENTS, data=items, format='json'
+        )
+        assert response.status_code == 200
+        assert response.json()['created'] == 5
+        assert Comment.objects.filter(review=review).count() == 5
+
+    def test_04_bulk_requires_list(self, admin_client):
+        response = admin_client.post(
+            self.URL_REVIEWS, data={'title': 1}, format='json'
+        )
+        assert response.status_code == 400
+
+    def test_05_comment_ids(self, admin_client, admin):
+        title = self.create_titles(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=1
+        )
+        items = [{'review': review.pk, 'text': f'Комментарий {idx}'}
+                 for idx in range(3)]
+        response = admin_client.post(
+            self.URL_COMMENTS, data=items, format='json'
+        )
+        assert response.status_code == 200
+        ids = [result['id'] for result in response.json()['results']]
+        assert all(ids), 'Проверьте, что ответ содержит id комментариев.'
+        assert [
+            Comment.objects.get(pk=pk).text for pk in ids
+        ] == [item['text'] for item in items]
+
+    def test_06_concurrent_duplicate(self, admin_client, admin, user,
+                                     monkeypatch):
+        titles = self.create_titles(3)
+        Review.objects.create(
+            title=titles[1], author=admin, text='Отзыв', score=1
+        )
+        monkeypatch.setattr(
+            BulkReviewCreator, 'prepare',
+            lambda creator, valid, authors: setattr(creator, 'pairs', set())
+        )
+        items = [
+            {'title': title.pk, 'text': 'Текст', 'score': 5}
+            for title in titles
+        ]
+        response = admin_client.post(
+            self.URL_REVIEWS, data=items, format='json'
+        )
+        assert response.status_code == 200, (
+            'Конфликт одного элемента не должен отклонять весь пакет.'
+        )
+        data = response.json()
+        assert data['created'] == 2
+        results = data['results']
+        assert results[1]['errors'] == {
+            'non_field_errors': [REVIEW_EXISTS]
+        }
+        for position in (0, 2):
+            review = Review.objects.get(pk=results[position]['id'])
+            assert review.title_id == titles[position].pk
+        title = admin_client.get(
+            self.URL_TITLE_TEMPLATE.format(title_id=titles[0].pk)
+        ).json()
+        assert title['rating'] == 5
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+from django.db import (
+    IntegrityError, OperationalError, connection, connections
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ReviewUniqueness:
+
+    URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    CLIENTS = 8
+    # SQLite в памяти блокирует таблицы целиком: такие запросы повторяются,
+    # поэтому запрос, чья запись уже прошла, может получить 400 при повторе.
+    LOCK_RETRIES = 50
+
+    def create_title(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return Title.objects.create(name='Фильм', year=2000, category=category)
+
+    def test_01_no_exists_query(self, user_client):
+        title = self.create_title()
+        url = self.URL_TEMPLATE.format(title_id=title.pk)
+        data = {'text': 'Отзыв', 'score': 5}
+        assert user_client.post(url, data=data).status_code == 201
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(url, data=data)
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
+        sql = [query['sql'] for query in queries]
+        insert = next(
+            position for position, query in enumerate(sql)
+            if query.startswith('INSERT INTO "reviews_review"')
+        )
+        assert not any(
+            query.startswith('SELECT (1) AS "a" FROM "reviews_review"')
+            for query in sql[:insert]
+        ), 'Проверьте, что перед созданием отзыва нет запроса exists().'
+
+    def test_02_other_integrity_error(self, user_client, monkeypatch):
+        title = self.create_title()
+        url = self.URL_TEMPLATE.format(title_id=title.pk)
+
+        def review_created(review):
+            raise IntegrityError('rating')
+
+        monkeypatch.setattr('reviews.ratings.review_created', review_created)
+        with pytest.raises(IntegrityError):
+            user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert not Review.objects.filter(title=title).exists(), (
+            'Проверьте, что ошибка целостности, не связанная с повторным '
+            'отзывом, не превращается в ответ 400 и откатывает создание.'
+        )
+
+    def test_03_concurrent_reviews(self, token_user):
+        title = self.create_title()
+        url = self.URL_TEMPLATE.format(title_id=title.pk)
+        barrier = threading.Barrier(self.CLIENTS)
+        statuses = []
+
+        def post_review(score):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=(
+                f'Bearer {token_user["access"]}'
+            ))
+            barrier.wait()
+            try:
+                for _ in range(self.LOCK_RETRIES):
+                    try:
+                        response = client.post(url, data={
+                            'text': 'Отзыв', 'score': score
+                        })
+                    except OperationalError:
+                        connections.close_all()
+                        continue
+                    statuses.append(response.status_code)
+                    break
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=post_review, args=(idx + 1,))
+            for idx in range(self.CLIENTS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert Review.objects.filter(title=title).count() == 1, (
+            'Параллельные запросы не должны создавать повторные отзывы.'
+        )
+        assert len(statuses) == self.CLIENTS
+        assert set(statuses) <= {201, 400} and statuses.count(201) <= 1, (
+            f'Ожидался не больше чем один ответ 201 и остальные 400, '
+            f'получено {statuses}.'
+        )
+        title.refresh_from_db()
+        assert title.rating_count == 1
@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Review, Title
+from reviews.search import index_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @pytest.fixture(autouse=True)
+    def titles(self):
+        index_titles()
+        category = Category.objects.create(name='Книга', slug='books')
+        return {
+            name: Title.objects.create(
+                name=name, year=1900, category=category,
+                description=description
+            )
+            for name, description in (
+                ('Война и мир', 'Роман-эпопея о войне 1812 года'),
+                ('Мир приключений', 'Сборник рассказов'),
+                ('Анна Каренина', 'Роман о любви'),
+            )
+        }
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_ranked_search(self, client):
+        assert self.search(client, 'мир') == [
+            'Мир приключений', 'Война и мир'
+        ]
+        assert self.search(client, 'война') == ['Война и мир'], (
+            'Проверьте, что совпадение в названии важнее описания.'
+        )
+        assert self.search(client, 'роман') == [
+            'Анна Каренина', 'Война и мир'
+        ]
+        assert self.search(client, 'войн эпопея') == ['Война и мир'], (
+            'Проверьте поиск по префиксам нескольких слов.'
+        )
+        assert self.search(client, '"; DROP') == []
+
+    def test_02_index_follows_writes(self, client, admin_client, user,
+                                     titles):
+        title = titles['Анна Каренина']
+        response = admin_client.patch(
+            self.TITLE_URL_TEMPLATE.format(title_id=title.pk),
+            data={'name': 'Воскресение'}
+        )
+        assert response.status_code == 200
+        assert self.search(client, 'каренина') == []
+        assert self.search(client, 'воскресение') == ['Воскресение']
+        Review.objects.create(
+            title=title, author=user, text='Толстой велик', score=10
+        )
+        assert self.search(client, 'толстой') == ['Воскресение'], (
+            'Проверьте, что индекс включает тексты отзывов.'
+        )
+        title.delete()
+        assert self.search(client, 'толстой') == []
+
+    def test_03_search_queries(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            self.search(client, 'мир')
+        assert any('MATCH' in query['sql'] for query in queries), (
+            'Проверьте, что поиск использует полнотекстовый индекс.'
+        )
+
+    def test_04_review_appended(self, client, user, titles):
+        title = titles['Анна Каренина']
+        with CaptureQueriesContext(connection) as queries:
+            review = Review.objects.create(
+                title=title, author=user, text='Толстой велик', score=10
+            )
+        assert not any(
+            'group_concat' in query['sql'] for query in queries
+        ), (
+            'Проверьте, что новый отзыв дописывается в индекс без '
+            'пересборки документа произведения.'
+        )
+        assert self.search(client, 'толстой') == ['Анна Каренина']
+        assert self.search(client, 'роман') == [
+            'Анна Каренина', 'Война и мир'
+        ]
+        review.text = 'Чехов лучше'
+        review.save()
+        assert self.search(client, 'толстой') == [], (
+            'Проверьте, что правка отзыва переиндексирует произведение.'
+        )
+        assert self.search(client, 'чехов') == ['Анна Каренина']
+
+    def test_05_rolled_back_review(self, client, user, titles):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Review.objects.create(
+                    title=titles['Анна Каренина'], author=user,
+                    text='Толстой велик', score=10
+                )
+                raise RuntimeError
+        Title.objects.create(name='Воскресение', year=1899)
+        assert self.search(client, 'толстой') == [], (
+            'Проверьте, что отзыв из откаченной транзакции не попадает в '
+            'индекс.'
+        )
@@ -0,0 +1,131 @@
+import sys
+import threading
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.autocomplete import PrefixIndex, autocomplete
+from reviews.models import Category, Genre, Title
+from reviews.versions import snapshot
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Autocomplete:
+
+    URL = '/api/v1/autocomplete/'
+
+    @pytest.fixture(autouse=True)
+    def objects(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.create(name='Фэнтези', slug='fantasy')
+        Genre.objects.create(name='Драма', slug='drama')
+        for name in ('Война и мир', 'Мир приключений', 'Миротворец',
+                     'Фантастические твари'):
+            Title.objects.create(name=name, year=2000, category=category)
+
+    def complete(self, client, **params):
+        response = client.get(self.URL, params)
+        assert response.status_code == 200
+        return response.json()
+
+    def test_01_prefix_match(self, client):
+        data = self.complete(client, q='Ф')
+        assert [item['slug'] for item in data['genres']] == ['fantasy']
+        assert [item['slug'] for item in data['categories']] == ['films']
+        titles = self.complete(client, q='мир', type='titles')['titles']
+        assert [item['name'] for item in titles] == [
+            'Мир приключений', 'Миротворец', 'Война и мир'
+        ], (
+            'Совпадения с начала названия должны идти раньше совпадений '
+            'с начала слова.'
+        )
+        assert len(self.complete(client, q='мир', limit=1)['titles']) == 1
+
+    def test_02_index_follows_writes(self, client):
+        self.complete(client, q='д')
+        Genre.objects.create(name='Детектив', slug='detective')
+        Genre.objects.filter(slug='drama').delete()
+        genres = self.complete(client, q='д', type='genres')['genres']
+        assert [item['slug'] for item in genres] == ['detective']
+        Genre.objects.get(slug='detective').delete()
+        assert self.complete(client, q='д', type='genres')['genres'] == []
+        self.complete(client, q='д', type='genres')
+        with CaptureQueriesContext(connection) as queries:
+            self.complete(client, q='д', type='genres')
+        assert not queries, (
+            'Проверьте, что автодополнение не обращается к БД.'
+        )
+
+    def test_03_unknown_type(self, client):
+        response = client.get(self.URL, {'q': 'a', 'type': 'users'})
+        assert response.status_code == 400
+
+    @pytest.fixture
+    def frequent_switches(self):
+        # Частое переключение потоков, чтобы поиск попадал на середину
+        # изменения индекса.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        yield
+        sys.setswitchinterval(interval)
+
+    def test_04_concurrent_search(self, frequent_switches):
+        index = PrefixIndex(
+            (pk, f'Мир {pk}', {'id': pk}) for pk in range(200)
+        )
+        errors = []
+        done = threading.Event()
+
+        def write():
+            for step in range(2000):
+                pk = step % 200
+                index.remove(pk)
+                index.add(pk, f'Мир {pk}', {'id': pk})
+            done.set()
+
+        def read():
+            while not done.is_set():
+                try:
+                    index.search('мир', 50)
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        threads = [threading.Thread(target=write)] + [
+            threading.Thread(target=read) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, (
+            'Проверьте, что поиск не падает при одновременном изменении '
+            f'индекса: {errors[:1]}'
+        )
+
+    def test_05_warm_caches(self, client):
+        autocomplete.clear()
+        apps.get_app_config('reviews').warm_caches()
+        with CaptureQueriesContext(connection) as queries:
+            self.complete(client, q='мир')
+        assert not queries, (
+            'Проверьте, что warm_caches строит индексы всех типов.'
+        )
+
+    def test_06_versions_read_once(self, client):
+        self.complete(client, q='мир')
+        snapshot.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.complete(client, q='мир')
+        assert len(queries) == 1, (
+            'Проверьте, что версии таблиц всех типов читаются одним '
+            'запросом за поиск.'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.complete(client, q='мир')
+        assert not queries, (
+            'Проверьте, что до истечения VERSION_CHECK_INTERVAL версии '
+            'берутся из снимка процесса.'
+        )
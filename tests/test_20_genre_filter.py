@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title
+from reviews.ratings import rebuild_ratings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20GenreFilter:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def titles(self, user, admin):
+        category = Category.objects.create(name='Фильм', slug='films')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        titles = {}
+        for name, genres in (
+            ('Драмеди', (drama, comedy)),
+            ('Гамлет', (drama,)),
+            ('Маска', (comedy,)),
+        ):
+            title = Title.objects.create(
+                name=name, year=2000, category=category
+            )
+            title.genre.set(genres)
+            titles[name] = title
+        for author, score in ((user, 4), (admin, 8)):
+            Review.objects.create(
+                title=titles['Драмеди'], author=author, text='Отзыв',
+                score=score
+            )
+        rebuild_ratings()
+        return titles
+
+    def names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == 200
+        return sorted(
+            (title['name'], title['rating'])
+            for title in response.json()['results']
+        )
+
+    def test_01_any_and_all(self, client):
+        assert self.names(client, genre='drama,comedy') == [
+            ('Гамлет', None), ('Драмеди', 6), ('Маска', None)
+        ], (
+            'Проверьте, что фильтр по нескольким жанрам не дублирует '
+            'произведения и не искажает рейтинг.'
+        )
+        assert self.names(client, genre='drama,comedy', genre_match='all') == [
+            ('Драмеди', 6)
+        ]
+        assert self.names(client, genre='drama,unknown') == [
+            ('Гамлет', None), ('Драмеди', 6)
+        ]
+        assert self.names(
+            client, genre='drama,unknown', genre_match='all'
+        ) == []
+        assert self.names(client, category='films', genre='comedy') == [
+            ('Драмеди', 6), ('Маска', None)
+        ]
+        assert self.names(client, category='unknown') == []
+
+    def test_02_slugs_resolved_to_ids(self, client):
+        self.names(client, genre='comedy', category='films')
+        with CaptureQueriesContext(connection) as queries:
+            self.names(client, genre='drama', category='films')
+        sql = ' '.join(query['sql'] for query in queries)
+        assert 'EXISTS' in sql
+        assert '"reviews_genre"."slug" =' not in sql, (
+            'Проверьте, что slug жанра заранее превращается в id.'
+        )
+        assert '"reviews_category"."slug" =' not in sql, (
+            'Проверьте, что slug категории заранее превращается в id.'
+        )
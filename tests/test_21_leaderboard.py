@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title, TitleRanking
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Leaderboard:
+
+    URL = '/api/v1/leaderboard/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def titles(self):
+        films = Category.objects.create(name='Фильм', slug='films')
+        books = Category.objects.create(name='Книга', slug='books')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        titles = {}
+        for name, year, category in (
+            ('Один отзыв', 2000, films),
+            ('Много отзывов', 2000, books),
+            ('Без отзывов', 2001, films),
+        ):
+            titles[name] = Title.objects.create(
+                name=name, year=year, category=category
+            )
+            titles[name].genre.set([drama])
+        return titles
+
+    def post_review(self, client, title, score):
+        response = client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk),
+            data={'text': 'Отзыв', 'score': score}
+        )
+        assert response.status_code == 201
+
+    def names(self, client, **params):
+        response = client.get(self.URL, params)
+        assert response.status_code == 200
+        return [row['title']['name'] for row in response.json()]
+
+    def test_01_rankings(self, client, titles, user_client, admin_client,
+                         moderator_client):
+        self.post_review(user_client, titles['Один отзыв'], 10)
+        for review_client in (user_client, admin_client, moderator_client):
+            self.post_review(review_client, titles['Много отзывов'], 9)
+        assert self.names(client, order='rating') == [
+            'Один отзыв', 'Много отзывов'
+        ]
+        assert self.names(client) == ['Много отзывов', 'Один отзыв'], (
+            'Байесовская оценка должна учитывать число отзывов.'
+        )
+        assert self.names(client, order='reviews') == [
+            'Много отзывов', 'Один отзыв'
+        ]
+        assert self.names(client, genre='drama', limit=1) == [
+            'Много отзывов'
+        ]
+        assert self.names(client, category='films') == ['Один отзыв']
+        assert self.names(client, year=2001) == []
+        assert client.get(self.URL, {'genre': 'unknown'}).status_code == 404
+        row = client.get(self.URL).json()[0]
+        assert row['review_count'] == 3 and row['rating'] == 9
+
+    def test_02_rankings_follow_changes(self, client, titles, user_client,
+                                        admin_client):
+        title = titles['Без отзывов']
+        self.post_review(user_client, title, 7)
+        assert self.names(client, year=2001) == ['Без отзывов']
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.pk}/', data={'year': 1999}
+        )
+        assert response.status_code == 200
+        assert self.names(client, year=2001) == []
+        assert self.names(client, year=1999) == ['Без отзывов']
+        Genre.objects.get(slug='drama').delete()
+        assert not TitleRanking.objects.filter(
+            scope=TitleRanking.GENRE
+        ).exists()
+        review_id = title.reviews.get().pk
+        response = user_client.delete(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk)
+            + f'{review_id}/'
+        )
+        assert response.status_code == 204
+        assert self.names(client) == []
+
+    def test_03_read_queries(self, client, titles, user_client):
+        self.post_review(user_client, titles['Один отзыв'], 5)
+        with CaptureQueriesContext(connection) as queries:
+            self.names(client, limit=50)
+        assert len(queries) == 1, (
+            'Проверьте, что лидерборд читается одним запросом.'
+        )
+
+    def test_04_invalid_params(self, client, titles, user_client):
+        self.post_review(user_client, titles['Один отзыв'], 5)
+        assert client.get(self.URL, {'order': 'name'}).status_code == 400
+        response = client.get(self.URL, {'genre': 'drama', 'year': 2000})
+        assert response.status_code == 400, (
+            'Проверьте, что можно указать не больше одного разреза.'
+        )
+        assert client.get(self.URL, {'year': 'двухтысячный'}).status_code == (
+            404
+        )
+        assert self.names(client, limit='много') == ['Один отзыв']
+        assert self.names(client, limit=0) == ['Один отзыв']
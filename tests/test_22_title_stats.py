@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleStats:
+
+    STATS_URL_TEMPLATE = '/api/v1/titles/{title_id}/stats/'
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def title(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return Title.objects.create(name='Фильм', year=2000, category=category)
+
+    def stats(self, client, title):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                self.STATS_URL_TEMPLATE.format(title_id=title.pk)
+            )
+        assert response.status_code == 200
+        assert len(queries) == 1, (
+            'Проверьте, что статистика читается из счётчиков произведения.'
+        )
+        return response.json()
+
+    def test_01_stats_follow_reviews(self, client, title, user_client,
+                                     admin_client, moderator_client):
+        empty = self.stats(client, title)
+        assert empty['count'] == 0 and empty['median'] is None
+        assert set(empty['histogram'].values()) == {0}
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk)
+        for review_client, score in (
+            (user_client, 2), (admin_client, 9), (moderator_client, 10)
+        ):
+            response = review_client.post(
+                url, data={'text': 'Отзыв', 'score': score}
+            )
+            assert response.status_code == 201
+        stats = self.stats(client, title)
+        assert stats['count'] == 3
+        assert stats['median'] == 9
+        assert stats['mean'] == 7
+        assert stats['histogram']['2'] == 1
+        review_id = response.json()['id']
+        response = moderator_client.patch(
+            f'{url}{review_id}/', data={'score': 3}
+        )
+        assert response.status_code == 200
+        stats = self.stats(client, title)
+        assert stats['histogram']['10'] == 0
+        assert stats['histogram']['3'] == 1
+        assert stats['median'] == 3
+        moderator_client.delete(f'{url}{review_id}/')
+        stats = self.stats(client, title)
+        assert stats['count'] == 2
+        assert stats['median'] == 5.5
+
+    def test_02_embedded_stats(self, client, title):
+        url = self.TITLE_URL_TEMPLATE.format(title_id=title.pk)
+        assert 'stats' not in client.get(url).json()
+        response = client.get(url, {'stats': 'true'})
+        assert response.json()['stats']['count'] == 0
+        response = client.get('/api/v1/titles/', {'stats': 'true'})
+        assert 'stats' in response.json()['results'][0]
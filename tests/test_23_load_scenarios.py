@@ -0,0 +1,62 @@
+import pytest
+
+from benchmarks.scenarios import SCENARIOS, percentile, run
+from benchmarks.seed import parse_size, seed
+from reviews.models import Comment, Review, Title, User
+from reviews.search import search_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23LoadScenarios:
+
+    REQUESTS = 30
+
+    @pytest.fixture
+    def seeded(self):
+        seed(100)
+
+    def test_01_parse_size(self):
+        assert parse_size('10k') == 10_000
+        assert parse_size('1M') == 1_000_000
+        assert parse_size('10m') == 10_000_000
+        assert parse_size('250') == 250
+
+    def test_02_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([7], 0.95) == 7
+
+    @pytest.mark.parametrize('name', sorted(SCENARIOS))
+    def test_03_scenarios(self, seeded, name):
+        counts = (
+            Review.objects.count(), Comment.objects.count(),
+            User.objects.count()
+        )
+        ratings = sorted(Title.objects.values_list('pk', 'rating_count'))
+        report = run(SCENARIOS[name], self.REQUESTS)
+        assert len(report.durations) == self.REQUESTS
+        assert report.errors == 0, (
+            f'Проверьте, что запросы сценария {name} выполняются без '
+            f'ошибок: {report.statuses}'
+        )
+        assert report.throughput > 0
+        assert report.queries_per_request > 0
+        assert list(report.latency) == [0.5, 0.95, 0.99]
+        assert counts == (
+            Review.objects.count(), Comment.objects.count(),
+            User.objects.count()
+        ), 'Проверьте, что сценарий удаляет созданные объекты.'
+        assert ratings == sorted(
+            Title.objects.values_list('pk', 'rating_count')
+        ), 'Проверьте, что после сценария рейтинги пересчитаны.'
+
+    def test_04_seed_ready_for_writes(self, seeded):
+        assert len(search_titles('описание')) == Title.objects.count(), (
+            'Проверьте, что seed индексирует произведения для поиска.'
+        )
+        user = User.objects.create(username='new_user', email='new@yamdb.fake')
+        review = Review.objects.create(
+            title=Title.objects.first(), author=user, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=user, text='Комментарий')
@@ -0,0 +1,92 @@
+import json
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Title
+
+SERVER_TIMING_REGEX = re.compile(
+    r'db;desc="(\d+) queries";dur=[\d.]+, '
+    r'serializer;dur=([\d.]+), total;dur=[\d.]+'
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Instrumentation:
+
+    URL = '/api/v1/instrumentation/'
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return [
+            Title.objects.create(
+                name=f'Фильм {number}', year=2000, category=category
+            )
+            for number in range(3)
+        ]
+
+    def test_01_server_timing(self, client, titles):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.TITLES_URL)
+        assert response.status_code == 200
+        match = SERVER_TIMING_REGEX.fullmatch(
+            response.get('Server-Timing', '')
+        )
+        assert match, (
+            'Проверьте, что ответ содержит заголовок Server-Timing с '
+            'числом запросов, временем БД, сериализации и ответа.'
+        )
+        assert int(match.group(1)) == len(queries)
+        assert float(match.group(2)) > 0
+
+    def test_02_log_line(self, client, titles, caplog):
+        with caplog.at_level(logging.INFO, logger='api.instrumentation'):
+            client.get(f'{self.TITLES_URL}{titles[0].pk}/')
+        records = [
+            json.loads(record.getMessage()) for record in caplog.records
+            if record.name == 'api.instrumentation'
+        ]
+        assert len(records) == 1
+        record = records[0]
+        assert record['route'] == 'titles'
+        assert record['method'] == 'GET'
+        assert record['status'] == 200
+        assert record['queries'] > 0
+        assert record['slowest_sql'].startswith('SELECT')
+        assert record['duration_ms'] >= record['sql_ms']
+
+    def test_03_admin_only(self, client, user_client, admin_client):
+        assert client.get(self.URL).status_code == 401
+        assert user_client.get(self.URL).status_code == 403
+        assert admin_client.get(self.URL).status_code == 200
+
+    def test_04_route_histograms(self, client, admin_client, titles):
+        for title in titles:
+            client.get(f'{self.TITLES_URL}{title.pk}/')
+            client.get(f'{self.TITLES_URL}{title.pk}/reviews/')
+        client.get(self.TITLES_URL)
+        response = admin_client.get(self.URL)
+        assert response.status_code == 200
+        routes = {
+            (item['route'], item['method']): item for item in response.json()
+        }
+        title_routes = routes[('titles', 'GET')]
+        assert title_routes['requests'] == len(titles) + 1
+        assert sum(
+            title_routes['queries']['buckets'].values()
+        ) == len(titles) + 1
+        assert sum(
+            title_routes['duration_ms']['buckets'].values()
+        ) == len(titles) + 1
+        assert routes[('reviews', 'GET')]['requests'] == len(titles)
+        assert admin_client.delete(self.URL).status_code == 204
+        assert [
+            item['route'] for item in admin_client.get(self.URL).json()
+        ] == ['api/v1/instrumentation/'], (
+            'Проверьте, что DELETE сбрасывает статистику маршрутов.'
+        )
@@ -0,0 +1,214 @@
+import re
+import threading
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.metrics import collector
+from reviews.models import CatalogTotals, Category, Title, User
+from reviews.outbox import drain_outbox, sample_queue
+from reviews.ratings import get_totals, totals_shard, totals_values
+
+SAMPLE_REGEX = re.compile(r'^(\w+)(\{[^}]*\})? (\S+)$')
+
+
+def parse(text):
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        match = SAMPLE_REGEX.match(line)
+        assert match, f'Строка не в формате Prometheus: {line}'
+        name, labels, value = match.groups()
+        samples[name + (labels or '')] = float(value)
+    return samples
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Metrics:
+
+    URL = '/metrics'
+
+    @pytest.fixture
+    def titles(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return [
+            Title.objects.create(
+                name=f'Фильм {number}', year=2000, category=category
+            )
+            for number in range(2)
+        ]
+
+    def scrape(self, client):
+        response = client.get(self.URL)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        return parse(response.content.decode())
+
+    def test_01_route_labels(self, client, admin_client, titles):
+        for title in titles:
+            client.get(f'/api/v1/titles/{title.pk}/')
+            client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        client.get('/api/v1/titles/999999/')
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/genres/')
+        admin_client.get('/api/v1/users/')
+        samples = self.scrape(client)
+        requests = 'yamdb_http_requests_total{{route="{}",method="GET",status="{}"}}'
+        assert samples[requests.format('titles', 200)] == 2
+        assert samples[requests.format('titles', 404)] == 1
+        assert samples[requests.format('reviews', 200)] == 2
+        for route in ('categories', 'genres', 'users'):
+            assert samples[requests.format(route, 200)] == 1
+        labels = '{route="titles",method="GET"}'
+        count = samples[f'yamdb_http_request_duration_seconds_count{labels}']
+        assert count == 3
+        buckets = [
+            value for name, value in samples.items()
+            if name.startswith(
+                'yamdb_http_request_duration_seconds_bucket'
+                '{route="titles",method="GET"'
+            )
+        ]
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == count
+        assert samples[f'yamdb_http_db_queries_total{labels}'] > 0
+        assert f'yamdb_http_db_duration_seconds_sum{labels}' in samples
+
+    def test_02_business_gauges(self, client, titles, user_client,
+                                admin_client):
+        for review_client, score in ((user_client, 3), (admin_client, 9)):
+            response = review_client.post(
+                f'/api/v1/titles/{titles[0].pk}/reviews/',
+                data={'text': 'Отзыв', 'score': score}
+            )
+            assert response.status_code == 201
+        with CaptureQueriesContext(connection) as queries:
+            samples = self.scrape(client)
+        assert not any(
+            table in query['sql'] for query in queries
+            for table in ('reviews_review', 'reviews_title')
+        ), 'Проверьте, что показатели читаются из хранимых счётчиков.'
+        assert samples['yamdb_titles'] == 2
+        assert samples['yamdb_reviews'] == 2
+        assert samples['yamdb_reviews_by_score{score="3"}'] == 1
+        assert samples['yamdb_reviews_by_score{score="10"}'] == 0
+        assert 'yamdb_emails_sent_total' in samples
+
+    def test_03_threads(self):
+        threads_count, requests = 8, 1000
+
+        def work():
+            for _ in range(requests):
+                collector.observe('titles', 'GET', 200, 0.01, 0.001, 2)
+
+        for _ in range(2):
+            threads = [
+                threading.Thread(target=work) for _ in range(threads_count)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert collector.collect('requests')[('titles', 'GET', '200')] == (
+            2 * threads_count * requests
+        )
+        assert collector.collect('queries')[('titles', 'GET')] == (
+            4 * threads_count * requests
+        )
+        assert len(collector.shards.all()) <= threads_count + 2, (
+            'Проверьте, что наборы завершившихся потоков переиспользуются.'
+        )
+
+    def test_04_totals_follow_changes(self, titles, user_client, admin_client,
+                                      user):
+        url = f'/api/v1/titles/{titles[1].pk}/reviews/'
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        response = user_client.patch(
+            url + f'{response.json()["id"]}/', data={'score': 8}
+        )
+        assert response.status_code == 200
+        for review_client in (user_client, admin_client):
+            response = review_client.post(
+                f'/api/v1/titles/{titles[0].pk}/reviews/',
+                data={'text': 'Отзыв', 'score': 6}
+            )
+            assert response.status_code == 201
+        assert get_totals() == totals_values(Title.objects.all())
+        assert get_totals()['score_8'] == 1
+        response = admin_client.delete(f'/api/v1/titles/{titles[1].pk}/')
+        assert response.status_code == 204
+        User.objects.filter(pk=user.pk).delete()
+        Title.objects.create(name='Новый', year=2001)
+        totals = get_totals()
+        assert totals == totals_values(Title.objects.all())
+        assert totals['titles'] == 2 and totals['reviews'] == 1
+
+    def test_05_access(self, client, settings):
+        settings.METRICS_TOKEN = 'secret'
+        remote = {'REMOTE_ADDR': '203.0.113.5'}
+        assert client.get(self.URL, **remote).status_code == 403, (
+            'Проверьте, что метрики недоступны с посторонних адресов.'
+        )
+        response = client.get(
+            self.URL, HTTP_AUTHORIZATION='Bearer wrong', **remote
+        )
+        assert response.status_code == 403
+        response = client.get(
+            self.URL, HTTP_AUTHORIZATION='Bearer secret', **remote
+        )
+        assert response.status_code == 200
+        settings.METRICS_TOKEN = None
+        response = client.get(
+            self.URL, HTTP_AUTHORIZATION='Bearer None', **remote
+        )
+        assert response.status_code == 403
+
+    def test_06_email_metrics(self, client, settings):
+        settings.EMAIL_OUTBOX_MODE = 'worker'
+        before = self.scrape(client)
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        )
+        assert response.status_code == 200
+        sample_queue()
+        with CaptureQueriesContext(connection) as queries:
+            assert self.scrape(client)['yamdb_email_outbox_depth'] == 1
+        assert not any(
+            'reviews_emailoutbox' in query['sql'] for query in queries
+        ), (
+            'Проверьте, что глубина очереди замеряется при отправке, а не '
+            'запросом к БД при каждом чтении метрик.'
+        )
+        assert drain_outbox() == 1
+        sample_queue()
+        after = self.scrape(client)
+        assert after['yamdb_email_outbox_depth'] == 0
+        for name in (
+            'yamdb_emails_sent_total',
+            'yamdb_email_send_seconds_count',
+            'yamdb_email_delivery_seconds_count',
+            'yamdb_email_delivery_seconds_bucket{le="+Inf"}',
+        ):
+            assert after[name] == before[name] + 1, name
+
+    def test_07_totals_sharded(self, titles, user_client):
+        get_totals()
+        before = dict(CatalogTotals.objects.values_list('shard', 'reviews'))
+        for title in titles:
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                data={'text': 'Отзыв', 'score': 5}
+            )
+            assert response.status_code == 201
+        after = dict(CatalogTotals.objects.values_list('shard', 'reviews'))
+        changed = {shard for shard in after if after[shard] != before[shard]}
+        assert changed == {totals_shard(title.pk) for title in titles}, (
+            'Проверьте, что отзыв меняет строку счётчиков своего '
+            'произведения, а не одну общую строку.'
+        )
+        assert len(changed) == 2
+        assert get_totals() == totals_values(Title.objects.all())
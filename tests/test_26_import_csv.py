@@ -0,0 +1,83 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+CSV_FILES = {
+    'category.csv': (
+        'id,name,slug\n'
+        '1,Фильм,movie\n'
+        '2,Книга,book\n'
+    ),
+    'genre.csv': (
+        'id,name,slug\n'
+        '1,Драма,drama\n'
+        '2,Комедия,comedy\n'
+    ),
+    'titles.csv': (
+        '\ufeffid,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,Мастер и Маргарита,1967,2\n'
+    ),
+    'genre_title.csv': (
+        'id,title_id,genre_id\n'
+        '1,1,1\n'
+        '2,2,1\n'
+        '3,2,2\n'
+    ),
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.fake,user,,,\n'
+        '101,capt_obvious,capt_obvious@yamdb.fake,admin,,,\n'
+    ),
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,"Ставлю десять звёзд!",100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,"Неплохо",101,4,2019-09-25T21:08:21.567Z\n'
+        '3,2,"Классика",100,8,2019-09-26T21:08:21.567Z\n'
+        '4,99,"Нет произведения",101,5,2019-09-27T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,"Согласен",101,2020-01-13T23:20:02.422Z\n'
+    ),
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ImportCsv:
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+        return tmp_path
+
+    def test_01_import(self, data_dir):
+        stdout = StringIO()
+        call_command(
+            'import_csv', '--path', str(data_dir), '--batch-size', '2',
+            stdout=stdout
+        )
+        assert Category.objects.count() == 2
+        assert Genre.objects.count() == 2
+        assert Title.objects.count() == 2
+        assert Title.genre.through.objects.count() == 3
+        assert User.objects.count() == 2
+        assert Review.objects.count() == 3, (
+            'Проверьте, что отзыв на несуществующее произведение '
+            'пропускается.'
+        )
+        assert Comment.objects.count() == 1
+        assert 'review: добавлено 3, пропущено 1' in stdout.getvalue()
+        ratings = {
+            title.pk: (title.rating_sum, title.rating_count)
+            for title in Title.objects.all()
+        }
+        assert ratings == {1: (14, 2), 2: (8, 1)}, (
+            'Проверьте, что после импорта счётчики рейтинга произведений '
+            'пересчитаны по отзывам.'
+        )
+        assert Title.objects.get(pk=1).score_histogram[10] == 1
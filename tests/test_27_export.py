@@ -0,0 +1,93 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Review, Title
+from reviews.ratings import rebuild_ratings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Export:
+
+    URL_TEMPLATE = '/api/v1/export/{name}.{export_format}'
+
+    @pytest.fixture
+    def titles(self, user):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        rated = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, category=category
+        )
+        unrated = Title.objects.create(name='Без, "оценок"', year=2000)
+        Review.objects.create(title=rated, author=user, text='Да', score=9)
+        rebuild_ratings()
+        return rated, unrated
+
+    def read(self, response):
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоком.'
+        )
+        return b''.join(response.streaming_content).decode()
+
+    def test_01_csv_stream(self, admin_client, titles):
+        rated, unrated = titles
+        response = admin_client.get(
+            self.URL_TEMPLATE.format(name='titles', export_format='csv')
+        )
+        assert response['Content-Type'] == 'text/csv'
+        assert 'titles.csv' in response['Content-Disposition']
+        rows = list(csv.reader(StringIO(self.read(response))))
+        assert rows == [
+            ['id', 'name', 'year', 'category', 'rating'],
+            [
+                str(rated.pk), rated.name, '1994',
+                str(rated.category_id), '9'
+            ],
+            [str(unrated.pk), unrated.name, '2000', '', ''],
+        ], (
+            'Проверьте, что выгрузка произведений содержит колонки импорта '
+            'и рейтинг, а значения экранируются по правилам csv.'
+        )
+
+    def test_02_ndjson_stream(self, admin_client, titles, user):
+        response = admin_client.get(
+            self.URL_TEMPLATE.format(name='review', export_format='ndjson')
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = self.read(response).splitlines()
+        assert len(lines) == 1
+        review = json.loads(lines[0])
+        assert review['author'] == user.pk
+        assert review['score'] == 9
+        assert review['text'] == 'Да'
+
+    def test_03_admin_only(self, client, user_client, moderator_client):
+        url = self.URL_TEMPLATE.format(name='titles', export_format='csv')
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403
+        assert moderator_client.get(url).status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору.'
+        )
+
+    def test_04_unknown_table(self, admin_client):
+        for name, export_format in (('secrets', 'csv'), ('titles', 'xml')):
+            response = admin_client.get(self.URL_TEMPLATE.format(
+                name=name, export_format=export_format
+            ))
+            assert response.status_code == 404
+
+    def test_05_command(self, tmp_path, titles):
+        call_command(
+            'export_csv', '--path', str(tmp_path), stdout=StringIO()
+        )
+        with open(tmp_path / 'titles.csv', encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        assert [row['name'] for row in rows] == [
+            title.name for title in titles
+        ]
+        assert (tmp_path / 'comments.csv').read_text(
+            encoding='utf-8'
+        ).splitlines() == ['id,review_id,text,author,pub_date']